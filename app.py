@@ -2,6 +2,7 @@
 
 import os
 import logging
+import click
 from logging.handlers import RotatingFileHandler
 from flask import Flask, render_template, redirect, url_for
 from flask_migrate import Migrate
@@ -9,6 +10,7 @@ from flask_login import LoginManager, current_user, login_required
 from models import db, User, Student, Classe
 from blueprints.admin import DEFAULT_YEAR
 from models import SchoolYear
+from services.database import normalize_database_url, engine_options_for
 
 
 # -------------------------
@@ -16,10 +18,54 @@ from models import SchoolYear
 # -------------------------
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "change_this_secret_key")
-    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///app_gestion.db")
+    SQLALCHEMY_DATABASE_URI = normalize_database_url(os.environ.get("DATABASE_URL", "sqlite:///app_gestion.db"))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # PostgreSQL : pool dimensionné via DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_MAX_CONNECTIONS...
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options_for(SQLALCHEMY_DATABASE_URI)
+
+    # Profil SQLite (ignoré pour les autres moteurs) : appliqué à chaque connexion
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", "-20000"))  # négatif = en Kio
+    SQLITE_TEMP_STORE = os.environ.get("SQLITE_TEMP_STORE", "MEMORY")
+    # Désactivé par défaut : message_logs et report_cards gardent des références
+    # vers des parents/élèves supprimés, ce que la contrainte refuserait.
+    SQLITE_FOREIGN_KEYS = os.environ.get("SQLITE_FOREIGN_KEYS", "0") == "1"
+
+    # Instrumentation SQL : en-tête Server-Timing + journal des requêtes lentes
+    SQL_INSTRUMENTATION = os.environ.get("SQL_INSTRUMENTATION", "1") == "1"
+    SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+    # Profilage à la demande (?_profile=1, admins) ; vide = instance/profiles
+    PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "1") == "1"
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", "")
+    # Métriques Prometheus (/metrics) agrégées entre workers ; vide = instance/metrics
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+    METRICS_DIR = os.environ.get("METRICS_DIR", "")
+    METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "5"))
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")  # si défini : Authorization: Bearer <token>
+
+    # Cache des classes / matières / année active (secondes, 0 = désactivé)
+    REFERENCE_CACHE_TTL = int(os.environ.get("REFERENCE_CACHE_TTL", "300"))
+    # Bulletins / statistiques de classe déjà rendus, par processus (0 = désactivé)
+    RENDER_CACHE_SIZE = int(os.environ.get("RENDER_CACHE_SIZE", "256"))
+    # Tableau de bord des notes : taille de page (pagination par curseur)
+    NOTES_PAGE_SIZE = int(os.environ.get("NOTES_PAGE_SIZE", "50"))
+    NOTES_MAX_PAGE_SIZE = int(os.environ.get("NOTES_MAX_PAGE_SIZE", "500"))
+    # Calcul des moyennes : « nom=poids,... » ; types absents = 1, matières absentes = coefficient 1
+    ASSESSMENT_TYPE_WEIGHTS = os.environ.get("ASSESSMENT_TYPE_WEIGHTS", "interrogation=1,devoir=1,composition=2")
+    SUBJECT_COEFFICIENTS = os.environ.get("SUBJECT_COEFFICIENTS", "")
+
     LOG_FILE = os.environ.get("LOG_FILE", "app_gestion.log")
     LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    # Backends d'export à précharger au démarrage (ex: "pdf,xlsx"), vide = chargement paresseux
+    EXPORT_WARM_BACKENDS = os.environ.get("EXPORT_WARM_BACKENDS", "")
+    # Export des notes en flux : taille des lots lus en base
+    EXPORT_YIELD_PER = int(os.environ.get("EXPORT_YIELD_PER", "1000"))
+    # Bulletins PDF en lot : dossier (vide = instance/bulletins) et taille du pool (0 = nombre de CPU)
+    BULLETIN_DIR = os.environ.get("BULLETIN_DIR", "")
+    BULLETIN_WORKERS = int(os.environ.get("BULLETIN_WORKERS", "0"))
 
 
 # -------------------------
@@ -42,6 +88,19 @@ def create_app(config_class=Config):
     login_manager.init_app(app)
     migrate.init_app(app, db)
 
+    from services.database import configure_engines
+    from services.instrumentation import init_query_instrumentation, init_request_profiler
+    from services.metrics import init_metrics
+    from services.reference import init_reference_cache
+    from services.render_cache import init_render_cache
+    import services.stats  # noqa: F401  (événements de maintien des compteurs)
+    configure_engines(app, db)
+    init_query_instrumentation(app, db)
+    init_request_profiler(app)
+    init_metrics(app)
+    init_reference_cache(app)
+    init_render_cache(app)
+
     setup_logging(app)
 
     # -------------------------
@@ -56,10 +115,11 @@ def create_app(config_class=Config):
     @app.route("/dashboard")
     @login_required
     def dashboard():
-        total_students = Student.query.count()
-        classes = Classe.query.order_by(Classe.name).all()
-        active_year = SchoolYear.query.filter_by(active=True).first()
-        current_year = active_year.year if active_year else DEFAULT_YEAR
+        from services.reference import get_active_year, get_classes
+        from services.stats import dashboard_counters
+        total_students = dashboard_counters()["students"]
+        classes = get_classes()
+        current_year = get_active_year() or DEFAULT_YEAR
         return render_template(
             "dashboard.html",
             total_students=total_students,
@@ -92,31 +152,116 @@ def create_app(config_class=Config):
                 print("L'utilisateur admin existe déjà.")
 
     # -------------------------
-    # Enregistrer blueprints
+    # Commande CLI : bootstrap
     # -------------------------
-    from blueprints import register_blueprints
-    register_blueprints(app)
+    @app.cli.command("bootstrap")
+    def bootstrap_command():
+        """Crée le schéma et les classes prédéfinies (idempotent)."""
+        from services.bootstrap import bootstrap_database
+        created = bootstrap_database()
+        print(f"Bootstrap terminé — {created} classe(s) créée(s).")
 
     # -------------------------
-    # Initialiser les classes prédéfinies
+    # Commande CLI : rebuild-stats
     # -------------------------
-    with app.app_context():
-        db.create_all()
-        
-        # Classes prédéfinies
-        predefined_classes = [
-            '6ème', '5ème', '4ème', '3ème', 
-            '2nde AB', '2nde CD', 
-            '1ère AB', '1ère CD', 
-            'Tle AB', 'Tle CD'
-        ]
-        
-        for class_name in predefined_classes:
-            if not Classe.query.filter_by(name=class_name).first():
-                new_class = Classe(name=class_name)
-                db.session.add(new_class)
-        
+    @app.cli.command("rebuild-stats")
+    def rebuild_stats_command():
+        """Recalcule la table stats_counters depuis les élèves, classes et notes."""
+        from services.stats import rebuild_counters
+        values = rebuild_counters()
         db.session.commit()
+        print(f"Compteurs reconstruits — {values['students']} élève(s), "
+              f"{values['assessments']} note(s), {values['subjects']} matière(s).")
+
+    # -------------------------
+    # Commande CLI : generate-bulletins
+    # -------------------------
+    @app.cli.command("generate-bulletins")
+    @click.option("--term", type=click.IntRange(1, 3), required=True, help="Trimestre")
+    @click.option("--class-id", type=int, default=None, help="Une seule classe (toutes par défaut)")
+    @click.option("--workers", type=int, default=None, help="Processus de rendu (BULLETIN_WORKERS)")
+    @click.option("--force", is_flag=True, help="Régénère aussi les bulletins à jour")
+    def generate_bulletins_command(term, class_id, workers, force):
+        """Génère les bulletins PDF du trimestre (reprend là où une exécution s'est arrêtée)."""
+        from services.bulletins import acquire_generation_lock, generate_bulletins, release_generation_lock
+
+        def progress(report):
+            if report.done and (report.done % 50 == 0 or report.done == report.total):
+                print(f"  {report.done}/{report.total} — {report.rendered} rendu(s), "
+                      f"{report.skipped} à jour, {report.failed} en échec")
+
+        lock = acquire_generation_lock(app)
+        if lock is None:
+            raise click.ClickException("Une génération des bulletins est déjà en cours.")
+        try:
+            report = generate_bulletins(term, class_id, workers=workers, force=force, progress=progress)
+        finally:
+            release_generation_lock(lock)
+        print(f"Bulletins T{term} terminés — {report.rendered} rendu(s), {report.skipped} à jour, "
+              f"{report.failed} en échec.")
+
+    # -------------------------
+    # Commande CLI : dispatch-messages
+    # -------------------------
+    @app.cli.command("dispatch-messages")
+    @click.option("--batch-size", type=click.IntRange(1), default=50, help="Messages par lot")
+    @click.option("--max-attempts", type=click.IntRange(1), default=3, help="Essais WhatsApp par message")
+    @click.option("--interval", type=float, default=5.0,
+                  help="Pause (s) quand la file est vide ou qu'aucun message d'un lot n'est parti")
+    @click.option("--claim-timeout", type=click.IntRange(1), default=300,
+                  help="Délai (s) après lequel un message resté 'sending' est repris")
+    @click.option("--once", is_flag=True,
+                  help="Un seul passage sur les messages en attente au démarrage, puis arrêt (cron)")
+    def dispatch_messages_command(batch_size, max_attempts, interval, claim_timeout, once):
+        """Envoie aux parents les messages en file dans MessageLog (worker hors requêtes HTTP)."""
+        import time
+        from sqlalchemy import func
+        from models import MessageLog
+        from services.messaging import BulkMessageProcessor
+
+        total = 0
+        # --once : parcours par id croissant, borné aux messages présents au démarrage ;
+        # un échec n'est retenté qu'à l'exécution suivante (essais espacés par le cron)
+        last_id, max_id = 0, None
+        if once:
+            max_id = db.session.query(func.max(MessageLog.id)).scalar() or 0
+        try:
+            while True:
+                query = BulkMessageProcessor.pending_query(max_attempts, claim_timeout)
+                if once:
+                    query = query.filter(MessageLog.id > last_id, MessageLog.id <= max_id)
+                batch = query.limit(batch_size).all()
+                if batch:
+                    last_id = batch[-1].id
+                sent = BulkMessageProcessor.deliver(batch, claim=True) if batch else 0
+                total += sent
+                if batch:
+                    print(f"  {len(batch)} message(s) traité(s), {sent} envoyé(s)")
+                if once:
+                    if len(batch) < batch_size:
+                        break
+                elif len(batch) < batch_size:
+                    # File vide pour l'instant : les échecs seront retentés au prochain passage
+                    time.sleep(interval)
+                elif not sent:
+                    # Lot complet sans aucun envoi (fournisseur en panne) : ne pas enchaîner les essais
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            db.session.remove()
+        print(f"Envoi terminé — {total} message(s) envoyé(s).")
+
+    # -------------------------
+    # Enregistrer blueprints
+    # -------------------------
+    from blueprints import register_blueprints
+    register_blueprints(app)
+
+    warm = app.config.get("EXPORT_WARM_BACKENDS")
+    if warm:
+        from services.exports import warm_backends
+        warm_backends([name.strip() for name in warm.split(",") if name.strip()])
 
     return app
 
@@ -156,6 +301,9 @@ def load_user(user_id):
 # -------------------------
 if __name__ == "__main__":
     app = create_app()
+    with app.app_context():
+        from services.bootstrap import bootstrap_database
+        bootstrap_database()
     app.run(host="127.0.0.1", port=5000, debug=True)
 
 # Pour Flask CLI / WSGI servers
@@ -1,6 +1,7 @@
-from flask import Blueprint, request, redirect, url_for, flash, session
-from flask_login import login_required
+from flask import Blueprint, request, redirect, url_for, flash, session, jsonify, abort, current_app, send_from_directory
+from flask_login import login_required, current_user
 from models import db, SchoolYear
+from services.reference import get_active_year
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -30,8 +31,7 @@ def set_school_year():
 @login_required
 def close_and_open_year():
     years = ["2023-2024", "2024-2025", "2025-2026", "2026-2027"]
-    active_year = SchoolYear.query.filter_by(active=True).first()
-    current_year = active_year.year if active_year else DEFAULT_YEAR
+    current_year = get_active_year() or DEFAULT_YEAR
     try:
         idx = years.index(current_year)
         if idx + 1 < len(years):
@@ -52,3 +52,78 @@ def close_and_open_year():
     except ValueError:
         flash("Année courante inconnue.", "danger")
     return redirect(url_for('dashboard'))
+
+
+@admin_bp.route('/db-pool')
+@login_required
+def db_pool_metrics():
+    """Métriques du pool de connexions (checkouts, attente, connexions ouvertes)."""
+    if not current_user.is_admin():
+        abort(403)
+    from services.database import pool_metrics
+    return jsonify(pool_metrics())
+
+
+@admin_bp.route('/profiles')
+@login_required
+def list_profiles():
+    """Profils enregistrés via ?_profile=1 (les plus récents d'abord)."""
+    if not current_user.is_admin():
+        abort(403)
+    import json, os
+    from services.instrumentation import profile_dir
+    directory = profile_dir(current_app)
+    profiles = []
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory), reverse=True):
+            if name.endswith('.json'):
+                with open(os.path.join(directory, name), encoding='utf-8') as f:
+                    meta = json.load(f)
+                meta['file'] = name[:-len('.json')] + '.prof'
+                profiles.append(meta)
+    return jsonify(profiles)
+
+
+@admin_bp.route('/profiles/<path:name>')
+@login_required
+def download_profile(name):
+    if not current_user.is_admin():
+        abort(403)
+    from services.instrumentation import profile_dir
+    return send_from_directory(profile_dir(current_app), name, as_attachment=True)
+
+
+@admin_bp.route('/bulletins', methods=['POST'])
+@login_required
+def generate_bulletins():
+    """Lance la génération des bulletins PDF en tâche de fond (term, class_id optionnel, force)."""
+    if not current_user.is_admin():
+        abort(403)
+    from services.bulletins import start_background_job
+    term = request.form.get('term', type=int)
+    if term not in (1, 2, 3):
+        return jsonify({"error": "Trimestre invalide"}), 400
+    class_id = request.form.get('class_id', type=int)
+    force = request.form.get('force') == '1'
+    if not start_background_job(current_app._get_current_object(), term, class_id, force):
+        return jsonify({"error": "Une génération est déjà en cours"}), 409
+    return jsonify({"status": "started", "status_url": url_for('admin.bulletins_status')}), 202
+
+
+@admin_bp.route('/bulletins/status')
+@login_required
+def bulletins_status():
+    """Avancement de la dernière génération (total, done, rendered, skipped, failed)."""
+    if not current_user.is_admin():
+        abort(403)
+    from services.bulletins import job_status
+    return jsonify(job_status(current_app) or {"status": "idle"})
+
+
+@admin_bp.route('/bulletins/files/<path:name>')
+@login_required
+def download_bulletin(name):
+    if not current_user.is_admin():
+        abort(403)
+    from services.bulletins import bulletin_dir
+    return send_from_directory(bulletin_dir(current_app), name, as_attachment=True)
@@ -3,21 +3,17 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, send_file, jsonify
 from flask_login import login_required
 from models import db, Student, Classe, Parent
+from sqlalchemy.orm import joinedload
 from forms import StudentForm, DeleteForm
 import os
 from werkzeug.utils import secure_filename
-from openpyxl import load_workbook, Workbook
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from datetime import datetime
+from services.exports import get_renderer
+from services.reference import class_choices, get_classes
 import io
 
+# openpyxl, reportlab et python-docx sont importés à la première utilisation
+# (voir services/exports.py) pour ne pas alourdir le démarrage des workers.
+
 # Blueprint principal pour la gestion des élèves
 eleves_bp = Blueprint(
     "eleves",
@@ -33,7 +29,8 @@ eleves_bp = Blueprint(
 @eleves_bp.route("/")
 @login_required
 def list_eleves():
-    students = Student.query.order_by(Student.last_name).all()
+    # La classe de chaque élève est affichée : jointure plutôt qu'une requête par ligne
+    students = Student.query.options(joinedload(Student.classe)).order_by(Student.last_name).all()
     delete_form = DeleteForm()  # Crée le formulaire pour le CSRF
     return render_template("eleves/eleves_list.html", students=students, delete_form=delete_form)
 
@@ -63,7 +60,7 @@ def get_class_id(class_name):
 @login_required
 def add_eleve():
     form = StudentForm()
-    form.class_id.choices = [(c.id, c.name) for c in Classe.query.all()]
+    form.class_id.choices = class_choices()
 
     if form.validate_on_submit():
 
@@ -139,7 +136,7 @@ def edit_eleve(id):
     student = Student.query.get_or_404(id)
     form = StudentForm(obj=student)
 
-    form.class_id.choices = [(c.id, c.name) for c in Classe.query.all()]
+    form.class_id.choices = class_choices()
 
     if form.validate_on_submit():
 
@@ -191,7 +188,7 @@ def delete_eleve(id):
 @eleves_bp.route("/import", methods=["GET", "POST"])
 @login_required
 def import_eleves():
-    classes = Classe.query.order_by(Classe.name).all()
+    classes = get_classes()
 
     if request.method == "POST":
         file = request.files.get("excel_file")
@@ -211,6 +208,7 @@ def import_eleves():
         file.save(filepath)
 
         try:
+            from openpyxl import load_workbook
             wb = load_workbook(filepath)
             sheet = wb.active
 
@@ -308,7 +306,10 @@ def import_eleves():
 @eleves_bp.route("/download-template")
 @login_required
 def download_template():
-    classes = Classe.query.order_by(Classe.name).all()
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill
+
+    classes = get_classes()
 
     wb = Workbook()
     ws = wb.active
@@ -335,7 +336,6 @@ def download_template():
     ws["H2"] = "Oui"
 
     # Style en-têtes
-    from openpyxl.styles import Font, PatternFill
     header_fill = PatternFill(start_color="003F7F", end_color="003F7F", fill_type="solid")
     header_font = Font(bold=True, color="FFFFFF", size=11)
     
@@ -401,9 +401,10 @@ def download_template():
 @login_required
 def download_example():
     """Télécharge un fichier Excel d'exemple avec données"""
+    from openpyxl import Workbook
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
     
-    classes = Classe.query.order_by(Classe.name).all()
+    classes = get_classes()
     
     wb = Workbook()
     ws = wb.active
@@ -530,182 +531,36 @@ def details_eleve(id):
 
 
 # --------------------------------------------------------
-# EXPORTER LA LISTE DES ÉLÈVES PAR CLASSE (EXCEL)
+# EXPORTER LA LISTE DES ÉLÈVES PAR CLASSE (EXCEL / PDF / WORD)
 # --------------------------------------------------------
-@eleves_bp.route("/export/excel/<int:class_id>")
-@login_required
-def export_excel(class_id):
+def _send_students_export(fmt, class_id):
     classe = Classe.query.get_or_404(class_id)
     students = Student.query.filter_by(class_id=class_id).order_by(Student.last_name).all()
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = classe.name
-
-    # En-têtes
-    ws["A1"] = "ID"
-    ws["B1"] = "Nom"
-    ws["C1"] = "Prénom"
-    ws["D1"] = "Date de naissance"
-    ws["E1"] = "Parents"
-
-    # Données
-    row = 2
-    for student in students:
-        parents_names = ", ".join([f"{p.first_name} {p.last_name}" for p in student.parents])
-        ws[f"A{row}"] = student.id
-        ws[f"B{row}"] = student.last_name
-        ws[f"C{row}"] = student.first_name
-        ws[f"D{row}"] = str(student.birthdate) if student.birthdate else ""
-        ws[f"E{row}"] = parents_names
-        row += 1
-
-    stream = io.BytesIO()
-    wb.save(stream)
-    stream.seek(0)
+    export = get_renderer(fmt)
+    stream = export.render(classe, students)
 
     return send_file(
         stream,
         as_attachment=True,
-        download_name=f"eleves_{classe.name}.xlsx",
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        download_name=f"eleves_{classe.name}.{export.extension}",
+        mimetype=export.mimetype
     )
 
 
-# --------------------------------------------------------
-# EXPORTER LA LISTE DES ÉLÈVES PAR CLASSE (PDF)
-# --------------------------------------------------------
-@eleves_bp.route("/export/pdf/<int:class_id>")
+@eleves_bp.route("/export/excel/<int:class_id>")
 @login_required
-def export_pdf(class_id):
-    classe = Classe.query.get_or_404(class_id)
-    students = Student.query.filter_by(class_id=class_id).order_by(Student.last_name).all()
-
-    stream = io.BytesIO()
-    doc = SimpleDocTemplate(stream, pagesize=A4)
-    elements = []
-
-    # Titre
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#003f7f'),
-        spaceAfter=12,
-        alignment=1  # Center
-    )
-    elements.append(Paragraph(f"Liste des Élèves - Classe {classe.name}", title_style))
-    elements.append(Spacer(1, 0.3 * inch))
-
-    # Tableau
-    data = [["ID", "Nom", "Prénom", "Date de naissance", "Parents"]]
-    for student in students:
-        parents_names = ", ".join([f"{p.first_name} {p.last_name}" for p in student.parents])
-        data.append([
-            str(student.id),
-            student.last_name,
-            student.first_name,
-            str(student.birthdate) if student.birthdate else "",
-            parents_names
-        ])
-
-    table = Table(data, colWidths=[0.5*inch, 1.2*inch, 1.2*inch, 1.5*inch, 2*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003f7f')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-    ]))
-
-    elements.append(table)
-    elements.append(Spacer(1, 0.3 * inch))
-
-    # Pied de page
-    footer_text = f"Généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}"
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.grey,
-        alignment=1
-    )
-    elements.append(Paragraph(footer_text, footer_style))
+def export_excel(class_id):
+    return _send_students_export("xlsx", class_id)
 
-    doc.build(elements)
-    stream.seek(0)
 
-    return send_file(
-        stream,
-        as_attachment=True,
-        download_name=f"eleves_{classe.name}.pdf",
-        mimetype="application/pdf"
-    )
+@eleves_bp.route("/export/pdf/<int:class_id>")
+@login_required
+def export_pdf(class_id):
+    return _send_students_export("pdf", class_id)
 
 
-# --------------------------------------------------------
-# EXPORTER LA LISTE DES ÉLÈVES PAR CLASSE (WORD)
-# --------------------------------------------------------
 @eleves_bp.route("/export/word/<int:class_id>")
 @login_required
 def export_word(class_id):
-    classe = Classe.query.get_or_404(class_id)
-    students = Student.query.filter_by(class_id=class_id).order_by(Student.last_name).all()
-
-    doc = Document()
-
-    # Titre
-    title = doc.add_heading(f"Liste des Élèves - Classe {classe.name}", level=1)
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    title_format = title.runs[0]
-    title_format.font.size = Pt(16)
-    title_format.font.color.rgb = RGBColor(0, 63, 127)
-
-    doc.add_paragraph()
-
-    # Tableau
-    table = doc.add_table(rows=1, cols=5)
-    table.style = 'Light Grid Accent 1'
-
-    # En-têtes
-    hdr_cells = table.rows[0].cells
-    hdr_cells[0].text = "ID"
-    hdr_cells[1].text = "Nom"
-    hdr_cells[2].text = "Prénom"
-    hdr_cells[3].text = "Date de naissance"
-    hdr_cells[4].text = "Parents"
-
-    # Données
-    for student in students:
-        row_cells = table.add_row().cells
-        parents_names = ", ".join([f"{p.first_name} {p.last_name}" for p in student.parents])
-        row_cells[0].text = str(student.id)
-        row_cells[1].text = student.last_name
-        row_cells[2].text = student.first_name
-        row_cells[3].text = str(student.birthdate) if student.birthdate else ""
-        row_cells[4].text = parents_names
-
-    doc.add_paragraph()
-    footer = doc.add_paragraph(f"Généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}")
-    footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    footer_format = footer.runs[0]
-    footer_format.font.size = Pt(8)
-    footer_format.font.color.rgb = RGBColor(128, 128, 128)
-
-    stream = io.BytesIO()
-    doc.save(stream)
-    stream.seek(0)
-
-    return send_file(
-        stream,
-        as_attachment=True,
-        download_name=f"eleves_{classe.name}.docx",
-        mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    )
-
+    return _send_students_export("docx", class_id)
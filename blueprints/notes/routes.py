@@ -1,12 +1,31 @@
 # blueprints/notes/routes.py
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import (
+    Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app,
+    Response, abort, send_file, stream_with_context
+)
 from flask_login import login_required, current_user
 from functools import wraps
+import hashlib
+import json
 from models import db, Assessment, Student, Classe, Parent, MessageLog
 from forms import AssessmentForm, BulkAssessmentForm
 from services import ParentMessagingService
+from services.aggregates import (
+    aggregate_assessments, bulletin_summary, class_trend, school_matrix, score_distributions
+)
+from services.exports import get_renderer
+from services.grading import compute_class_results
+from services.render_cache import assessments_version, cached_page, cached_value, conditional_json
+from services.reference import class_choices, get_classes, get_subjects
+from services.stats import dashboard_counters
+from services.assessments import (
+    upsert_assessments, assessment_filters_from_args, filter_assessments, keyset_page,
+    keyset_sorted_page, parse_sort, assessment_columns_query
+)
 from datetime import datetime, date
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.exc import IntegrityError
 
 notes_bp = Blueprint("notes", __name__, template_folder="../../templates")
 
@@ -33,40 +52,39 @@ def admin_or_director_required(f):
 @login_required
 def notes_dashboard():
     """Tableau de bord de gestion des notes avec filtres et récapitulatif"""
-    from sqlalchemy import and_
-    
     # Paramètres de filtrage
-    class_id = request.args.get("class_id", type=int)
-    subject = request.args.get("subject", type=str)
-    term = request.args.get("term", type=int)
+    filters = assessment_filters_from_args(request.args)
+    class_id = filters["class_id"]
+    subject = filters["subject"]
+    term = filters["term"]
     date_str = request.args.get("date", type=str)
+
+    # Pagination par curseur (date, id) : taille de page bornée
+    per_page = request.args.get("per_page", type=int) or current_app.config.get("NOTES_PAGE_SIZE", 50)
+    per_page = max(1, min(per_page, current_app.config.get("NOTES_MAX_PAGE_SIZE", 500)))
+    cursor = request.args.get("cursor", type=str)
+
+    # Élève et classe affichés sur chaque ligne : chargés avec la page (pas de N+1)
+    query = Assessment.query.options(joinedload(Assessment.student).joinedload(Student.classe))
+    query = filter_assessments(query, **filters)
+    assessments, next_cursor = keyset_page(query, cursor, per_page)
+
+    # Paramètres conservés dans les liens "Charger plus"
+    page_args = {
+        "class_id": class_id,
+        "subject": subject,
+        "term": term,
+        "date": date_str,
+        "per_page": request.args.get("per_page", type=int),
+    }
+    page_args = {key: value for key, value in page_args.items() if value}
     
-    # Construire la requête avec filtres
-    query = Assessment.query
-    
-    if class_id:
-        query = query.join(Student).filter(Student.class_id == class_id)
-    
-    if subject:
-        query = query.filter(Assessment.subject == subject)
-    
-    if term:
-        query = query.filter(Assessment.term == term)
-    
-    if date_str:
-        try:
-            filter_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            query = query.filter(Assessment.date == filter_date)
-        except ValueError:
-            pass
-    
-    assessments = query.order_by(Assessment.date.desc(), Assessment.id.desc()).all()
-    
-    # Statistiques globales
-    total_notes = Assessment.query.count()
-    total_classes = Classe.query.count()
-    total_subjects = db.session.query(Assessment.subject).distinct().count()
-    notes_today = Assessment.query.filter(Assessment.date == date.today()).count()
+    # Statistiques globales (table stats_counters, une lecture par clé primaire)
+    counters = dashboard_counters()
+    total_notes = counters["assessments"]
+    total_classes = counters["classes"]
+    total_subjects = counters["subjects"]
+    notes_today = counters["today"]
     
     # Récapitulatif par type d'évaluation
     assessment_types_summary = {
@@ -75,17 +93,16 @@ def notes_dashboard():
         'composition': {'count': 0, 'average': 0}
     }
     
-    for atype in assessment_types_summary.keys():
-        type_assessments = Assessment.query.filter_by(assessment_type=atype).all()
-        assessment_types_summary[atype]['count'] = len(type_assessments)
-        if type_assessments:
-            avg = sum(a.normalized_score(20.0) for a in type_assessments) / len(type_assessments)
-            assessment_types_summary[atype]['average'] = avg
+    # Une seule requête GROUP BY, avec les filtres actifs
+    by_type = aggregate_assessments(Assessment.assessment_type, filters)
+    for atype, summary in assessment_types_summary.items():
+        if atype in by_type:
+            summary['count'] = by_type[atype]['count']
+            summary['average'] = by_type[atype]['average']
     
     # Listes pour filtres
-    classes = Classe.query.order_by(Classe.name).all()
-    subjects_list = db.session.query(Assessment.subject).distinct().order_by(Assessment.subject).all()
-    subjects_list = [s[0] for s in subjects_list if s[0]]
+    classes = get_classes()
+    subjects_list = get_subjects()
     
     return render_template(
         "notes/notes_management_dashboard.html",
@@ -100,7 +117,11 @@ def notes_dashboard():
         selected_class_id=class_id,
         selected_subject=subject,
         selected_term=term,
-        selected_date=date_str
+        selected_date=date_str,
+        next_cursor=next_cursor,
+        current_cursor=cursor,
+        page_args=page_args,
+        export_args={key: value for key, value in page_args.items() if key != "per_page"}
     )
 
 
@@ -112,6 +133,31 @@ def list_notes():
     return redirect(url_for("notes.notes_dashboard"))
 
 
+# --------------------------------------------------------
+# EXPORT DES NOTES FILTRÉES (CSV / XLSX EN FLUX)
+# --------------------------------------------------------
+@notes_bp.route("/export/<string:fmt>")
+@login_required
+def export_notes(fmt):
+    """Exporte les notes filtrées du tableau de bord, lues par lots et envoyées en flux."""
+    try:
+        export = get_renderer(f"grades_{fmt}")
+    except ValueError:
+        abort(404)
+
+    query = assessment_columns_query(assessment_filters_from_args(request.args))
+    rows = query.order_by(Assessment.date.desc(), Assessment.id.desc()).yield_per(
+        current_app.config.get("EXPORT_YIELD_PER", 1000)
+    )
+
+    filename = f"notes_{date.today():%Y%m%d}.{export.extension}"
+    return Response(
+        stream_with_context(export.render(rows)),
+        mimetype=export.mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 # --------------------------------------------------------
 # SAISIE DES NOTES PAR CLASSE
 # --------------------------------------------------------
@@ -120,7 +166,7 @@ def list_notes():
 def notes_entry_by_class():
     """Interface de saisie des notes par classe"""
     form = BulkAssessmentForm()
-    form.class_id.choices = [(c.id, c.name) for c in Classe.query.order_by(Classe.name).all()]
+    form.class_id.choices = class_choices()
     
     students_data = []
     selected_class = None
@@ -160,46 +206,43 @@ def notes_entry_by_class():
             # Récupérer les élèves de la classe
             students = Student.query.filter_by(class_id=class_id).order_by(Student.last_name).all()
             
-            # Traiter l'ajout des notes
-            count = 0
+            # Construire les lignes à enregistrer (une seule écriture pour la classe)
+            rows = []
             for student in students:
                 score_key = f"score_{student.id}"
                 if score_key in request.form:
                     try:
                         score = float(request.form[score_key])
                         if score > 0:  # N'enregistrer que si la note est saisie (> 0)
-                            # Vérifier un doublon
-                            exists = Assessment.query.filter_by(
-                                student_id=student.id,
-                                subject=subject,
-                                assessment_type=assessment_type,
-                                date=note_date,
-                                term=term
-                            ).first()
-                            
-                            if not exists:
-                                assessment = Assessment(
-                                    student_id=student.id,
-                                    subject=subject,
-                                    assessment_type=assessment_type,
-                                    score=score,
-                                    max_score=max_score,
-                                    date=note_date,
-                                    term=term
-                                )
-                                db.session.add(assessment)
-                                count += 1
+                            rows.append({
+                                "student_id": student.id,
+                                "subject": subject,
+                                "assessment_type": assessment_type,
+                                "score": score,
+                                "max_score": max_score,
+                                "date": note_date,
+                                "term": term,
+                            })
                     except (ValueError, TypeError):
                         pass
             
-            if count > 0:
+            counts = upsert_assessments(rows)
+            written = counts["inserted"] + counts["updated"]
+            
+            if written > 0:
+                # Correspondance parent mise en file dans la même transaction que les notes ;
+                # l'envoi est fait par le worker (flask dispatch-messages)
+                ParentMessagingService.queue_daily_notes(class_id, subject, note_date)
                 db.session.commit()
-                flash(f"✅ {count} note(s) enregistrée(s) avec succès !", "success")
-                
-                # Envoyer correspondance parent via le service
-                ParentMessagingService.send_daily_notes(class_id, subject, note_date)
+                flash(
+                    f"✅ {counts['inserted']} note(s) enregistrée(s), "
+                    f"{counts['updated']} mise(s) à jour, {counts['skipped']} inchangée(s).",
+                    "success"
+                )
                 
                 return redirect(url_for("notes.notes_dashboard"))
+            elif counts["skipped"] > 0:
+                flash(f"ℹ️ {counts['skipped']} note(s) déjà enregistrée(s), aucune modification.", "info")
             else:
                 flash("❌ Aucune note valide n'a été saisie.", "danger")
     
@@ -245,12 +288,18 @@ def add_note():
             term=form.term.data,
         )
         db.session.add(note)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("⚠️ Cette note existe déjà (même élève, matière, type, date et trimestre).", "warning")
+            return render_template("notes/notes_form.html", form=form)
         flash("✅ Note ajoutée avec succès !", "success")
         
-        # Envoyer message au(x) parent(s) via le service
+        # Message au(x) parent(s) mis en file (envoyé par flask dispatch-messages)
         student = Student.query.get(form.student_id.data)
-        ParentMessagingService.send_individual_note(student, note)
+        ParentMessagingService.queue_individual_note(student, note)
+        db.session.commit()
         
         return redirect(url_for("notes.list_notes"))
 
@@ -278,7 +327,12 @@ def edit_note(id):
         note.date = form.date.data or date.today()
         note.term = form.term.data
         
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("⚠️ Une note identique existe déjà pour cet élève.", "warning")
+            return render_template("notes/notes_form.html", form=form, note=note)
         flash("✅ Note mise à jour avec succès !", "success")
         return redirect(url_for("notes.list_notes"))
     
@@ -316,40 +370,60 @@ def delete_note(id):
 @login_required
 def student_bulletin(student_id, term):
     """Affiche le bulletin d'un élève pour un trimestre"""
-    student = Student.query.get_or_404(student_id)
-    
-    assessments = Assessment.query.filter_by(
-        student_id=student_id,
-        term=term
-    ).order_by(Assessment.date, Assessment.subject).all()
-    
-    # Statistiques par matière
-    subjects_stats = {}
-    for assessment in assessments:
-        if assessment.subject not in subjects_stats:
-            subjects_stats[assessment.subject] = {
-                'scores': [],
-                'types': {}
-            }
-        subjects_stats[assessment.subject]['scores'].append(assessment.score)
-        
-        atype = assessment.assessment_type
-        if atype not in subjects_stats[assessment.subject]['types']:
-            subjects_stats[assessment.subject]['types'][atype] = []
-        subjects_stats[assessment.subject]['types'][atype].append(assessment.score)
-    
-    # Calcul moyennes
-    for subject, data in subjects_stats.items():
-        data['average'] = sum(data['scores']) / len(data['scores']) if data['scores'] else 0
-        for atype, scores in data['types'].items():
-            data['types'][atype + '_avg'] = sum(scores) / len(scores) if scores else 0
-    
-    return render_template(
+    student = Student.query.options(joinedload(Student.classe)).filter_by(id=student_id).first_or_404()
+    show_details = request.args.get("details", type=int) == 1
+
+    # Le rang dépend de toute la classe : version des notes de la classe (ou de l'élève seul)
+    if student.class_id:
+        version = assessments_version(term, class_id=student.class_id)
+    else:
+        version = assessments_version(term, student_id=student_id)
+    name = f"bulletin:{student_id}:{term}:{int(show_details)}:{student.full_name}:{student.class_id}"
+
+    return cached_page(
+        name, version,
+        lambda: render_template("notes/_bulletin_content.html",
+                                **_bulletin_context(student, term, show_details)),
         "notes/bulletin.html",
+        student=student,
+        term=term
+    )
+
+
+def _bulletin_context(student, term, show_details):
+    # Moyennes, nombres, min et max par matière et par type : une requête GROUP BY
+    subjects_stats = bulletin_summary(student.id, term)
+    total_notes = sum(stats['count'] for stats in subjects_stats.values())
+
+    # Moyennes pondérées (types, coefficients) et rangs : calcul unique sur toute la classe
+    results = None
+    if student.class_id and total_notes:
+        results = compute_class_results(student.class_id, term).student(student.id)
+        if results:
+            for subject, weighted in results['subjects'].items():
+                if subject in subjects_stats:
+                    subjects_stats[subject].update(
+                        weighted_average=weighted['average'],
+                        coefficient=weighted['coefficient'],
+                        rank=weighted['rank'],
+                    )
+
+    # Détail ligne par ligne uniquement sur demande
+    assessments = []
+    if show_details and total_notes:
+        assessments = Assessment.query.filter_by(
+            student_id=student.id,
+            term=term
+        ).order_by(Assessment.date, Assessment.subject).all()
+
+    return dict(
         student=student,
         term=term,
         assessments=assessments,
-        subjects_stats=subjects_stats
+        subjects_stats=subjects_stats,
+        results=results,
+        total_notes=total_notes,
+        show_details=show_details
     )
 
 
@@ -361,41 +435,139 @@ def student_bulletin(student_id, term):
 def class_stats(class_id, term):
     """Affiche les statistiques des notes pour une classe et un trimestre"""
     classe = Classe.query.get_or_404(class_id)
-    
-    assessments = Assessment.query.join(Student).filter(
-        Student.class_id == class_id,
-        Assessment.term == term
-    ).all()
-    
-    if not assessments:
+
+    version = assessments_version(term, class_id=class_id)
+    if not version.count:
         flash("Aucune note pour cette classe/trimestre", "warning")
         return redirect(url_for("notes.list_notes"))
-    
-    # Statistiques globales
-    avg_score = sum(a.score for a in assessments) / len(assessments)
-    
-    # Par matière
-    subjects = {}
-    for assessment in assessments:
-        if assessment.subject not in subjects:
-            subjects[assessment.subject] = []
-        subjects[assessment.subject].append(assessment.score)
-    
-    for subject in subjects:
-        subjects[subject] = {
-            'average': sum(subjects[subject]) / len(subjects[subject]),
-            'min': min(subjects[subject]),
-            'max': max(subjects[subject]),
-            'count': len(subjects[subject])
-        }
-    
-    return render_template(
+
+    return cached_page(
+        f"class_stats:{class_id}:{term}:{classe.name}", version,
+        lambda: render_template("notes/_class_stats_content.html", **_class_stats_context(classe, term)),
         "notes/class_stats.html",
+        classe=classe,
+        term=term
+    )
+
+
+def _class_stats_context(classe, term):
+    filters = {"class_id": classe.id, "term": term}
+
+    # Moyenne, min, max et nombre sur les notes normalisées : GROUP BY en base
+    subjects = aggregate_assessments(Assessment.subject, filters)
+    overall = aggregate_assessments(Assessment.term, filters).get(term)
+
+    # Médiane, écart-type, quartiles, histogramme, taux de réussite (NumPy)
+    distributions, overall_distribution = score_distributions(filters)
+    for subject, stats in subjects.items():
+        stats.update(distributions.get(subject, {}))
+
+    # Moyennes générales pondérées et rangs (moteur de calcul sur toute la classe)
+    results = compute_class_results(classe.id, term)
+
+    # Classement : noms chargés en une requête
+    names = dict(
+        (sid, f"{last} {first}") for sid, last, first in
+        db.session.query(Student.id, Student.last_name, Student.first_name).filter(Student.class_id == classe.id)
+    )
+    ranking = [
+        {'student_id': sid, 'name': names.get(sid, "?"), 'average': average, 'rank': rank}
+        for sid, average, rank in results.ranking()
+    ]
+
+    return dict(
         classe=classe,
         term=term,
-        avg_score=avg_score,
+        avg_score=overall["average"] if overall else 0.0,
+        weighted_average=results.class_average(),
+        distribution=overall_distribution,
         subjects=subjects,
-        total_notes=len(assessments)
+        ranking=ranking,
+        total_notes=overall["count"] if overall else 0
+    )
+
+
+# --------------------------------------------------------
+# ÉVOLUTION D'UNE CLASSE SUR LES TROIS TRIMESTRES
+# --------------------------------------------------------
+TREND_TERMS = (1, 2, 3)
+
+
+def _class_trend_data(class_id):
+    """Tendance (une requête matière × trimestre), mise en cache par version des notes."""
+    version = assessments_version(TREND_TERMS, class_id=class_id)
+    data = cached_value(f"class_trend:{class_id}", version, lambda: class_trend(class_id, TREND_TERMS))
+    return data, version
+
+
+@notes_bp.route("/trend/<int:class_id>")
+@login_required
+def class_trend_view(class_id):
+    """Moyennes par matière des trimestres 1 à 3, côte à côte"""
+    classe = Classe.query.get_or_404(class_id)
+    data, version = _class_trend_data(class_id)
+
+    return cached_page(
+        f"class_trend:{class_id}:{classe.name}", version,
+        lambda: render_template("notes/_class_trend_content.html", classe=classe, trend=data),
+        "notes/class_trend.html",
+        classe=classe
+    )
+
+
+@notes_bp.route("/api/trend/<int:class_id>")
+@login_required
+def api_class_trend(class_id):
+    """Variante JSON de la tendance de classe (mêmes données, ETag)."""
+    classe = Classe.query.get_or_404(class_id)
+    data, version = _class_trend_data(class_id)
+    return conditional_json(dict(data, class_id=classe.id, class_name=classe.name),
+                            version, f"api_class_trend:{class_id}:{classe.name}")
+
+
+# --------------------------------------------------------
+# VUE D'ENSEMBLE DE L'ÉTABLISSEMENT (CLASSE × MATIÈRE)
+# --------------------------------------------------------
+def _school_matrix_data(term):
+    """
+    Matrice (un GROUP BY pivoté), mise en cache par version des notes du
+    trimestre ; la version change aussi quand une classe est renommée.
+    """
+    version = assessments_version(term)
+    return cached_value(f"school_matrix:{term}", version, lambda: school_matrix(term)), version
+
+
+@notes_bp.route("/school/<int:term>")
+@login_required
+@admin_or_director_required
+def school_overview(term):
+    """Moyennes, nombres de notes et taux de réussite de chaque classe dans chaque matière"""
+    if term not in TREND_TERMS:
+        abort(404)
+    matrix, version = _school_matrix_data(term)
+
+    return cached_page(
+        f"school_overview:{term}", version,
+        lambda: render_template("notes/_school_overview_content.html", matrix=matrix, term=term),
+        "notes/school_overview.html",
+        term=term
+    )
+
+
+@notes_bp.route("/school/<int:term>/export")
+@login_required
+@admin_or_director_required
+def export_school_overview(term):
+    """Matrice classe × matière au format Excel (échelles de couleurs)."""
+    if term not in TREND_TERMS:
+        abort(404)
+    matrix, _ = _school_matrix_data(term)
+    export = get_renderer("school_xlsx")
+    return send_file(
+        export.render(matrix),
+        as_attachment=True,
+        download_name=f"vue_ensemble_T{term}.{export.extension}",
+        mimetype=export.mimetype
     )
 
 
@@ -413,7 +585,7 @@ def correspondence():
     from sqlalchemy import and_
     
 
-    classes = Classe.query.order_by(Classe.name).all()
+    classes = get_classes()
     selected_class = None
     selected_date = None
     students_notes = []
@@ -437,11 +609,20 @@ def correspondence():
             except Exception:
                 filter_date = date.today()
 
-            # Récupérer tous les élèves de la classe
-            students = Student.query.filter_by(class_id=class_id).order_by(Student.last_name).all()
-            # Pour chaque élève, récupérer ses notes du jour
+            # Récupérer tous les élèves de la classe (parents chargés en une requête)
+            students = Student.query.options(selectinload(Student.parents)).filter_by(
+                class_id=class_id
+            ).order_by(Student.last_name).all()
+            # Notes du jour de toute la classe en une requête, regroupées par élève
+            notes_by_student = {}
+            day_notes = Assessment.query.join(Student).filter(
+                Student.class_id == class_id,
+                Assessment.date == filter_date
+            ).order_by(Assessment.subject).all()
+            for note in day_notes:
+                notes_by_student.setdefault(note.student_id, []).append(note)
             for student in students:
-                notes = Assessment.query.filter_by(student_id=student.id, date=filter_date).order_by(Assessment.subject).all()
+                notes = notes_by_student.get(student.id)
                 if notes:
                     students_notes.append({
                         'id': student.id,
@@ -486,12 +667,13 @@ def correspondence():
                     flash("Brouillon WhatsApp ouvert pour l'élève sélectionné.", "success")
 
     # Récupérer les matières disponibles
-    subjects = db.session.query(Assessment.subject).distinct().order_by(Assessment.subject).all()
-    subjects = [s[0] for s in subjects if s[0]]
+    subjects = get_subjects()
     # Liste de tous les parents (pour envoi personnalisé)
     parents = Parent.query.order_by(Parent.last_name, Parent.first_name).all()
-    # Liste de tous les élèves (pour message personnalisé)
-    students = Student.query.order_by(Student.last_name, Student.first_name).all()
+    # Liste de tous les élèves (pour message personnalisé), avec leurs parents
+    students = Student.query.options(selectinload(Student.parents)).order_by(
+        Student.last_name, Student.first_name
+    ).all()
 
     # --- Envoi personnalisé à un ou plusieurs parents ---
     if request.method == "POST" and action in ("personal_preview", "personal_send"):
@@ -500,21 +682,19 @@ def correspondence():
         student_ids = request.form.getlist("student_ids")
         if parent_ids:
             # parent_ids contient des ids de parents sélectionnés
-            for pid in parent_ids:
-                p = Parent.query.get(int(pid))
-                if p:
-                    targets.append(p)
+            targets.extend(Parent.query.filter(Parent.id.in_([int(pid) for pid in parent_ids])).all())
         elif student_ids:
             # Si des élèves sont sélectionnés, prendre leurs parents WhatsApp
-            for sid in student_ids:
-                student = Student.query.get(int(sid))
-                if student:
-                    for p in student.parents:
-                        if p.whatsapp_optin and p.phone_e164:
-                            targets.append(p)
+            selected = Student.query.options(selectinload(Student.parents)).filter(
+                Student.id.in_([int(sid) for sid in student_ids])
+            ).all()
+            for student in selected:
+                for p in student.parents:
+                    if p.whatsapp_optin and p.phone_e164:
+                        targets.append(p)
         elif class_id:
             # si class_id donné, prendre tous les parents WhatsApp de la classe
-            students = Student.query.filter_by(class_id=class_id).all()
+            students = Student.query.options(selectinload(Student.parents)).filter_by(class_id=class_id).all()
             for s in students:
                 for p in s.parents:
                     if p.whatsapp_optin and p.phone_e164:
@@ -575,3 +755,64 @@ def api_students_by_class(class_id):
         'id': s.id,
         'full_name': s.full_name
     } for s in students])
+
+
+# Colonnes renvoyées par /api/assessments (format colonnaire)
+API_COLUMNS = [
+    "id", "date", "term", "subject", "assessment_type", "score", "max_score",
+    "normalized", "student_id", "student", "class_id", "class",
+]
+
+
+@notes_bp.route("/api/assessments")
+@login_required
+def api_assessments():
+    """
+    Notes filtrées (mêmes filtres que le tableau de bord), triées (``sort=-date,subject``)
+    et paginées par curseur. Réponse colonnaire : {"columns": [...], "data": {col: [...]}}
+    avec ETag (304 si le client a déjà cette page).
+    """
+    try:
+        sort = parse_sort(request.args.get("sort", type=str))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    limit = request.args.get("limit", type=int) or current_app.config.get("NOTES_PAGE_SIZE", 50)
+    limit = max(1, min(limit, current_app.config.get("NOTES_MAX_PAGE_SIZE", 500)))
+
+    # Colonnes seules (pas d'objets ORM) : élève et classe joints dans la même requête
+    query = assessment_columns_query(assessment_filters_from_args(request.args))
+
+    try:
+        rows, next_cursor = keyset_sorted_page(query, sort, request.args.get("cursor", type=str), limit)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    data = {column: [] for column in API_COLUMNS}
+    for row in rows:
+        data["id"].append(row.id)
+        data["date"].append(row.date.isoformat())
+        data["term"].append(row.term)
+        data["subject"].append(row.subject)
+        data["assessment_type"].append(row.assessment_type)
+        data["score"].append(row.score)
+        data["max_score"].append(row.max_score)
+        data["normalized"].append(round(row.normalized, 2))
+        data["student_id"].append(row.student_id)
+        data["student"].append(f"{row.last_name} {row.first_name}")
+        data["class_id"].append(row.class_id)
+        data["class"].append(row.class_name)
+
+    payload = {
+        "columns": API_COLUMNS,
+        "count": len(rows),
+        "next_cursor": next_cursor,
+        "data": data,
+    }
+    response = current_app.response_class(
+        json.dumps(payload, ensure_ascii=False, separators=(",", ":")),
+        mimetype="application/json",
+    )
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response.make_conditional(request)
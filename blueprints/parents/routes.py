@@ -2,6 +2,7 @@
 
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required
+from sqlalchemy.orm import selectinload
 from models import db, Parent
 from forms import ParentForm
 
@@ -13,7 +14,8 @@ parents_bp = Blueprint("parents", __name__, url_prefix="/parents", template_fold
 @parents_bp.route("/")
 @login_required
 def list_parents():
-    parents = Parent.query.all()
+    # Élèves de chaque parent chargés en une seule requête IN (selectinload)
+    parents = Parent.query.options(selectinload(Parent.students)).all()
     return render_template("parents.html", parents=parents)
 
 
@@ -0,0 +1,39 @@
+# gunicorn.conf.py
+# Chargé automatiquement par gunicorn depuis le répertoire courant.
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:" + os.environ.get("PORT", "8000"))
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+
+
+def on_starting(server):
+    """
+    Exécuté une seule fois dans le processus maître, avant le fork des workers :
+    création du schéma et des données de référence.
+    """
+    from app import create_app
+    from models import db
+    from services.bootstrap import bootstrap_database
+    from services.metrics import clear_metrics_dir, metrics_dir
+
+    app = create_app()
+    with app.app_context():
+        created = bootstrap_database()
+        # Ne pas transmettre de connexions ouvertes aux workers forkés
+        db.engine.dispose()
+    # Les compteurs repartent de zéro à chaque démarrage du maître
+    clear_metrics_dir(metrics_dir(app))
+    server.log.info("Bootstrap base de données : %s classe(s) créée(s)", created)
+
+
+def post_fork(server, worker):
+    """
+    Le worker forké hérite de tout moteur SQLAlchemy ouvert dans le maître
+    (on_starting, ou l'application entière si preload_app est activé) :
+    repartir d'un pool vide plutôt que de partager des sockets.
+    """
+    from services.database import dispose_engines
+    from services.metrics import METRICS
+    dispose_engines()
+    METRICS.reset()
@@ -0,0 +1,39 @@
+"""Index composites pour les requêtes fréquentes sur les notes
+
+Revision ID: 3f2a9c1d7b10
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (nom, table, colonnes) — mêmes noms que dans models.py
+INDEXES = [
+    ('ix_assessments_student_term', 'assessments', ['student_id', 'term']),
+    ('ix_assessments_student_date', 'assessments', ['student_id', 'date']),
+    ('ix_assessments_date', 'assessments', ['date']),
+    ('ix_assessments_subject_date', 'assessments', ['subject', 'date']),
+    ('ix_students_class_id', 'students', ['class_id']),
+    ('ix_parent_student_student_id', 'parent_student', ['student_id']),
+    ('ix_message_logs_status', 'message_logs', ['status']),
+]
+
+
+def upgrade():
+    # if_not_exists : les bases créées par db.create_all() ont déjà ces index
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
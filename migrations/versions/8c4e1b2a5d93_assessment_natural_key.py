@@ -0,0 +1,34 @@
+"""Unicité de la clé naturelle des notes
+
+Revision ID: 8c4e1b2a5d93
+Revises: 3f2a9c1d7b10
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e1b2a5d93'
+down_revision = '3f2a9c1d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Supprimer les doublons existants (on garde la première saisie)
+    op.execute(
+        "DELETE FROM assessments WHERE id NOT IN ("
+        " SELECT MIN(id) FROM assessments"
+        " GROUP BY student_id, subject, assessment_type, date, term)"
+    )
+    op.create_index(
+        'uq_assessments_natural_key', 'assessments',
+        ['student_id', 'subject', 'assessment_type', 'date', 'term'],
+        unique=True, if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index('uq_assessments_natural_key', table_name='assessments', if_exists=True)
@@ -0,0 +1,48 @@
+"""Table stats_counters (tuiles des tableaux de bord)
+
+Revision ID: b71d0e4c9a26
+Revises: 8c4e1b2a5d93
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71d0e4c9a26'
+down_revision = '8c4e1b2a5d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # La table peut déjà exister si `flask bootstrap` (create_all) est passé avant
+    if 'stats_counters' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'stats_counters',
+            sa.Column('name', sa.String(length=200), primary_key=True),
+            sa.Column('value', sa.Integer(), nullable=False, server_default='0'),
+        )
+    # Valeurs initiales calculées depuis les données existantes
+    op.execute("DELETE FROM stats_counters")
+    op.execute(
+        "INSERT INTO stats_counters (name, value)"
+        " SELECT 'students', COUNT(*) FROM students"
+        " UNION ALL SELECT 'classes', COUNT(*) FROM classes"
+        " UNION ALL SELECT 'assessments', COUNT(*) FROM assessments"
+        " UNION ALL SELECT 'subjects', COUNT(DISTINCT subject) FROM assessments"
+    )
+    op.execute(
+        "INSERT INTO stats_counters (name, value)"
+        " SELECT 'assessments:date:' || CAST(date AS VARCHAR(10)), COUNT(*) FROM assessments GROUP BY date"
+    )
+    op.execute(
+        "INSERT INTO stats_counters (name, value)"
+        " SELECT 'assessments:subject:' || subject, COUNT(*) FROM assessments"
+        " WHERE subject IS NOT NULL GROUP BY subject"
+    )
+
+
+def downgrade():
+    op.drop_table('stats_counters')
@@ -0,0 +1,31 @@
+"""Empreinte des données des bulletins PDF (génération en lot)
+
+Revision ID: d4a8f3c61e57
+Revises: b71d0e4c9a26
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a8f3c61e57'
+down_revision = 'b71d0e4c9a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('report_cards')]
+    if 'input_hash' not in columns:
+        with op.batch_alter_table('report_cards') as batch_op:
+            batch_op.add_column(sa.Column('input_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_report_cards_student_term', 'report_cards', ['student_id', 'term'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_report_cards_student_term', table_name='report_cards', if_exists=True)
+    with op.batch_alter_table('report_cards') as batch_op:
+        batch_op.drop_column('input_hash')
@@ -0,0 +1,28 @@
+"""Date de réservation des messages parents (worker dispatch-messages)
+
+Revision ID: e2c7a9f4b183
+Revises: d4a8f3c61e57
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c7a9f4b183'
+down_revision = 'd4a8f3c61e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('message_logs')]
+    if 'claimed_at' not in columns:
+        with op.batch_alter_table('message_logs') as batch_op:
+            batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('message_logs') as batch_op:
+        batch_op.drop_column('claimed_at')
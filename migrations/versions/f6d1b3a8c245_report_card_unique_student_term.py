@@ -0,0 +1,33 @@
+"""Un seul bulletin par élève et par trimestre
+
+Revision ID: f6d1b3a8c245
+Revises: e2c7a9f4b183
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6d1b3a8c245'
+down_revision = 'e2c7a9f4b183'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Doublons laissés par deux générations simultanées : on garde le plus récent
+    op.execute(
+        "DELETE FROM report_cards WHERE id NOT IN ("
+        " SELECT MAX(id) FROM report_cards GROUP BY student_id, term)"
+    )
+    op.drop_index('ix_report_cards_student_term', table_name='report_cards', if_exists=True)
+    op.create_index('uq_report_cards_student_term', 'report_cards', ['student_id', 'term'],
+                    unique=True, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('uq_report_cards_student_term', table_name='report_cards', if_exists=True)
+    op.create_index('ix_report_cards_student_term', 'report_cards', ['student_id', 'term'],
+                    unique=False, if_not_exists=True)
@@ -97,7 +97,8 @@ class Student(db.Model):
     class_id = db.Column(
         db.Integer,
         db.ForeignKey("classes.id", ondelete="SET NULL"),
-        nullable=True
+        nullable=True,
+        index=True
     )
 
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -146,12 +147,30 @@ parent_student = db.Table(
     "parent_student",
     db.Column("parent_id", db.Integer, db.ForeignKey("parents.id"), primary_key=True),
     db.Column("student_id", db.Integer, db.ForeignKey("students.id"), primary_key=True),
+    # La clé primaire (parent_id, student_id) ne sert pas les recherches par élève
+    db.Index("ix_parent_student_student_id", "student_id"),
 )
 
 
 # -------- ASSESSMENT --------
 class Assessment(db.Model):
     __tablename__ = "assessments"
+    __table_args__ = (
+        # Bulletin : notes d'un élève pour un trimestre
+        db.Index("ix_assessments_student_term", "student_id", "term"),
+        # Correspondance / envoi quotidien : notes d'un élève à une date
+        db.Index("ix_assessments_student_date", "student_id", "date"),
+        # Notes du jour, tri du tableau de bord
+        db.Index("ix_assessments_date", "date"),
+        # Filtre par matière (tableau de bord, statistiques de classe)
+        db.Index("ix_assessments_subject_date", "subject", "date"),
+        # Clé naturelle : une seule note par élève/matière/type/date/trimestre
+        db.Index(
+            "uq_assessments_natural_key",
+            "student_id", "subject", "assessment_type", "date", "term",
+            unique=True
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
@@ -199,12 +218,18 @@ class Assessment(db.Model):
 # -------- REPORT CARD --------
 class ReportCard(db.Model):
     __tablename__ = "report_cards"
+    __table_args__ = (
+        # Un bulletin par élève et par trimestre (génération en lot)
+        db.Index("uq_report_cards_student_term", "student_id", "term", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
     term = db.Column(db.Integer, nullable=False)
     generated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     pdf_url = db.Column(db.String(500), nullable=True)
+    # Empreinte des données rendues : régénération seulement si elles ont changé
+    input_hash = db.Column(db.String(64), nullable=True)
 
     def __repr__(self):
         return f"<ReportCard student={self.student_id} term={self.term}>"
@@ -220,13 +245,15 @@ class MessageLog(db.Model):
 
     template_name = db.Column(db.String(200))
     content = db.Column(db.Text)
-    status = db.Column(db.String(50))
+    status = db.Column(db.String(50), index=True)
     external_id = db.Column(db.String(200))
 
     # Twilio / provider tracking
     twilio_sid = db.Column(db.String(200), nullable=True)
     attempts = db.Column(db.Integer, default=0, nullable=False)
     last_error = db.Column(db.String(1000), nullable=True)
+    # Réservation par un worker (flask dispatch-messages) : reprise si trop ancienne
+    claimed_at = db.Column(db.DateTime, nullable=True)
 
     sent_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -246,3 +273,19 @@ class SchoolYear(db.Model):
 
     def __repr__(self):
         return f"<SchoolYear {self.year} active={self.active}>"
+
+
+# -------- COMPTEURS (TUILES DES TABLEAUX DE BORD) --------
+class StatsCounter(db.Model):
+    """
+    Compteurs maintenus à chaque flush (services/stats.py) :
+    'students', 'classes', 'assessments', 'subjects',
+    'assessments:date:AAAA-MM-JJ' et 'assessments:subject:<matière>'.
+    """
+    __tablename__ = "stats_counters"
+
+    name = db.Column(db.String(200), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<StatsCounter {self.name}={self.value}>"
@@ -0,0 +1,72 @@
+"""
+Profil du temps d'import au démarrage (équivalent `python -X importtime`).
+
+Importe `app` et appelle create_app() dans un processus neuf avec
+-X importtime, puis affiche le temps total et les modules les plus coûteux.
+Les bibliothèques d'export (openpyxl, reportlab, docx) ne doivent pas
+apparaître : elles sont chargées à la première exportation.
+
+Usage : python scripts/bench_imports.py [--top 20] [--max-ms 1500]
+Code retour 1 si un module interdit est importé ou si --max-ms est dépassé.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules qui ne doivent pas être chargés au démarrage d'un worker
+FORBIDDEN_AT_BOOT = ("openpyxl", "reportlab", "docx")
+
+
+def profile_imports():
+    """Retourne [(module, self_us, cumulative_us, depth)] pour un démarrage à froid."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, LOG_FILE=os.path.join(tmp, "bench.log"),
+                   DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app; app.create_app()"],
+            cwd=ROOT, env=env, capture_output=True, text=True
+        )
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    entries = profile_imports()
+    total_ms = sum(e[1] for e in entries) / 1000
+
+    print(f"Imports au démarrage : {len(entries)} modules, {total_ms:.1f} ms au total\n")
+    print(f"{'cumulé (ms)':>12} {'propre (ms)':>12}  module")
+    for name, self_us, cumulative_us, _ in sorted(entries, key=lambda e: -e[2])[:args.top]:
+        print(f"{cumulative_us / 1000:12.1f} {self_us / 1000:12.1f}  {name}")
+
+    failed = False
+    loaded = sorted({e[0] for e in entries if e[0].split(".")[0] in FORBIDDEN_AT_BOOT})
+    if loaded:
+        print(f"\nERREUR : modules d'export chargés au démarrage : {', '.join(loaded[:10])}")
+        failed = True
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"\nERREUR : {total_ms:.1f} ms > seuil {args.max_ms:.1f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
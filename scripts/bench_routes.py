@@ -0,0 +1,231 @@
+"""
+Benchmark des routes principales sur un jeu de données synthétique.
+
+Génère (ou réutilise) une base de travail avec scripts/generate_dataset.py puis
+rejoue chaque route N fois avec un client de test connecté en administrateur.
+Pour chaque route : latence p50/p95, nombre de requêtes SQL (lu dans l'en-tête
+Server-Timing) et pic mémoire Python (tracemalloc, passe séparée pour ne pas
+fausser les temps).
+
+Usage :
+    python scripts/bench_routes.py [--classes 10] [--students-per-class 40] \
+        [--assessments-per-term 30] [--repeat 20] [--only notes.notes_dashboard]
+    python scripts/bench_routes.py --db /tmp/ecole.db   # base déjà générée
+"""
+
+import argparse
+import io
+import itertools
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from generate_dataset import make_app, generate_dataset, BENCH_ADMIN_EMAIL, TERM_STARTS
+from models import db, User, Classe, Student
+
+
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+IMPORT_ROWS = 50
+IMPORTED = re.compile(r"(\d+) élèves importés")
+
+
+def _import_workbook(class_name, batch, rows=IMPORT_ROWS):
+    """Fichier .xlsx au format attendu par /eleves/import (élèves distincts par lot)."""
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Nom", "Prénom", "Date de naissance", "Classe",
+               "Prénom parent", "Nom parent", "Téléphone parent", "WhatsApp"])
+    for i in range(rows):
+        ws.append([f"Import{batch:03d}-{i:03d}", "Bench", date(2010, 1, 1), class_name,
+                   "Parent", f"Import{batch:03d}-{i:03d}", f"+2296{batch:03d}{i:04d}", "oui"])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _status_ok(response, flashes):
+    """Contrôle par défaut : pas d'erreur HTTP ni de message flash d'erreur."""
+    if response.status_code >= 400:
+        return f"HTTP {response.status_code}"
+    errors = [message for category, message in flashes if category == "danger"]
+    return errors[0] if errors else None
+
+
+def _import_ok(response, flashes):
+    """L'import doit réellement insérer toutes les lignes du fichier."""
+    if response.status_code != 302:
+        return f"HTTP {response.status_code}"
+    for category, message in flashes:
+        match = IMPORTED.search(message)
+        if category == "success" and match:
+            count = int(match.group(1))
+            return None if count == IMPORT_ROWS else f"{count}/{IMPORT_ROWS} élèves importés"
+    return flashes[0][1] if flashes else "aucun message d'import"
+
+
+def build_scenarios(app):
+    """
+    Liste (nom, méthode, url, données, contrôle) couvrant les pages et exports
+    lourds. ``contrôle(réponse, flashes)`` renvoie None si le scénario a réussi,
+    sinon la raison de l'échec.
+    """
+    with app.app_context():
+        classe = Classe.query.order_by(Classe.id).first()
+        student = Student.query.filter_by(class_id=classe.id).order_by(Student.id).first()
+        class_id, class_name, student_id = classe.id, classe.name, student.id
+
+    # Un fichier différent par requête : chaque import insère de nouveaux élèves
+    workbooks = (_import_workbook(class_name, batch) for batch in itertools.count())
+    correspondence_date = TERM_STARTS[1].isoformat()
+
+    return [
+        ("dashboard", "GET", "/dashboard", None, _status_ok),
+        ("notes.notes_dashboard", "GET", "/notes/dashboard", None, _status_ok),
+        ("notes.student_bulletin", "GET", f"/notes/bulletin/{student_id}/1", None, _status_ok),
+        ("notes.class_stats", "GET", f"/notes/stats/{class_id}/1", None, _status_ok),
+        ("notes.correspondence", "POST", "/notes/correspondence",
+         lambda: {"class_id": class_id, "date": correspondence_date}, _status_ok),
+        ("eleves.export_excel", "GET", f"/eleves/export/excel/{class_id}", None, _status_ok),
+        ("eleves.export_pdf", "GET", f"/eleves/export/pdf/{class_id}", None, _status_ok),
+        ("eleves.export_word", "GET", f"/eleves/export/word/{class_id}", None, _status_ok),
+        ("eleves.import_eleves", "POST", "/eleves/import",
+         lambda: {"excel_file": (io.BytesIO(next(workbooks)), "bench_import.xlsx")}, _import_ok),
+    ]
+
+
+def _request(client, method, url, data):
+    """Une requête chronométrée ; les données du formulaire sont préparées hors chrono."""
+    payload = data() if data else None
+    start = time.perf_counter()
+    if method == "GET":
+        response = client.get(url)
+    else:
+        response = client.post(url, data=payload, content_type="multipart/form-data")
+    return response, (time.perf_counter() - start) * 1000
+
+
+def _pop_flashes(client):
+    with client.session_transaction() as session:
+        return session.pop("_flashes", [])
+
+
+def _query_count(response):
+    match = SERVER_TIMING_QUERIES.search(response.headers.get("Server-Timing", ""))
+    return int(match.group(1)) if match else None
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench_route(client, scenario, repeat):
+    name, method, url, data, check = scenario
+
+    def run():
+        response, elapsed = _request(client, method, url, data)
+        # Chaque requête est vérifiée : un scénario en échec ne doit pas être chronométré
+        error = check(response, _pop_flashes(client))
+        if error:
+            raise ScenarioFailed(error)
+        return response, elapsed
+
+    try:
+        # Préchauffage (imports paresseux, cache SQLite)
+        run()
+
+        timings, queries = [], None
+        for _ in range(repeat):
+            response, elapsed = run()
+            timings.append(elapsed)
+            queries = _query_count(response)
+
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except ScenarioFailed as exc:
+        return {"name": name, "error": str(exc)}
+
+    return {
+        "name": name,
+        "status": response.status_code,
+        "p50": statistics.median(timings),
+        "p95": _percentile(timings, 95),
+        "queries": queries,
+        "peak_kb": peak / 1024,
+    }
+
+
+class ScenarioFailed(Exception):
+    pass
+
+
+def print_report(results):
+    print(f"{'route':<28} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'SQL':>6} {'pic Ko':>9}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['name']:<28} {'ERR':>6}   (scénario en échec, ignoré : {r['error']})")
+            continue
+        queries = "-" if r["queries"] is None else r["queries"]
+        print(f"{r['name']:<28} {r['status']:>6} {r['p50']:>9.1f} {r['p95']:>9.1f} "
+              f"{queries:>6} {r['peak_kb']:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="base déjà générée (sinon base temporaire)")
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--students-per-class", type=int, default=40)
+    parser.add_argument("--assessments-per-term", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", action="append", help="ne jouer que ces routes (répétable)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "bench.db")
+        # TESTING désactivé : une route en erreur renvoie une 500 au lieu d'interrompre le benchmark
+        app = make_app(f"sqlite:///{os.path.abspath(path)}", LOG_FILE=os.path.join(tmp, "bench.log"))
+
+        with app.app_context():
+            db.create_all()
+            if not args.db:
+                start = time.perf_counter()
+                counts = generate_dataset(classes=args.classes, students_per_class=args.students_per_class,
+                                          assessments_per_term=args.assessments_per_term, seed=args.seed)
+                print(f"Jeu de données ({time.perf_counter() - start:.1f} s) : "
+                      + ", ".join(f"{v} {k}" for k, v in counts.items()))
+            user_id = User.query.filter_by(email=BENCH_ADMIN_EMAIL).first().id
+
+        # Hors contexte applicatif : chaque requête a son propre g (compteurs SQL)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+            session["_fresh"] = True
+
+        # /eleves/import écrit dans ./uploads : travailler dans le dossier temporaire
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            scenarios = [s for s in build_scenarios(app) if not args.only or s[0] in args.only]
+            results = [bench_route(client, scenario, args.repeat) for scenario in scenarios]
+        finally:
+            os.chdir(cwd)
+
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark de concurrence SQLite : lecteurs et écrivains en parallèle.
+
+Des threads "écrivains" enregistrent les notes d'une classe via
+POST /notes/entry (action save_notes) pendant que des threads "lecteurs"
+chargent /notes/dashboard. Le scénario est joué deux fois sur une base
+fichier neuve : sans PRAGMA (comportement historique) puis avec le profil
+SQLite de app.Config (WAL, busy_timeout, synchronous=NORMAL, ...).
+
+Usage : python scripts/bench_sqlite_concurrency.py [--writers 4] [--readers 8] [--seconds 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, Config
+from models import db, Classe, Student, User
+
+
+def _make_config(tmp, tuned):
+    # TESTING désactivé : une erreur SQLite doit produire une 500 comptabilisée
+    attrs = {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        "WTF_CSRF_ENABLED": False,
+        "LOG_FILE": os.path.join(tmp, "bench.log"),
+    }
+    if not tuned:
+        for key in ("SQLITE_JOURNAL_MODE", "SQLITE_BUSY_TIMEOUT_MS", "SQLITE_SYNCHRONOUS",
+                    "SQLITE_MMAP_SIZE", "SQLITE_CACHE_SIZE", "SQLITE_TEMP_STORE", "SQLITE_FOREIGN_KEYS"):
+            attrs[key] = None
+    return type("BenchConfig", (Config,), attrs)
+
+
+def _seed(app, students_per_class):
+    with app.app_context():
+        db.create_all()
+        classe = Classe(name="Bench")
+        db.session.add(classe)
+        admin = User(email="bench@ecole.local", name="Bench", role="admin")
+        admin.set_password("bench123")
+        db.session.add(admin)
+        db.session.flush()
+        for i in range(students_per_class):
+            db.session.add(Student(first_name=f"Prenom{i}", last_name=f"Nom{i:03d}", class_id=classe.id))
+        db.session.commit()
+        return admin.id, classe.id, [s.id for s in Student.query.filter_by(class_id=classe.id)]
+
+
+def _run(tuned, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(_make_config(tmp, tuned))
+        user_id, class_id, student_ids = _seed(app, args.students)
+
+        def logged_client():
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session["_user_id"] = str(user_id)
+                session["_fresh"] = True
+            return client
+
+        stop = time.perf_counter() + args.seconds
+        results = {"write": [], "read": [], "errors": 0}
+        lock = threading.Lock()
+        day_counter = iter(range(10 ** 6))
+
+        def writer():
+            client = logged_client()
+            while time.perf_counter() < stop:
+                with lock:
+                    offset = next(day_counter)
+                form = {
+                    "action": "save_notes",
+                    "class_id": class_id,
+                    "subject": "Mathématique",
+                    "assessment_type": "interrogation",
+                    "date": (date(2020, 1, 1) + timedelta(days=offset)).isoformat(),
+                    "term": 1,
+                    "max_score": 20,
+                }
+                form.update({f"score_{sid}": 12 for sid in student_ids})
+                t0 = time.perf_counter()
+                resp = client.post("/notes/entry", data=form)
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    if resp.status_code >= 500:
+                        results["errors"] += 1
+                    else:
+                        results["write"].append(elapsed)
+
+        def reader():
+            client = logged_client()
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                resp = client.get("/notes/dashboard")
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    if resp.status_code >= 500:
+                        results["errors"] += 1
+                    else:
+                        results["read"].append(elapsed)
+
+        threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+        threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        with app.app_context():
+            db.engine.dispose()
+        return results
+
+
+def _pct(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] * 1000
+
+
+def _report(label, results, seconds):
+    for kind in ("write", "read"):
+        values = results[kind]
+        print(f"{label:<10} {kind:<5} req/s={len(values) / seconds:7.1f}  "
+              f"p50={_pct(values, 0.5):8.1f} ms  p95={_pct(values, 0.95):8.1f} ms")
+    print(f"{label:<10} erreurs 5xx (database is locked...) : {results['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    _report("défaut", _run(False, args), args.seconds)
+    _report("profil", _run(True, args), args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark du temps de démarrage des workers.
+
+Lance N processus en parallèle (comme N workers gunicorn) sur une base SQLite
+temporaire et mesure, dans chacun, le temps jusqu'à une application prête :
+
+- "avant"  : create_app() + create_all() + seed des classes dans chaque worker
+             (comportement historique de create_app) ;
+- "après"  : create_app() seul, le bootstrap étant fait une fois par le maître.
+
+Usage : python scripts/bench_startup.py [--workers 4] [--rounds 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from app import create_app
+t_import = time.perf_counter()
+app = create_app()
+if {seed_per_worker!r}:
+    from services.bootstrap import bootstrap_database
+    with app.app_context():
+        bootstrap_database()
+t_ready = time.perf_counter()
+print(json.dumps({{"import": t_import - t0, "create": t_ready - t_import, "total": t_ready - t0}}))
+"""
+
+
+def _run_round(workers, seed_per_worker, db_path, log_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", LOG_FILE=log_path)
+    code = CHILD.format(root=ROOT, seed_per_worker=seed_per_worker)
+    procs = [
+        subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(workers)
+    ]
+    results = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    return results
+
+
+def _summary(label, results):
+    totals = [r["total"] * 1000 for r in results]
+    creates = [r["create"] * 1000 for r in results]
+    print(f"{label:<8} workers={len(results):<3} "
+          f"boot p50={statistics.median(totals):8.1f} ms  max={max(totals):8.1f} ms  "
+          f"create_app p50={statistics.median(creates):7.1f} ms  max={max(creates):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        log_path = os.path.join(tmp, "bench.log")
+
+        # Base déjà initialisée, comme en production après le premier déploiement
+        _run_round(1, True, db_path, log_path)
+
+        before, after = [], []
+        for _ in range(args.rounds):
+            before += _run_round(args.workers, True, db_path, log_path)
+            after += _run_round(args.workers, False, db_path, log_path)
+
+    _summary("avant", before)
+    _summary("après", after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Générateur de jeu de données synthétique (établissement complet).
+
+Remplit une base de travail avec N classes, des élèves par classe, des parents
+(dont certains partagent le même téléphone : fratries), des notes pour chaque
+élève et chaque trimestre, et un historique MessageLog. Les insertions se font
+par lots (executemany) pour rester rapides sur des centaines de milliers de notes.
+
+Usage :
+    python scripts/generate_dataset.py --db /tmp/ecole.db --classes 30 \
+        --students-per-class 40 --assessments-per-term 60
+Ne jamais pointer --db vers la base de production : elle est vidée par --reset.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, Config
+from models import db, User, Classe, Student, Parent, Assessment, MessageLog, SchoolYear, parent_student
+from services.stats import rebuild_counters
+
+
+SUBJECTS = [
+    "Comunication écrite", "Lecture", "Français", "Histoire et géographie", "Anglais",
+    "SVT", "PCT", "Mathématique", "Espagnole", "Philosophie",
+]
+# Répartition réaliste : beaucoup d'interrogations, peu de compositions
+ASSESSMENT_TYPES = ["interrogation"] * 6 + ["devoir"] * 3 + ["composition"]
+TERM_STARTS = {1: date(2025, 9, 15), 2: date(2026, 1, 5), 3: date(2026, 4, 6)}
+MESSAGE_STATUSES = ["sent_whatsapp"] * 6 + ["sent_email"] * 2 + ["failed_whatsapp", "queued"]
+FIRST_NAMES = ["Jean", "Marie", "Koffi", "Aïcha", "Paul", "Fatou", "Yao", "Awa", "Luc", "Nadia",
+               "Serge", "Rita", "Eric", "Grace", "Hugues", "Inès", "Marc", "Sandra", "Tanguy", "Yvette"]
+LAST_NAMES = ["Dossou", "Hounsou", "Agbo", "Kpade", "Zinsou", "Adjovi", "Gbaguidi", "Tossou",
+              "Ahouandjinou", "Sossa", "Dupont", "Martin", "Houngbo", "Akpovi", "Lokossou"]
+
+BENCH_ADMIN_EMAIL = "bench@ecole.local"
+BENCH_ADMIN_PASSWORD = "bench123"
+
+
+def make_app(database_uri, **overrides):
+    """Application configurée sur la base de travail (pas de CSRF, pas de log des requêtes lentes)."""
+    attrs = {
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "WTF_CSRF_ENABLED": False,
+        "SLOW_QUERY_MS": None,
+    }
+    attrs.update(overrides)
+    return create_app(type("DatasetConfig", (Config,), attrs))
+
+
+def _chunks(rows, size=5000):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _bulk_insert(target, rows):
+    for chunk in _chunks(rows):
+        db.session.execute(db.insert(target), chunk)
+
+
+def generate_dataset(classes=10, students_per_class=40, assessments_per_term=30, terms=3,
+                     sibling_ratio=0.25, messages_per_parent=5, seed=42):
+    """
+    Génère le jeu de données dans la base de l'application courante
+    (contexte applicatif requis, schéma déjà créé). Retourne les volumes créés.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    assessments_per_term = min(assessments_per_term, 100)  # 100 jours ouvrés par trimestre
+
+    # Compte administrateur utilisé par les benchmarks
+    if not User.query.filter_by(email=BENCH_ADMIN_EMAIL).first():
+        admin = User(email=BENCH_ADMIN_EMAIL, name="Bench", role="admin")
+        admin.set_password(BENCH_ADMIN_PASSWORD)
+        db.session.add(admin)
+    if not SchoolYear.query.filter_by(year="2025-2026").first():
+        db.session.add(SchoolYear(year="2025-2026", active=True))
+
+    # Classes
+    existing = {c.name for c in Classe.query}
+    class_names = [f"Classe {i + 1:02d}" for i in range(classes)]
+    _bulk_insert(Classe, [{"name": n, "created_at": now} for n in class_names if n not in existing])
+    class_ids = [c.id for c in Classe.query.filter(Classe.name.in_(class_names)).order_by(Classe.name)]
+
+    # Élèves
+    student_rows = []
+    for class_id in class_ids:
+        for _ in range(students_per_class):
+            student_rows.append({
+                "first_name": rng.choice(FIRST_NAMES),
+                "last_name": rng.choice(LAST_NAMES),
+                "birthdate": date(2008, 1, 1) + timedelta(days=rng.randrange(2500)),
+                "class_id": class_id,
+                "created_at": now,
+            })
+    first_student_id = (db.session.query(db.func.max(Student.id)).scalar() or 0) + 1
+    _bulk_insert(Student, student_rows)
+    student_ids = [s for (s,) in db.session.query(Student.id)
+                   .filter(Student.id >= first_student_id).order_by(Student.id)]
+
+    # Parents : une fraction des élèves partage le parent (et donc le téléphone) d'un autre
+    parent_rows, links, parent_of = [], [], {}
+    first_parent_id = (db.session.query(db.func.max(Parent.id)).scalar() or 0) + 1
+    for index, student_id in enumerate(student_ids):
+        if index and rng.random() < sibling_ratio:
+            sibling = student_ids[rng.randrange(index)]
+            parent_id = parent_of[sibling]
+        else:
+            parent_id = first_parent_id + len(parent_rows)
+            parent_rows.append({
+                "id": parent_id,
+                "first_name": rng.choice(FIRST_NAMES),
+                "last_name": rng.choice(LAST_NAMES),
+                "phone_e164": f"+2299{len(parent_rows) + 1000000:07d}",
+                "whatsapp_optin": rng.random() < 0.7,
+                "created_at": now,
+            })
+        parent_of[student_id] = parent_id
+        links.append({"parent_id": parent_id, "student_id": student_id})
+    _bulk_insert(Parent, parent_rows)
+    _bulk_insert(parent_student, links)
+
+    # Notes : dates distinctes par élève et trimestre (clé naturelle unique)
+    assessment_count = 0
+    for student_id in student_ids:
+        rows = []
+        for term in range(1, terms + 1):
+            start = TERM_STARTS.get(term, TERM_STARTS[1])
+            for offset in rng.sample(range(100), assessments_per_term):
+                max_score = rng.choice((10.0, 20.0, 20.0, 20.0))
+                rows.append({
+                    "student_id": student_id,
+                    "subject": rng.choice(SUBJECTS),
+                    "assessment_type": rng.choice(ASSESSMENT_TYPES),
+                    "score": round(rng.uniform(0.2, 1.0) * max_score, 2),
+                    "max_score": max_score,
+                    "date": start + timedelta(days=offset),
+                    "term": term,
+                    "created_at": now,
+                })
+        _bulk_insert(Assessment, rows)
+        assessment_count += len(rows)
+
+    # Historique de messages
+    message_rows = []
+    for parent in parent_rows:
+        for _ in range(messages_per_parent):
+            status = rng.choice(MESSAGE_STATUSES)
+            sent = status.startswith("sent")
+            message_rows.append({
+                "parent_id": parent["id"],
+                "template_name": "daily_notes",
+                "content": "Notes du jour (jeu de données synthétique)",
+                "status": status,
+                "attempts": 1 if status != "queued" else 0,
+                "sent_at": now if sent else None,
+                "created_at": now,
+            })
+    _bulk_insert(MessageLog, message_rows)
+
+    # Insertions Core : les compteurs des tableaux de bord sont recalculés d'un bloc
+    rebuild_counters()
+    db.session.commit()
+    return {
+        "classes": len(class_ids),
+        "students": len(student_ids),
+        "parents": len(parent_rows),
+        "assessments": assessment_count,
+        "messages": len(message_rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="chemin du fichier SQLite ou URL SQLAlchemy")
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--students-per-class", type=int, default=40)
+    parser.add_argument("--assessments-per-term", type=int, default=30)
+    parser.add_argument("--terms", type=int, default=3)
+    parser.add_argument("--sibling-ratio", type=float, default=0.25)
+    parser.add_argument("--messages-per-parent", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="vider la base avant génération")
+    args = parser.parse_args()
+
+    uri = args.db if "://" in args.db else f"sqlite:///{os.path.abspath(args.db)}"
+    app = make_app(uri)
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+
+        start = time.perf_counter()
+        counts = generate_dataset(
+            classes=args.classes,
+            students_per_class=args.students_per_class,
+            assessments_per_term=args.assessments_per_term,
+            terms=args.terms,
+            sibling_ratio=args.sibling_ratio,
+            messages_per_parent=args.messages_per_parent,
+            seed=args.seed,
+        )
+        elapsed = time.perf_counter() - start
+
+    summary = ", ".join(f"{value} {name}" for name, value in counts.items())
+    print(f"Jeu de données généré en {elapsed:.1f} s : {summary}")
+    print(f"Compte benchmark : {BENCH_ADMIN_EMAIL} / {BENCH_ADMIN_PASSWORD}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Agrégats SQL sur les notes.
+
+Les moyennes sont calculées par la base sur la note ramenée à une échelle
+commune (``score / max_score * 20`` par défaut), avec la même règle que
+``Assessment.normalized_score`` : un barème nul compte pour 0.
+Une seule requête GROUP BY remplace le chargement des notes en Python.
+"""
+
+from sqlalchemy import case, func
+
+from models import db, Assessment
+from services.assessments import filter_assessments
+
+
+def normalized_score(scale=20.0):
+    """Expression SQL de la note normalisée (équivalent de Assessment.normalized_score)."""
+    return case(
+        (Assessment.max_score > 0, Assessment.score * scale / Assessment.max_score),
+        else_=0.0,
+    )
+
+
+def aggregate_assessments(group_by, filters=None, scale=20.0, query=None, pass_mark=None):
+    """
+    Nombre de notes et moyenne/min/max normalisés, groupés par une ou
+    plusieurs colonnes, en une requête.
+
+    ``filters`` : dict accepté par ``filter_assessments`` (class_id, subject,
+    term, on_date). Retourne {clé: {'count', 'average', 'min', 'max'}} ; la clé
+    est un tuple si plusieurs colonnes sont groupées. Avec ``pass_mark``, chaque
+    groupe a aussi 'passed' (notes >= pass_mark) et 'pass_rate'.
+    """
+    columns = list(group_by) if isinstance(group_by, (list, tuple)) else [group_by]
+    normalized = normalized_score(scale)
+
+    aggregates = [func.count(Assessment.id), func.avg(normalized), func.min(normalized), func.max(normalized)]
+    if pass_mark is not None:
+        aggregates.append(func.sum(case((normalized >= pass_mark, 1), else_=0)))
+
+    if query is None:
+        query = db.session.query(Assessment)
+    query = query.with_entities(*columns, *aggregates)
+    query = filter_assessments(query, **(filters or {}))
+
+    results = {}
+    for row in query.group_by(*columns):
+        key = tuple(row[:len(columns)]) if len(columns) > 1 else row[0]
+        count, average, minimum, maximum = row[len(columns):len(columns) + 4]
+        stats = results[key] = {
+            "count": count,
+            "average": float(average or 0),
+            "min": float(minimum or 0),
+            "max": float(maximum or 0),
+        }
+        if pass_mark is not None:
+            stats["passed"] = int(row[-1] or 0)
+            stats["pass_rate"] = stats["passed"] / count if count else 0.0
+    return results
+
+
+def bulletin_summary(student_id, term, scale=20.0):
+    """
+    Récapitulatif du bulletin d'un élève : une requête groupée par
+    (matière, type), regroupée ensuite par matière.
+
+    Retourne {matière: {'count', 'average', 'min', 'max', 'types': {type: agrégats}}},
+    matières triées. La moyenne de la matière porte sur toutes ses notes
+    (moyenne des types pondérée par leur nombre de notes).
+    """
+    rows = aggregate_assessments(
+        (Assessment.subject, Assessment.assessment_type),
+        scale=scale,
+        query=Assessment.query.filter_by(student_id=student_id, term=term),
+    )
+
+    subjects = {}
+    for (subject, atype), stats in sorted(rows.items(), key=lambda item: (item[0][0] or "", item[0][1] or "")):
+        data = subjects.setdefault(subject, {"count": 0, "total": 0.0, "min": None, "max": None, "types": {}})
+        data["types"][atype] = stats
+        data["count"] += stats["count"]
+        data["total"] += stats["average"] * stats["count"]
+        data["min"] = stats["min"] if data["min"] is None else min(data["min"], stats["min"])
+        data["max"] = stats["max"] if data["max"] is None else max(data["max"], stats["max"])
+
+    for data in subjects.values():
+        data["average"] = data.pop("total") / data["count"] if data["count"] else 0.0
+    return subjects
+
+
+def score_distributions(filters=None, scale=20.0, buckets=10, pass_mark=None):
+    """
+    Distribution des notes normalisées, par matière et pour l'ensemble.
+
+    Une seule lecture de deux colonnes (matière, note normalisée calculée par
+    la base), triée par matière, puis calcul NumPy sur des tableaux : médiane,
+    écart-type, quartiles, histogramme (``buckets`` tranches égales de 0 à
+    ``scale``) et taux de réussite (note >= ``pass_mark``, moitié du barème
+    par défaut).
+
+    Retourne (par_matière, ensemble) ; chaque valeur est un dict
+    {'count', 'median', 'std', 'q1', 'q3', 'histogram', 'pass_rate'}, ou
+    ensemble = None s'il n'y a aucune note.
+    """
+    import numpy as np
+
+    pass_mark = scale / 2 if pass_mark is None else pass_mark
+    query = db.session.query(Assessment.subject, normalized_score(scale))
+    query = filter_assessments(query, **(filters or {})).order_by(Assessment.subject)
+
+    rows = query.all()
+    if not rows:
+        return {}, None
+    subjects = np.array([subject for subject, _ in rows], dtype=object)
+    values = np.fromiter((value for _, value in rows), dtype=float, count=len(rows))
+    edges = np.linspace(0.0, scale, buckets + 1)
+
+    def describe(array):
+        q1, median, q3 = np.percentile(array, [25, 50, 75])
+        # Notes au-delà du barème (bonus) comptées dans la dernière tranche
+        counts, _ = np.histogram(np.clip(array, 0.0, scale), bins=edges)
+        return {
+            "count": int(array.size),
+            "median": float(median),
+            "std": float(array.std()),
+            "q1": float(q1),
+            "q3": float(q3),
+            "histogram": [
+                {"low": float(low), "high": float(high), "count": int(count)}
+                for low, high, count in zip(edges[:-1], edges[1:], counts)
+            ],
+            "pass_rate": float((array >= pass_mark).mean()),
+        }
+
+    # Lignes triées par matière : chaque matière est une tranche contiguë
+    changes = np.flatnonzero(subjects[1:] != subjects[:-1]) + 1
+    starts = np.concatenate(([0], changes))
+    ends = np.concatenate((changes, [len(values)]))
+    per_subject = {
+        subjects[start]: describe(values[start:end]) for start, end in zip(starts, ends)
+    }
+    return per_subject, describe(values)
+
+
+def class_trend(class_id, terms=(1, 2, 3), scale=20.0):
+    """
+    Moyennes normalisées d'une classe par matière et par trimestre, côte à côte,
+    depuis une seule requête groupée (matière × trimestre).
+
+    Retourne {'terms': [...], 'subjects': [{'subject', 'terms': {t: {'average', 'count'} | None},
+    'change'}], 'overall': {t: {'average', 'count'} | None}} ; ``change`` est l'écart
+    entre le premier et le dernier trimestre notés de la matière.
+    """
+    terms = list(terms)
+    query = db.session.query(Assessment).filter(Assessment.term.in_(terms))
+    rows = aggregate_assessments([Assessment.subject, Assessment.term], {"class_id": class_id},
+                                 scale=scale, query=query)
+
+    by_subject, totals = {}, {}
+    for (subject, term), stats in rows.items():
+        by_subject.setdefault(subject, {})[term] = {"average": stats["average"], "count": stats["count"]}
+        total = totals.setdefault(term, [0.0, 0])
+        total[0] += stats["average"] * stats["count"]
+        total[1] += stats["count"]
+
+    subjects = []
+    for subject in sorted(by_subject, key=lambda s: s or ""):
+        per_term = {term: by_subject[subject].get(term) for term in terms}
+        graded = [per_term[term]["average"] for term in terms if per_term[term]]
+        subjects.append({
+            "subject": subject,
+            "terms": per_term,
+            "change": graded[-1] - graded[0] if len(graded) > 1 else None,
+        })
+
+    overall = {
+        term: {"average": totals[term][0] / totals[term][1], "count": totals[term][1]} if term in totals else None
+        for term in terms
+    }
+    return {"terms": terms, "subjects": subjects, "overall": overall}
+
+
+def school_matrix(term, scale=20.0, pass_mark=None):
+    """
+    Matrice classe × matière d'un trimestre : moyenne normalisée, nombre de
+    notes et taux de réussite, depuis un seul GROUP BY (notes jointes aux
+    élèves et aux classes), pivoté avec pandas.
+
+    Retourne {'term', 'subjects', 'rows': [{'class_id', 'class_name', 'cells':
+    {matière: {'average', 'count', 'pass_rate'} | None}, 'total': {...}}],
+    'totals': {matière: {...}}, 'overall': {...} | None}. Les totaux sont pondérés
+    par le nombre de notes.
+    """
+    import pandas as pd
+    from models import Classe, Student
+
+    pass_mark = scale / 2 if pass_mark is None else pass_mark
+    query = (
+        db.session.query(Assessment)
+        .join(Student, Student.id == Assessment.student_id)
+        .join(Classe, Classe.id == Student.class_id)
+        .filter(Assessment.term == term)
+    )
+    rows = aggregate_assessments([Classe.id, Classe.name, Assessment.subject], scale=scale,
+                                 query=query, pass_mark=pass_mark)
+    if not rows:
+        return {"term": term, "subjects": [], "rows": [], "totals": {}, "overall": None}
+
+    frame = pd.DataFrame(
+        [(class_id, class_name, subject, stats["count"], stats["average"], stats["passed"])
+         for (class_id, class_name, subject), stats in rows.items()],
+        columns=["class_id", "class_name", "subject", "count", "average", "passed"],
+    )
+    frame["points"] = frame["average"] * frame["count"]
+
+    def summary(points, count, passed):
+        return {"average": points / count, "count": int(count), "pass_rate": passed / count}
+
+    # Pivot : une ligne par classe, une colonne par matière
+    pivot = frame.pivot_table(index=["class_name", "class_id"], columns="subject",
+                              values=["points", "count", "passed"], aggfunc="sum")
+    subjects = sorted(frame["subject"].unique())
+    by_class = frame.groupby("class_id")[["points", "count", "passed"]].sum()
+    by_subject = frame.groupby("subject")[["points", "count", "passed"]].sum()
+
+    matrix_rows = []
+    for (class_name, class_id), values in pivot.iterrows():
+        cells = {}
+        for subject in subjects:
+            count = values[("count", subject)]
+            cells[subject] = (summary(values[("points", subject)], count, values[("passed", subject)])
+                              if count and not pd.isna(count) else None)
+        total = by_class.loc[class_id]
+        matrix_rows.append({
+            "class_id": int(class_id),
+            "class_name": class_name,
+            "cells": cells,
+            "total": summary(total["points"], total["count"], total["passed"]),
+        })
+
+    totals = {subject: summary(row["points"], row["count"], row["passed"]) for subject, row in by_subject.iterrows()}
+    overall = summary(frame["points"].sum(), frame["count"].sum(), frame["passed"].sum())
+    return {"term": term, "subjects": subjects, "rows": matrix_rows, "totals": totals, "overall": overall}
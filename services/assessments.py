@@ -0,0 +1,319 @@
+"""
+Écriture et lecture des notes en masse.
+
+La clé naturelle d'une note est (élève, matière, type, date, trimestre) ;
+elle est protégée par l'index unique ``uq_assessments_natural_key``.
+Les listes de notes sont paginées par curseur sur (date, id) : le coût d'une
+page ne dépend pas de sa position dans la table.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import Date, and_, literal_column, or_, text
+
+from models import db, Assessment, Student
+
+
+NATURAL_KEY = ("student_id", "subject", "assessment_type", "date", "term")
+
+
+def _insert_for_dialect(dialect):
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    return None
+
+
+def upsert_assessments(rows):
+    """
+    Enregistre une liste de notes (dicts avec la clé naturelle + score, max_score)
+    en une seule requête ``INSERT ... ON CONFLICT DO UPDATE``.
+
+    Une note déjà présente avec la même valeur est ignorée, une note différente
+    est mise à jour. Retourne {'inserted': n, 'updated': n, 'skipped': n}.
+    Le commit est laissé à l'appelant.
+
+    Les compteurs (``stats_counters``) ne doivent compter que les notes
+    réellement insérées, même si deux enregistrements de la même classe se
+    croisent : PostgreSQL le dit dans le RETURNING de l'upsert, SQLite prend
+    le verrou d'écriture avant le classement.
+    """
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    if not rows:
+        return counts
+
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        # Écriture vide : ouvre la transaction avec le verrou d'écriture, tenu
+        # jusqu'au commit ; aucun autre enregistrement ne peut s'intercaler
+        # entre le classement ci-dessous et l'INSERT
+        db.session.execute(text("UPDATE stats_counters SET value = value WHERE 0"))
+
+    # Classement en une requête : notes existantes pour ces élèves et cette clé
+    existing = {
+        (a.student_id, a.subject, a.assessment_type, a.date, a.term): (a.score, a.max_score)
+        for a in db.session.query(
+            Assessment.student_id, Assessment.subject, Assessment.assessment_type,
+            Assessment.date, Assessment.term, Assessment.score, Assessment.max_score
+        ).filter(
+            Assessment.student_id.in_({row["student_id"] for row in rows}),
+            Assessment.subject.in_({row["subject"] for row in rows}),
+            Assessment.assessment_type.in_({row["assessment_type"] for row in rows}),
+            Assessment.date.in_({row["date"] for row in rows}),
+            Assessment.term.in_({row["term"] for row in rows}),
+        )
+    }
+
+    to_write, inserted = [], []
+    for row in rows:
+        key = tuple(row[col] for col in NATURAL_KEY)
+        if key not in existing:
+            counts["inserted"] += 1
+            inserted.append(row)
+        elif existing[key] != (row["score"], row["max_score"]):
+            counts["updated"] += 1
+        else:
+            counts["skipped"] += 1
+            continue
+        to_write.append(row)
+
+    if not to_write:
+        return counts
+
+    insert = _insert_for_dialect(dialect)
+    if insert is None:
+        # Autres moteurs : fusion ligne à ligne via l'ORM
+        for row in to_write:
+            assessment = Assessment.query.filter_by(**{col: row[col] for col in NATURAL_KEY}).first()
+            if assessment:
+                assessment.score = row["score"]
+                assessment.max_score = row["max_score"]
+            else:
+                db.session.add(Assessment(**row))
+        db.session.flush()
+        return counts
+
+    stmt = insert(Assessment).values(to_write)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(NATURAL_KEY),
+        set_={"score": stmt.excluded.score, "max_score": stmt.excluded.max_score},
+    )
+    if dialect == "postgresql":
+        # xmax = 0 : ligne créée par cette requête (et non mise à jour d'une note concurrente)
+        stmt = stmt.returning(*[Assessment.__table__.c[col] for col in NATURAL_KEY],
+                              literal_column("xmax = 0").label("created"))
+        created = {tuple(r[:len(NATURAL_KEY)]) for r in db.session.execute(stmt) if r.created}
+        inserted = [row for row in to_write if tuple(row[col] for col in NATURAL_KEY) in created]
+        counts["updated"] += counts["inserted"] - len(inserted)
+        counts["inserted"] = len(inserted)
+    else:
+        db.session.execute(stmt)
+
+    # Insertion Core : les événements ORM ne voient pas ces notes
+    from services.reference import mark_reference_dirty
+    from services.stats import apply_counter_deltas, assessment_deltas, write_deltas
+    apply_counter_deltas(db.session.connection(), assessment_deltas(inserted) + write_deltas(to_write))
+    if inserted:
+        mark_reference_dirty(db.session, "subjects")
+    return counts
+
+
+# --------------------------------------------------------
+# FILTRES ET PAGINATION PAR CURSEUR
+# --------------------------------------------------------
+def assessment_filters_from_args(args):
+    """Filtres communs (class_id, subject, term, date) lus dans ``request.args``."""
+    filters = {
+        "class_id": args.get("class_id", type=int),
+        "subject": args.get("subject", type=str) or None,
+        "term": args.get("term", type=int),
+        "on_date": None,
+    }
+    date_str = args.get("date", type=str)
+    if date_str:
+        try:
+            filters["on_date"] = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            pass
+    return filters
+
+
+def filter_assessments(query, class_id=None, subject=None, term=None, on_date=None, student_joined=False):
+    """
+    Applique les filtres du tableau de bord à une requête sur Assessment.
+    ``student_joined`` : la requête contient déjà la jointure vers Student.
+    """
+    if class_id:
+        if not student_joined:
+            query = query.join(Student, Assessment.student_id == Student.id)
+        query = query.filter(Student.class_id == class_id)
+    if subject:
+        query = query.filter(Assessment.subject == subject)
+    if term:
+        query = query.filter(Assessment.term == term)
+    if on_date:
+        query = query.filter(Assessment.date == on_date)
+    return query
+
+
+def assessment_columns_query(filters=None):
+    """
+    Notes sous forme de lignes de colonnes (sans objets ORM) avec élève,
+    classe et note normalisée sur 20 ; ``filters`` comme filter_assessments.
+    """
+    from models import Classe
+    from services.aggregates import normalized_score
+
+    query = db.session.query(
+        Assessment.id, Assessment.date, Assessment.term, Assessment.subject,
+        Assessment.assessment_type, Assessment.score, Assessment.max_score,
+        normalized_score().label("normalized"),
+        Assessment.student_id, Student.last_name, Student.first_name,
+        Student.class_id, Classe.name.label("class_name"),
+    ).join(Student, Assessment.student_id == Student.id).outerjoin(Classe, Student.class_id == Classe.id)
+    return filter_assessments(query, student_joined=True, **(filters or {}))
+
+
+def encode_cursor(assessment):
+    return f"{assessment.date.isoformat()}_{assessment.id}"
+
+
+def decode_cursor(value):
+    """(date, id) depuis un curseur ``AAAA-MM-JJ_id`` ; None si absent ou invalide."""
+    if not value:
+        return None
+    try:
+        day, _, assessment_id = value.partition("_")
+        return date.fromisoformat(day), int(assessment_id)
+    except ValueError:
+        return None
+
+
+def keyset_page(query, cursor=None, limit=50):
+    """
+    Page de notes triées par (date, id) décroissants, à partir du curseur.
+    Retourne (notes, curseur suivant ou None s'il n'y a plus rien).
+    """
+    position = decode_cursor(cursor) if isinstance(cursor, str) else cursor
+    if position:
+        last_date, last_id = position
+        query = query.filter(or_(
+            Assessment.date < last_date,
+            and_(Assessment.date == last_date, Assessment.id < last_id),
+        ))
+
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    rows = query.order_by(Assessment.date.desc(), Assessment.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
+
+
+# --------------------------------------------------------
+# TRI À LA DEMANDE + CURSEUR (API JSON)
+# --------------------------------------------------------
+SORT_COLUMNS = {
+    "date": Assessment.date,
+    "score": Assessment.score,
+    "subject": Assessment.subject,
+    "type": Assessment.assessment_type,
+    "term": Assessment.term,
+    "student": Assessment.student_id,
+    "id": Assessment.id,
+}
+DEFAULT_SORT = "-date"
+
+
+def parse_sort(value):
+    """
+    ``"-date,subject"`` -> [(colonne, décroissant), ...], terminé par l'id pour
+    un ordre total. Lève ValueError pour une clé inconnue.
+    """
+    keys = []
+    for token in (value or DEFAULT_SORT).split(","):
+        token = token.strip()
+        if not token:
+            continue
+        descending = token.startswith("-")
+        name = token.lstrip("-+")
+        if name not in SORT_COLUMNS:
+            raise ValueError(f"Clé de tri inconnue : {name}")
+        keys.append((name, descending))
+    if not keys or keys[-1][0] != "id":
+        keys.append(("id", keys[-1][1] if keys else True))
+    return keys
+
+
+def _cursor_values(row, sort):
+    values = []
+    for name, _ in sort:
+        value = getattr(row, SORT_COLUMNS[name].key)
+        values.append(value.isoformat() if isinstance(value, date) else value)
+    return values
+
+
+def encode_sort_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sort_cursor(value, sort):
+    """Valeurs des clés de tri depuis un curseur opaque ; ValueError s'il est invalide."""
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Curseur invalide")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("Curseur invalide pour ce tri")
+    decoded = []
+    for (name, _), raw in zip(sort, values):
+        decoded.append(_decode_cursor_value(SORT_COLUMNS[name], raw))
+    return decoded
+
+
+def _decode_cursor_value(column, raw):
+    """Valeur d'une clé de tri, du type de sa colonne (le curseur vient du client)."""
+    if isinstance(column.type, Date):
+        if not isinstance(raw, str):
+            raise ValueError("Curseur invalide")
+        try:
+            return date.fromisoformat(raw)
+        except (TypeError, ValueError):
+            raise ValueError("Curseur invalide")
+    expected = column.type.python_type
+    if expected is float:
+        expected = (int, float)
+    # bool est un int pour isinstance : le refuser explicitement
+    if isinstance(raw, bool) or not isinstance(raw, expected):
+        raise ValueError("Curseur invalide")
+    return raw
+
+
+def keyset_sorted_page(query, sort, cursor=None, limit=50):
+    """
+    Page triée selon ``sort`` (résultat de parse_sort) à partir d'un curseur.
+    Les lignes doivent exposer les attributs date, score, subject,
+    assessment_type, term, student_id et id. Retourne (lignes, curseur suivant).
+    """
+    if cursor:
+        values = decode_sort_cursor(cursor, sort)
+        # (a, b, c) > (va, vb, vc) en ordre lexicographique, sens propre à chaque clé
+        clauses = []
+        for i, (name, descending) in enumerate(sort):
+            column = SORT_COLUMNS[name]
+            step = column < values[i] if descending else column > values[i]
+            previous = [SORT_COLUMNS[n] == values[j] for j, (n, _) in enumerate(sort[:i])]
+            clauses.append(and_(*previous, step))
+        query = query.filter(or_(*clauses))
+
+    order = [SORT_COLUMNS[name].desc() if descending else SORT_COLUMNS[name].asc() for name, descending in sort]
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], encode_sort_cursor(_cursor_values(rows[limit - 1], sort))
+    return rows, None
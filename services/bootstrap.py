@@ -0,0 +1,69 @@
+"""
+Initialisation ponctuelle de la base : schéma + données de référence.
+
+À exécuter une seule fois par déploiement (commande ``flask bootstrap`` ou
+hook gunicorn ``on_starting``), et non à chaque démarrage de worker.
+"""
+
+from models import db, Classe, StatsCounter
+
+
+# Classes prédéfinies de l'établissement
+PREDEFINED_CLASSES = [
+    '6ème', '5ème', '4ème', '3ème',
+    '2nde AB', '2nde CD',
+    '1ère AB', '1ère CD',
+    'Tle AB', 'Tle CD'
+]
+
+
+def _upsert_classes(names):
+    """
+    Insère les classes manquantes en une seule requête ensembliste.
+
+    SQLite et PostgreSQL utilisent ``INSERT ... ON CONFLICT DO NOTHING`` ;
+    les autres moteurs font une lecture des noms existants puis un insert groupé.
+    Retourne le nombre de classes créées.
+    """
+    rows = [{'name': name} for name in names]
+    if not rows:
+        return 0
+
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(Classe).values(rows).on_conflict_do_nothing(index_elements=['name'])
+        return db.session.execute(stmt).rowcount or 0
+
+    existing = {name for (name,) in db.session.query(Classe.name).filter(Classe.name.in_(names))}
+    missing = [row for row in rows if row['name'] not in existing]
+    if missing:
+        db.session.execute(db.insert(Classe), missing)
+    return len(missing)
+
+
+def bootstrap_database(create_schema=True):
+    """
+    Crée le schéma (si demandé) puis les classes prédéfinies.
+    Idempotent : peut être relancé sans effet de bord.
+    Doit être appelé dans un contexte d'application.
+    """
+    if create_schema:
+        db.create_all()
+
+    from services.reference import mark_reference_dirty
+    from services.stats import apply_counter_deltas, rebuild_counters
+
+    created = _upsert_classes(PREDEFINED_CLASSES)
+    if created:
+        mark_reference_dirty(db.session, 'classes')
+    if not db.session.query(StatsCounter.name).first():
+        # Première initialisation (ou base antérieure aux compteurs)
+        rebuild_counters()
+    else:
+        apply_counter_deltas(db.session.connection(), {'classes': created})
+    db.session.commit()
+    return created
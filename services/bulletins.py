@@ -0,0 +1,441 @@
+"""
+Génération en lot des bulletins PDF (fin de trimestre).
+
+Le processus principal prépare, classe par classe, les données de chaque
+bulletin (un calcul ``compute_class_results`` + une requête des moyennes par
+type pour toute la classe) sous forme de dictionnaires simples. Seul le rendu
+reportlab part dans un pool de processus : les workers n'ouvrent aucune
+connexion à la base.
+
+Chaque bulletin porte l'empreinte SHA-256 de ses données (``ReportCard.input_hash``) :
+un élève dont les notes, le rang et la mise en page n'ont pas changé depuis la
+dernière exécution est sauté. Les résultats sont enregistrés au fil de l'eau,
+donc une exécution interrompue reprend là où elle s'était arrêtée.
+
+Les fichiers sont écrits dans ``BULLETIN_DIR`` (vide = instance/bulletins),
+``T<trimestre>/<classe>/<élève>.pdf`` ; ``ReportCard.pdf_url`` garde ce chemin relatif.
+Une seule génération à la fois, tous processus confondus (workers gunicorn,
+commande CLI) : verrou sur le fichier ``job.lock`` de ce répertoire.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from models import db, Classe, ReportCard, Student
+from services.grading import compute_class_results
+from services.reference import get_active_year
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand la mise en page change : tous les bulletins sont régénérés
+LAYOUT_VERSION = 1
+
+TYPE_LABELS = {"interrogation": "Interrogations", "devoir": "Devoirs", "composition": "Compositions"}
+COMMIT_EVERY = 20
+JOB_FILE = "job.json"
+LOCK_FILE = "job.lock"
+
+
+def bulletin_dir(app):
+    return app.config.get("BULLETIN_DIR") or os.path.join(app.instance_path, "bulletins")
+
+
+def bulletin_path(term, class_id, student_id):
+    """Chemin relatif (à BULLETIN_DIR) stocké dans ReportCard.pdf_url."""
+    return f"T{term}/{class_id}/{student_id}.pdf"
+
+
+def input_hash(payload):
+    data = json.dumps([LAYOUT_VERSION, payload], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+# --------------------------------------------------------
+# DONNÉES DES BULLETINS (processus principal)
+# --------------------------------------------------------
+def class_payloads(classe, term, school_year=None):
+    """Données de rendu de chaque élève noté de la classe : {student_id: dict}."""
+    results = compute_class_results(classe.id, term)
+    if results.empty:
+        return {}
+
+    type_averages = (
+        results.notes.groupby(["student_id", "subject", "assessment_type"])["normalized"].mean()
+    )
+    students = (
+        db.session.query(Student.id, Student.last_name, Student.first_name, Student.birthdate)
+        .filter(Student.class_id == classe.id)
+    )
+
+    payloads = {}
+    for student_id, last_name, first_name, birthdate in students:
+        summary = results.student(student_id)
+        if summary is None:
+            continue
+        subjects = []
+        for subject, stats in sorted(summary["subjects"].items()):
+            types = {}
+            for atype in TYPE_LABELS:
+                key = (student_id, subject, atype)
+                if key in type_averages.index:
+                    types[atype] = round(float(type_averages[key]), 2)
+            subjects.append({
+                "subject": subject,
+                "types": types,
+                "average": round(stats["average"], 2),
+                "coefficient": stats["coefficient"],
+                "rank": stats["rank"],
+            })
+        payloads[student_id] = {
+            "student": f"{last_name} {first_name}",
+            "birthdate": birthdate.strftime("%d/%m/%Y") if birthdate else "",
+            "class_name": classe.name,
+            "school_year": school_year or "",
+            "term": term,
+            "subjects": subjects,
+            "average": round(summary["average"], 2),
+            "rank": summary["rank"],
+            "ranked_count": summary["ranked_count"],
+            "class_average": round(results.class_average(), 2),
+        }
+    return payloads
+
+
+# --------------------------------------------------------
+# RENDU PDF (workers du pool)
+# --------------------------------------------------------
+def render_bulletin_pdf(payload, path):
+    """Écrit le bulletin PDF (fichier temporaire puis os.replace : jamais de PDF tronqué)."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from xml.sax.saxutils import escape
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    doc = SimpleDocTemplate(tmp, pagesize=A4, title=f"Bulletin - {payload['student']}")
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'BulletinTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#003f7f'),
+        alignment=1
+    )
+
+    elements = [
+        Paragraph(f"Bulletin du trimestre {payload['term']}", title_style),
+        Paragraph(f"Année scolaire {escape(payload['school_year'])}" if payload["school_year"] else "",
+                  styles['Normal']),
+        Spacer(1, 0.2 * inch),
+        Paragraph(f"<b>Élève :</b> {escape(payload['student'])}", styles['Normal']),
+        Paragraph(f"<b>Classe :</b> {escape(payload['class_name'])}", styles['Normal']),
+        Paragraph(f"<b>Date de naissance :</b> {payload['birthdate'] or 'N/A'}", styles['Normal']),
+        Spacer(1, 0.3 * inch),
+    ]
+
+    data = [["Matière", *TYPE_LABELS.values(), "Moyenne", "Coef.", "Rang"]]
+    for row in payload["subjects"]:
+        data.append([
+            row["subject"],
+            *[f"{row['types'][atype]:.2f}" if atype in row["types"] else "—" for atype in TYPE_LABELS],
+            f"{row['average']:.2f}",
+            f"{row['coefficient']:g}",
+            str(row["rank"]),
+        ])
+    table = Table(data, colWidths=[1.6*inch, 1.0*inch, 0.8*inch, 1.0*inch, 0.8*inch, 0.5*inch, 0.5*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003f7f')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+    ]))
+    elements.append(table)
+    elements.append(Spacer(1, 0.3 * inch))
+
+    rank_suffix = "er" if payload["rank"] == 1 else "e"
+    elements.append(Paragraph(
+        f"<b>Moyenne générale :</b> {payload['average']:.2f}/20 &nbsp;&nbsp; "
+        f"<b>Rang :</b> {payload['rank']}{rank_suffix} / {payload['ranked_count']} &nbsp;&nbsp; "
+        f"<b>Moyenne de la classe :</b> {payload['class_average']:.2f}/20",
+        styles['Normal']
+    ))
+
+    doc.build(elements)
+    os.replace(tmp, path)
+    return path
+
+
+def _render_job(args):
+    student_id, payload, path = args
+    render_bulletin_pdf(payload, path)
+    return student_id
+
+
+# --------------------------------------------------------
+# ORCHESTRATION
+# --------------------------------------------------------
+class BatchReport:
+    """Avancement d'une génération : total, rendus, sautés, en échec."""
+
+    def __init__(self, term, class_ids):
+        self.term = term
+        self.class_ids = class_ids
+        self.total = 0
+        self.rendered = 0
+        self.skipped = 0
+        self.failed = 0
+        self.status = "running"
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.rendered + self.skipped + self.failed
+
+    def as_dict(self):
+        return {
+            "term": self.term, "class_ids": self.class_ids, "status": self.status,
+            "total": self.total, "done": self.done, "rendered": self.rendered,
+            "skipped": self.skipped, "failed": self.failed,
+            "started_at": self.started_at, "finished_at": self.finished_at,
+        }
+
+
+def _latest_cards(student_ids, term):
+    """ReportCard de chaque élève pour le trimestre (unique par élève et trimestre ; une requête)."""
+    return {card.student_id: card for card in
+            ReportCard.query.filter(ReportCard.student_id.in_(student_ids), ReportCard.term == term)}
+
+
+def _pool(workers):
+    if workers <= 1:
+        return None
+    # spawn : pas de fork d'un processus qui tient des connexions et des threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def generate_bulletins(term, class_id=None, workers=None, force=False, progress=None):
+    """
+    Génère les bulletins PDF d'une classe (ou de toutes) pour un trimestre.
+
+    ``workers`` : taille du pool (BULLETIN_WORKERS par défaut ; 0 ou 1 = rendu
+    dans le processus courant). ``force`` régénère même les bulletins à jour.
+    ``progress(report)`` est appelé après chaque bulletin traité.
+    Doit être appelé dans un contexte d'application ; retourne le BatchReport.
+    """
+    app = current_app._get_current_object()
+    root = bulletin_dir(app)
+    if workers is None:
+        workers = app.config.get("BULLETIN_WORKERS") or os.cpu_count() or 1
+
+    query = Classe.query.order_by(Classe.name)
+    if class_id is not None:
+        query = query.filter(Classe.id == class_id)
+    classes = query.all()
+
+    report = BatchReport(term, [c.id for c in classes])
+    school_year = get_active_year()
+    notify = progress or (lambda report: None)
+
+    pool = _pool(workers)
+    try:
+        for classe in classes:
+            payloads = class_payloads(classe, term, school_year)
+            report.total += len(payloads)
+            cards = _latest_cards(list(payloads), term)
+
+            jobs = []
+            for student_id, payload in payloads.items():
+                digest = input_hash(payload)
+                relative = bulletin_path(term, classe.id, student_id)
+                card = cards.get(student_id)
+                if (not force and card is not None and card.input_hash == digest
+                        and card.pdf_url == relative and os.path.exists(os.path.join(root, relative))):
+                    report.skipped += 1
+                    notify(report)
+                    continue
+                jobs.append((student_id, payload, os.path.join(root, relative), relative, digest))
+
+            _render_class(jobs, pool, cards, term, report, notify)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    report.status = "finished"
+    report.finished_at = datetime.now(timezone.utc).isoformat()
+    notify(report)
+    logger.info("Bulletins T%s : %s rendus, %s à jour, %s en échec",
+                term, report.rendered, report.skipped, report.failed)
+    return report
+
+
+def _render_class(jobs, pool, cards, term, report, notify):
+    by_student = {job[0]: job for job in jobs}
+    done = set()
+    pending = 0
+
+    def record(student_id, error):
+        nonlocal pending
+        done.add(student_id)
+        if error is not None:
+            report.failed += 1
+            logger.error("Bulletin élève %s (T%s) en échec : %s", student_id, term, error)
+        else:
+            _, _, _, relative, digest = by_student[student_id]
+            card = cards.get(student_id)
+            if card is None:
+                card = ReportCard(student_id=student_id, term=term)
+                db.session.add(card)
+                cards[student_id] = card
+            card.pdf_url = relative
+            card.input_hash = digest
+            card.generated_at = datetime.now(timezone.utc)
+            report.rendered += 1
+            pending += 1
+            # Enregistrement au fil de l'eau : une reprise saute ce qui est déjà fait
+            if pending >= COMMIT_EVERY:
+                db.session.commit()
+                pending = 0
+        notify(report)
+
+    if pool is not None:
+        try:
+            futures = {pool.submit(_render_job, (sid, payload, path)): sid for sid, payload, path, _, _ in jobs}
+            for student_id, error in _completed(futures):
+                record(student_id, error)
+        except BrokenProcessPool:
+            # Pool indisponible ou worker tué en cours de classe : le reste est rendu ici
+            logger.warning("Pool de rendu indisponible : rendu dans le processus courant")
+        jobs = [job for job in jobs if job[0] not in done]
+
+    for student_id, error in _render_inline(jobs):
+        record(student_id, error)
+    db.session.commit()
+
+
+def _render_inline(jobs):
+    for student_id, payload, path, _, _ in jobs:
+        try:
+            _render_job((student_id, payload, path))
+            yield student_id, None
+        except Exception as exc:
+            yield student_id, exc
+
+
+def _completed(futures):
+    for future in as_completed(futures):
+        student_id = futures[future]
+        try:
+            future.result()
+            yield student_id, None
+        except BrokenProcessPool:
+            # Le pool entier est perdu : à traiter par l'appelant, pas comme un échec de cet élève
+            raise
+        except Exception as exc:
+            yield student_id, exc
+
+
+# --------------------------------------------------------
+# TÂCHE DE FOND (route d'administration)
+# --------------------------------------------------------
+def acquire_generation_lock(app):
+    """
+    Verrou exclusif et non bloquant sur ``job.lock`` : fichier ouvert à
+    passer à ``release_generation_lock``, ou None si une génération tourne
+    déjà (dans ce processus ou un autre). Le système le libère si le
+    processus meurt.
+    """
+    root = bulletin_dir(app)
+    os.makedirs(root, exist_ok=True)
+    handle = open(os.path.join(root, LOCK_FILE), "a+")
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def release_generation_lock(handle):
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    finally:
+        handle.close()
+
+
+def job_status(app):
+    """Dernier état écrit par la tâche (lisible depuis n'importe quel worker)."""
+    try:
+        with open(os.path.join(bulletin_dir(app), JOB_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_status(app, report, min_interval=0.5):
+    now = time.monotonic()
+    if report.status == "running" and now - getattr(report, "written_at", 0) < min_interval:
+        return
+    report.written_at = now
+    root = bulletin_dir(app)
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, JOB_FILE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report.as_dict(), f)
+    os.replace(tmp, path)
+
+
+def start_background_job(app, term, class_id=None, force=False):
+    """Lance la génération dans un thread ; False si une génération tourne déjà (tous processus)."""
+    lock = acquire_generation_lock(app)
+    if lock is None:
+        return False
+
+    def run():
+        try:
+            with app.app_context():
+                try:
+                    generate_bulletins(term, class_id, force=force,
+                                       progress=lambda report: _write_status(app, report))
+                except Exception:
+                    logger.exception("Génération des bulletins T%s interrompue", term)
+                    failed = BatchReport(term, [class_id] if class_id else [])
+                    failed.status = "error"
+                    _write_status(app, failed)
+                finally:
+                    db.session.remove()
+        finally:
+            release_generation_lock(lock)
+
+    threading.Thread(target=run, name="bulletins", daemon=True).start()
+    return True
@@ -0,0 +1,240 @@
+"""
+Réglages du moteur SQLAlchemy selon la base utilisée.
+
+- SQLite : PRAGMA appliqués à chaque nouvelle connexion via l'événement
+  ``connect`` de SQLAlchemy ; les valeurs viennent de ``app.Config``.
+- PostgreSQL : options du pool (taille, overflow, pre-ping, recycle,
+  statement_timeout) dérivées des variables d'environnement et du nombre
+  de workers gunicorn, avec métriques de checkout/attente.
+"""
+
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+# Moteurs configurés dans ce processus (pour dispose après fork)
+_ENGINES = weakref.WeakSet()
+
+
+# Clé de configuration -> PRAGMA SQLite
+SQLITE_PRAGMAS = [
+    ("SQLITE_JOURNAL_MODE", "journal_mode"),
+    ("SQLITE_BUSY_TIMEOUT_MS", "busy_timeout"),
+    ("SQLITE_SYNCHRONOUS", "synchronous"),
+    ("SQLITE_MMAP_SIZE", "mmap_size"),
+    ("SQLITE_CACHE_SIZE", "cache_size"),
+    ("SQLITE_TEMP_STORE", "temp_store"),
+    ("SQLITE_FOREIGN_KEYS", "foreign_keys"),
+]
+
+
+def sqlite_pragmas(config):
+    """Liste des (pragma, valeur) configurés ; les clés absentes ou vides sont ignorées."""
+    pragmas = []
+    for key, pragma in SQLITE_PRAGMAS:
+        value = config.get(key)
+        if value is None or value == "":
+            continue
+        if isinstance(value, bool):
+            value = "ON" if value else "OFF"
+        pragmas.append((pragma, value))
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine, config):
+    """Enregistre l'application des PRAGMA sur chaque connexion SQLite du moteur."""
+    if engine.dialect.name != "sqlite":
+        return []
+
+    pragmas = sqlite_pragmas(config)
+    if not pragmas:
+        return []
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas:
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
+
+    return pragmas
+
+
+# --------------------------------------------------------
+# POSTGRESQL : POOL DE CONNEXIONS
+# --------------------------------------------------------
+def normalize_database_url(url):
+    """Les hébergeurs fournissent parfois ``postgres://``, refusé par SQLAlchemy 2."""
+    if url and url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def _env_int(env, key, default=None):
+    value = env.get(key)
+    return int(value) if value not in (None, "") else default
+
+
+def postgres_engine_options(env=None):
+    """
+    Options ``SQLALCHEMY_ENGINE_OPTIONS`` pour PostgreSQL.
+
+    Variables reconnues : DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE (s), DB_POOL_PRE_PING (0/1), DB_STATEMENT_TIMEOUT_MS.
+    Si DB_MAX_CONNECTIONS est défini, les valeurs par défaut de pool_size et
+    max_overflow sont bornées pour que WEB_CONCURRENCY workers tiennent dans
+    ce budget de connexions.
+    """
+    env = os.environ if env is None else env
+
+    pool_size, max_overflow = 5, 10
+    max_connections = _env_int(env, "DB_MAX_CONNECTIONS")
+    if max_connections:
+        workers = max(1, _env_int(env, "WEB_CONCURRENCY", 1))
+        per_worker = max(1, max_connections // workers)
+        pool_size = min(pool_size, per_worker)
+        max_overflow = min(max_overflow, per_worker - pool_size)
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": _env_int(env, "DB_POOL_SIZE", pool_size),
+        "max_overflow": _env_int(env, "DB_MAX_OVERFLOW", max_overflow),
+        "pool_timeout": _env_int(env, "DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int(env, "DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": env.get("DB_POOL_PRE_PING", "1") == "1",
+    }
+
+    statement_timeout = _env_int(env, "DB_STATEMENT_TIMEOUT_MS")
+    if statement_timeout:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+
+def engine_options_for(url, env=None):
+    """Options moteur selon l'URL : seul PostgreSQL a besoin d'un pool réglé."""
+    if url and url.startswith("postgresql"):
+        return postgres_engine_options(env)
+    return {}
+
+
+class PoolStats:
+    """Compteurs du pool de connexions, par processus."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self.lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def incr(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+POOL_STATS = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool qui mesure le temps d'attente d'une connexion libre."""
+
+    _local = threading.local()
+
+    def _do_get(self):
+        # _do_get est récursif : ne mesurer que l'appel externe
+        if getattr(self._local, "depth", 0):
+            return super()._do_get()
+
+        self._local.depth = 1
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self._local.depth = 0
+            POOL_STATS.record_wait(time.perf_counter() - start, timed_out)
+
+
+def _instrument_pool(engine):
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        POOL_STATS.incr("connects")
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_STATS.incr("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        POOL_STATS.incr("checkins")
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        POOL_STATS.incr("invalidations")
+
+
+def pool_metrics():
+    """Instantané des métriques du pool (compteurs + état courant des pools)."""
+    with POOL_STATS.lock:
+        metrics = {
+            "checkouts": POOL_STATS.checkouts,
+            "checkins": POOL_STATS.checkins,
+            "connects": POOL_STATS.connects,
+            "invalidations": POOL_STATS.invalidations,
+            "timeouts": POOL_STATS.timeouts,
+            "wait_seconds_total": round(POOL_STATS.wait_seconds_total, 6),
+            "wait_seconds_max": round(POOL_STATS.wait_seconds_max, 6),
+        }
+
+    pools = []
+    for engine in list(_ENGINES):
+        pool = engine.pool
+        entry = {"url": engine.url.render_as_string(hide_password=True), "class": pool.__class__.__name__}
+        if isinstance(pool, QueuePool):
+            entry.update(size=pool.size(), checked_out=pool.checkedout(),
+                         overflow=pool.overflow(), checked_in=pool.checkedin())
+        pools.append(entry)
+    metrics["pools"] = pools
+    return metrics
+
+
+def dispose_engines():
+    """
+    Abandonne les connexions héritées du processus parent (hook post_fork).
+    ``close=False`` : ne pas fermer les sockets qui appartiennent encore au maître.
+    """
+    for engine in list(_ENGINES):
+        engine.dispose(close=False)
+
+
+def configure_engines(app, db):
+    """Applique les réglages propres au moteur (à appeler après db.init_app)."""
+    with app.app_context():
+        for engine in db.engines.values():
+            _ENGINES.add(engine)
+            _instrument_pool(engine)
+        apply_sqlite_pragmas(db.engine, app.config)
@@ -0,0 +1,375 @@
+"""
+Registre des formats d'export (Excel, PDF, Word).
+
+Les bibliothèques lourdes (openpyxl, reportlab, python-docx) ne sont importées
+qu'à la première utilisation d'un format : un worker qui ne sert que la
+connexion ou les notes ne paie jamais leur coût d'import.
+`warm_backends()` permet de les précharger à la demande.
+"""
+
+import importlib
+import inspect
+import io
+import logging
+import time
+from datetime import datetime
+
+from services.metrics import observe_export
+
+logger = logging.getLogger(__name__)
+
+
+class ExportRenderer:
+    """Format d'export : métadonnées + fonction de rendu chargée paresseusement."""
+
+    def __init__(self, name, mimetype, extension, modules, func):
+        self.name = name
+        self.mimetype = mimetype
+        self.extension = extension
+        self.modules = tuple(modules)
+        self.func = func
+        self.loaded = False
+
+    def load(self):
+        """Importe les modules du backend (une seule fois par processus)."""
+        if not self.loaded:
+            start = time.perf_counter()
+            for module in self.modules:
+                importlib.import_module(module)
+            self.loaded = True
+            logger.info("Backend d'export '%s' chargé en %.1f ms",
+                        self.name, (time.perf_counter() - start) * 1000)
+        return self
+
+    def render(self, *args, **kwargs):
+        self.load()
+        if inspect.isgeneratorfunction(self.func):
+            return self._stream(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            observe_export(self.name, time.perf_counter() - start)
+
+    def _stream(self, *args, **kwargs):
+        """Format produit en flux : durée mesurée jusqu'au dernier morceau envoyé."""
+        start = time.perf_counter()
+        try:
+            yield from self.func(*args, **kwargs)
+        finally:
+            observe_export(self.name, time.perf_counter() - start)
+
+
+RENDERERS = {}
+
+
+def renderer(name, mimetype, extension, modules=()):
+    """Décorateur d'enregistrement d'un format d'export."""
+    def decorator(func):
+        RENDERERS[name] = ExportRenderer(name, mimetype, extension, modules, func)
+        return func
+    return decorator
+
+
+def get_renderer(name):
+    try:
+        return RENDERERS[name]
+    except KeyError:
+        raise ValueError(f"Format d'export inconnu : {name}")
+
+
+def warm_backends(names=None):
+    """Précharge les backends demandés (tous par défaut). Retourne leurs noms."""
+    names = list(RENDERERS) if names is None else names
+    for name in names:
+        get_renderer(name).load()
+    return names
+
+
+# --------------------------------------------------------
+# LISTE DES ÉLÈVES D'UNE CLASSE
+# --------------------------------------------------------
+STUDENT_HEADERS = ["ID", "Nom", "Prénom", "Date de naissance", "Parents"]
+
+
+def _student_rows(students):
+    for student in students:
+        parents_names = ", ".join([f"{p.first_name} {p.last_name}" for p in student.parents])
+        yield [
+            student.id,
+            student.last_name,
+            student.first_name,
+            str(student.birthdate) if student.birthdate else "",
+            parents_names
+        ]
+
+
+@renderer("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx",
+          modules=("openpyxl",))
+def students_to_xlsx(classe, students):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = classe.name
+    ws.append(STUDENT_HEADERS)
+    for row in _student_rows(students):
+        ws.append(row)
+
+    stream = io.BytesIO()
+    wb.save(stream)
+    stream.seek(0)
+    return stream
+
+
+@renderer("pdf", "application/pdf", "pdf",
+          modules=("reportlab.platypus", "reportlab.lib.styles"))
+def students_to_pdf(classe, students):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib import colors
+
+    stream = io.BytesIO()
+    doc = SimpleDocTemplate(stream, pagesize=A4)
+    elements = []
+
+    # Titre
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#003f7f'),
+        spaceAfter=12,
+        alignment=1  # Center
+    )
+    elements.append(Paragraph(f"Liste des Élèves - Classe {classe.name}", title_style))
+    elements.append(Spacer(1, 0.3 * inch))
+
+    # Tableau
+    data = [STUDENT_HEADERS]
+    for row in _student_rows(students):
+        data.append([str(value) for value in row])
+
+    table = Table(data, colWidths=[0.5*inch, 1.2*inch, 1.2*inch, 1.5*inch, 2*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003f7f')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ]))
+
+    elements.append(table)
+    elements.append(Spacer(1, 0.3 * inch))
+
+    # Pied de page
+    footer_text = f"Généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}"
+    footer_style = ParagraphStyle(
+        'Footer',
+        parent=styles['Normal'],
+        fontSize=8,
+        textColor=colors.grey,
+        alignment=1
+    )
+    elements.append(Paragraph(footer_text, footer_style))
+
+    doc.build(elements)
+    stream.seek(0)
+    return stream
+
+
+@renderer("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx",
+          modules=("docx",))
+def students_to_docx(classe, students):
+    from docx import Document
+    from docx.shared import Pt, RGBColor
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    doc = Document()
+
+    # Titre
+    title = doc.add_heading(f"Liste des Élèves - Classe {classe.name}", level=1)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title_format = title.runs[0]
+    title_format.font.size = Pt(16)
+    title_format.font.color.rgb = RGBColor(0, 63, 127)
+
+    doc.add_paragraph()
+
+    # Tableau
+    table = doc.add_table(rows=1, cols=len(STUDENT_HEADERS))
+    table.style = 'Light Grid Accent 1'
+
+    hdr_cells = table.rows[0].cells
+    for idx, header in enumerate(STUDENT_HEADERS):
+        hdr_cells[idx].text = header
+
+    for row in _student_rows(students):
+        row_cells = table.add_row().cells
+        for idx, value in enumerate(row):
+            row_cells[idx].text = str(value)
+
+    doc.add_paragraph()
+    footer = doc.add_paragraph(f"Généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}")
+    footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    footer_format = footer.runs[0]
+    footer_format.font.size = Pt(8)
+    footer_format.font.color.rgb = RGBColor(128, 128, 128)
+
+    stream = io.BytesIO()
+    doc.save(stream)
+    stream.seek(0)
+    return stream
+
+
+# --------------------------------------------------------
+# MATRICE CLASSE × MATIÈRE (VUE D'ENSEMBLE DE L'ÉTABLISSEMENT)
+# --------------------------------------------------------
+# Feuille -> (clé de la cellule, format de nombre, échelle de couleurs ou None)
+MATRIX_SHEETS = [
+    ("Moyennes", "average", "0.00", ("F8696B", "FFEB84", "63BE7B")),
+    ("Réussite", "pass_rate", "0%", ("F8696B", "FFEB84", "63BE7B")),
+    ("Nombre de notes", "count", "0", None),
+]
+
+
+@renderer("school_xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx",
+          modules=("openpyxl",))
+def school_matrix_to_xlsx(matrix):
+    """Une feuille par mesure ; échelles de couleurs appliquées par Excel (mise en forme conditionnelle)."""
+    from openpyxl import Workbook
+    from openpyxl.formatting.rule import ColorScaleRule
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    subjects = matrix["subjects"]
+    last_column = get_column_letter(len(subjects) + 1)
+
+    for title, key, number_format, colors in MATRIX_SHEETS:
+        ws = wb.create_sheet(title)
+        ws.append(["Classe", *subjects, "Ensemble"])
+        for row in matrix["rows"]:
+            ws.append([row["class_name"],
+                       *[row["cells"][s][key] if row["cells"][s] else None for s in subjects],
+                       row["total"][key]])
+        if matrix["overall"]:
+            ws.append(["Ensemble", *[matrix["totals"][s][key] for s in subjects], matrix["overall"][key]])
+
+        for cell in ws[1]:
+            cell.font = Font(bold=True)
+        for cells in ws.iter_rows(min_row=2, min_col=2):
+            for cell in cells:
+                cell.number_format = number_format
+        ws.freeze_panes = "B2"
+        ws.column_dimensions["A"].width = 14
+        for index in range(2, len(subjects) + 3):
+            ws.column_dimensions[get_column_letter(index)].width = 14
+
+        if colors and matrix["rows"] and subjects:
+            # Échelle sur les cellules classe × matière seulement (pas sur les totaux)
+            cell_range = f"B2:{last_column}{len(matrix['rows']) + 1}"
+            ws.conditional_formatting.add(cell_range, ColorScaleRule(
+                start_type="min", start_color=colors[0],
+                mid_type="percentile", mid_value=50, mid_color=colors[1],
+                end_type="max", end_color=colors[2],
+            ))
+
+    stream = io.BytesIO()
+    wb.save(stream)
+    stream.seek(0)
+    return stream
+
+
+# --------------------------------------------------------
+# NOTES FILTRÉES (EXPORT EN FLUX)
+# --------------------------------------------------------
+# Les lignes arrivent de la base par lots (yield_per) et sont écrites au fil
+# de l'eau : la mémoire reste constante quelle que soit la taille de l'export.
+GRADE_HEADERS = ["ID", "Date", "Trimestre", "Classe", "Élève", "Matière", "Type",
+                 "Note", "Barème", "Note /20"]
+
+# Préfixes qu'un tableur interprète comme une formule
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _grade_cells(row):
+    return [
+        row.id, row.date, row.term, row.class_name or "", f"{row.last_name} {row.first_name}",
+        row.subject, row.assessment_type, row.score, row.max_score, round(row.normalized, 2),
+    ]
+
+
+def _neutralize(value):
+    """Texte saisi par un utilisateur : une apostrophe empêche Excel d'y voir une formule."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+@renderer("grades_csv", "text/csv; charset=utf-8", "csv", modules=("csv",))
+def stream_grades_csv(rows, flush_every=500):
+    """CSV (séparateur ';' et BOM UTF-8, pour Excel en français) produit par morceaux."""
+    import csv
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    writer.writerow(GRADE_HEADERS)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+
+    for count, row in enumerate(rows, 1):
+        cells = [_neutralize(cell) for cell in _grade_cells(row)]
+        cells[1] = cells[1].isoformat()
+        writer.writerow(cells)
+        if count % flush_every == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+@renderer("grades_xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx",
+          modules=("openpyxl",))
+def stream_grades_xlsx(rows, chunk_size=64 * 1024):
+    """
+    XLSX en mode write_only d'openpyxl : les lignes sont écrites dans un fichier
+    temporaire, pas gardées en mémoire. Le format zip impose d'attendre la fin
+    du classeur avant d'envoyer le premier octet.
+    """
+    import tempfile
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Notes")
+    ws.append(GRADE_HEADERS)
+    for row in rows:
+        cells = []
+        for value in _grade_cells(row):
+            if isinstance(value, str) and value.startswith("="):
+                # openpyxl écrirait une formule : forcer une cellule texte
+                cell = WriteOnlyCell(ws, value)
+                cell.data_type = "s"
+                value = cell
+            cells.append(value)
+        ws.append(cells)
+
+    with tempfile.TemporaryFile() as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
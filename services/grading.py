@@ -0,0 +1,164 @@
+"""
+Moteur de calcul des moyennes et des rangs d'une classe pour un trimestre.
+
+Toutes les notes de la classe sont chargées en une requête dans un DataFrame,
+puis chaque étape est une opération vectorisée sur l'ensemble des élèves :
+
+1. note normalisée sur 20 (``score / max_score * 20``, barème nul = 0) ;
+2. moyenne par (élève, matière, type) ;
+3. moyenne de matière = moyenne des types pondérée par ``ASSESSMENT_TYPE_WEIGHTS``
+   (seuls les types présents comptent, les poids sont renormalisés) ;
+4. moyenne générale = moyenne des matières pondérée par ``SUBJECT_COEFFICIENTS``
+   (coefficient 1 pour une matière non listée) ;
+5. rang général et rang par matière (ex æquo au même rang, méthode « min »).
+
+Le bulletin d'un élève et les statistiques de classe lisent le même résultat :
+le rang ne demande plus de calculer le bulletin de chaque camarade.
+"""
+
+from flask import current_app, has_app_context
+
+from models import db, Assessment, Student
+
+
+DEFAULT_TYPE_WEIGHTS = {"interrogation": 1.0, "devoir": 1.0, "composition": 2.0}
+
+
+def parse_weights(value, default=None):
+    """Poids depuis un dict ou une chaîne « nom=poids,nom=poids » (configuration)."""
+    if isinstance(value, dict):
+        return {str(k): float(v) for k, v in value.items()}
+    weights = dict(default or {})
+    for item in (value or "").split(","):
+        name, sep, weight = item.partition("=")
+        if sep and name.strip():
+            weights[name.strip()] = float(weight)
+    return weights
+
+
+def grading_weights():
+    """(poids des types, coefficients des matières) de la configuration courante."""
+    config = current_app.config if has_app_context() else {}
+    type_weights = parse_weights(config.get("ASSESSMENT_TYPE_WEIGHTS"), DEFAULT_TYPE_WEIGHTS)
+    coefficients = parse_weights(config.get("SUBJECT_COEFFICIENTS"))
+    return type_weights, coefficients
+
+
+class ClassResults:
+    """
+    Résultats d'une classe-trimestre.
+
+    ``notes`` : une ligne par note (student_id, subject, assessment_type, normalized)
+    ``subjects`` : une ligne par (élève, matière) : average, count, coefficient, rank
+    ``students`` : une ligne par élève noté, indexée par student_id : average, rank
+    """
+
+    def __init__(self, notes, subjects, students, class_size):
+        self.notes = notes
+        self.subjects = subjects
+        self.students = students
+        self.class_size = class_size
+
+    @property
+    def empty(self):
+        return self.notes.empty
+
+    @property
+    def ranked_count(self):
+        return len(self.students)
+
+    def student(self, student_id):
+        """Moyennes et rangs d'un élève (None s'il n'a aucune note)."""
+        if student_id not in self.students.index:
+            return None
+        row = self.students.loc[student_id]
+        subjects = {}
+        for subject_row in self.subjects[self.subjects["student_id"] == student_id].to_dict("records"):
+            subjects[subject_row["subject"]] = {
+                "average": float(subject_row["average"]),
+                "count": int(subject_row["count"]),
+                "coefficient": float(subject_row["coefficient"]),
+                "rank": int(subject_row["rank"]),
+            }
+        return {
+            "average": float(row["average"]),
+            "rank": int(row["rank"]),
+            "ranked_count": self.ranked_count,
+            "subjects": subjects,
+        }
+
+    def ranking(self):
+        """Liste (student_id, moyenne, rang) triée par rang."""
+        ordered = self.students.sort_values(["rank", "average"], ascending=[True, False])
+        return [(int(sid), float(average), int(rank))
+                for sid, average, rank in zip(ordered.index, ordered["average"], ordered["rank"])]
+
+    def class_average(self):
+        """Moyenne des moyennes générales des élèves notés."""
+        return float(self.students["average"].mean()) if not self.students.empty else 0.0
+
+
+def compute_class_results(class_id, term, type_weights=None, coefficients=None, scale=20.0):
+    """Charge les notes de la classe (une requête) et calcule moyennes et rangs."""
+    import pandas as pd
+
+    if type_weights is None or coefficients is None:
+        default_types, default_coefficients = grading_weights()
+        type_weights = default_types if type_weights is None else type_weights
+        coefficients = default_coefficients if coefficients is None else coefficients
+
+    rows = (
+        db.session.query(Assessment.student_id, Assessment.subject, Assessment.assessment_type,
+                         Assessment.score, Assessment.max_score)
+        .join(Student, Student.id == Assessment.student_id)
+        .filter(Student.class_id == class_id, Assessment.term == term)
+        .all()
+    )
+    class_size = db.session.query(db.func.count(Student.id)).filter(Student.class_id == class_id).scalar()
+
+    notes = pd.DataFrame(rows, columns=["student_id", "subject", "assessment_type", "score", "max_score"])
+    return results_from_frame(notes, type_weights, coefficients, class_size, scale)
+
+
+def results_from_frame(notes, type_weights, coefficients, class_size=None, scale=20.0):
+    """Calcul vectorisé sur un DataFrame (student_id, subject, assessment_type, score, max_score)."""
+    import numpy as np
+    import pandas as pd
+
+    if notes.empty:
+        empty_subjects = pd.DataFrame(columns=["student_id", "subject", "average", "count", "coefficient", "rank"])
+        empty_students = pd.DataFrame(columns=["average", "rank"], index=pd.Index([], name="student_id"))
+        return ClassResults(notes.assign(normalized=[]), empty_subjects, empty_students, class_size or 0)
+
+    score = notes["score"].to_numpy(dtype=float)
+    max_score = notes["max_score"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        notes = notes.assign(normalized=np.where(max_score > 0, score / max_score * scale, 0.0))
+
+    # Moyenne par type, puis par matière (pondération des types présents)
+    by_type = (
+        notes.groupby(["student_id", "subject", "assessment_type"], sort=False)["normalized"]
+        .agg(["mean", "count"])
+        .reset_index()
+    )
+    by_type["weight"] = by_type["assessment_type"].map(type_weights).fillna(1.0)
+    by_type["weighted"] = by_type["mean"] * by_type["weight"]
+    subjects = (
+        by_type.groupby(["student_id", "subject"], sort=False)
+        .agg(weighted=("weighted", "sum"), weight=("weight", "sum"), count=("count", "sum"))
+        .reset_index()
+    )
+    subjects["average"] = np.where(subjects["weight"] > 0, subjects["weighted"] / subjects["weight"], 0.0)
+    subjects["coefficient"] = subjects["subject"].map(coefficients).fillna(1.0)
+    subjects["rank"] = subjects.groupby("subject")["average"].rank(method="min", ascending=False).astype(int)
+
+    # Moyenne générale coefficientée et rang dans la classe
+    subjects["points"] = subjects["average"] * subjects["coefficient"]
+    totals = subjects.groupby("student_id").agg(points=("points", "sum"), coefficient=("coefficient", "sum"))
+    students = pd.DataFrame(index=totals.index)
+    students["average"] = np.where(totals["coefficient"] > 0, totals["points"] / totals["coefficient"], 0.0)
+    students["rank"] = students["average"].rank(method="min", ascending=False).astype(int)
+
+    subjects = subjects[["student_id", "subject", "average", "count", "coefficient", "rank"]]
+    return ClassResults(notes, subjects.sort_values(["student_id", "subject"]), students,
+                        class_size if class_size is not None else len(students))
@@ -0,0 +1,156 @@
+"""
+Instrumentation SQL par requête HTTP.
+
+Chaque requête SQL exécutée pendant une requête Flask est comptée et chronométrée
+(événements ``before_cursor_execute`` / ``after_cursor_execute``). Les totaux sont
+renvoyés dans l'en-tête ``Server-Timing`` et les requêtes dépassant
+``SLOW_QUERY_MS`` sont journalisées avec le nom de l'endpoint.
+
+Un administrateur peut aussi profiler une requête isolée avec cProfile
+(voir ``init_request_profiler``).
+"""
+
+import cProfile
+import json
+import os
+import time
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+
+def request_query_stats():
+    """(nombre de requêtes SQL, temps SQL en secondes) pour la requête HTTP courante."""
+    if not has_request_context():
+        return 0, 0.0
+    return g.get("sql_query_count", 0), g.get("sql_query_time", 0.0)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    if not has_request_context():
+        return
+
+    g.sql_query_count = g.get("sql_query_count", 0) + 1
+    g.sql_query_time = g.get("sql_query_time", 0.0) + elapsed
+
+    threshold = current_app.config.get("SLOW_QUERY_MS")
+    if threshold is not None and elapsed * 1000 >= threshold:
+        current_app.logger.warning(
+            "Requête SQL lente (%.1f ms) [%s] : %s",
+            elapsed * 1000, request.endpoint, " ".join(statement.split())
+        )
+
+
+def init_query_instrumentation(app, db):
+    """Branche les compteurs SQL sur les moteurs de l'application et les hooks HTTP."""
+    if not app.config.get("SQL_INSTRUMENTATION", True):
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+        g.sql_query_count = 0
+        g.sql_query_time = 0.0
+
+    @app.after_request
+    def _add_server_timing(response):
+        if "request_started" not in g:
+            return response
+        count, db_time = request_query_stats()
+        total = time.perf_counter() - g.request_started
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={db_time * 1000:.2f};desc="{count} queries", app;dur={total * 1000:.2f}'
+        )
+        return response
+
+
+# --------------------------------------------------------
+# PROFILAGE À LA DEMANDE (ADMINISTRATEURS)
+# --------------------------------------------------------
+PROFILE_QUERY_ARG = "_profile"
+PROFILE_HEADER = "X-Profile"
+
+
+def profile_dir(app):
+    return app.config.get("PROFILE_DIR") or os.path.join(app.instance_path, "profiles")
+
+
+def _profiling_requested():
+    if request.args.get(PROFILE_QUERY_ARG) != "1" and request.headers.get(PROFILE_HEADER) != "1":
+        return False
+    from flask_login import current_user
+    return current_user.is_authenticated and current_user.is_admin()
+
+
+def init_request_profiler(app):
+    """
+    Profilage cProfile d'une requête isolée : ``?_profile=1`` ou en-tête
+    ``X-Profile: 1``, réservé aux administrateurs. Le résultat (format pstats,
+    lisible par snakeviz/flameprof) est écrit dans ``instance/profiles`` avec
+    un fichier JSON décrivant l'endpoint, la durée et le nombre de requêtes SQL.
+    """
+    if not app.config.get("PROFILER_ENABLED", True):
+        return
+
+    @app.before_request
+    def _start_profiler():
+        if _profiling_requested():
+            g.profiler = cProfile.Profile()
+            g.profiler_started = time.perf_counter()
+            g.profiler.enable()
+
+    @app.after_request
+    def _stop_profiler(response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+
+        elapsed_ms = (time.perf_counter() - g.profiler_started) * 1000
+        query_count, query_time = request_query_stats()
+        endpoint = request.endpoint or "unknown"
+
+        directory = profile_dir(current_app)
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        name = f"{stamp}_{endpoint}_{elapsed_ms:.0f}ms_{query_count}q"
+        profiler.dump_stats(os.path.join(directory, name + ".prof"))
+        with open(os.path.join(directory, name + ".json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "endpoint": endpoint,
+                "path": request.full_path,
+                "method": request.method,
+                "status": response.status_code,
+                "duration_ms": round(elapsed_ms, 2),
+                "sql_queries": query_count,
+                "sql_time_ms": round(query_time * 1000, 2),
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+            }, f, indent=2)
+
+        current_app.logger.info("Profil enregistré : %s.prof", name)
+        response.headers["X-Profile-File"] = name + ".prof"
+        return response
+
+    @app.teardown_request
+    def _discard_profiler(exc):
+        # La vue a levé une exception : after_request n'a pas été appelé
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
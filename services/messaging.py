@@ -2,7 +2,7 @@
 Services pour l'envoi de correspondance parent (Email, SMS, WhatsApp)
 """
 
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from models import db, MessageLog, Parent, Student, Assessment
 import smtplib
 from email.mime.text import MIMEText
@@ -30,149 +30,84 @@ class ParentMessagingService:
     """Service centralisé pour l'envoi de messages aux parents"""
     
     @staticmethod
-    def send_daily_notes(class_id, subject, note_date):
+    def queue_daily_notes(class_id, subject, note_date):
         """
-        Envoie un résumé des notes de la journée à tous les parents concernés
+        Met en file (MessageLog 'queued') un résumé des notes de la journée pour
+        chaque parent concerné, sans rien envoyer : l'envoi est fait par le
+        worker ``flask dispatch-messages``. Le commit est laissé à l'appelant.
         """
-        # Récupérer les notes du jour pour cette classe et matière
-        from models import Classe
-        assessments = Assessment.query.join(Student).filter(
-            Student.class_id == class_id,
-            Assessment.subject == subject,
-            Assessment.date == note_date
-        ).all()
-        
-        if not assessments:
-            return 0
-        
+        from sqlalchemy.orm import selectinload
+        assessments = (
+            Assessment.query.join(Student)
+            .filter(
+                Student.class_id == class_id,
+                Assessment.subject == subject,
+                Assessment.date == note_date
+            )
+            .options(selectinload(Assessment.student).selectinload(Student.parents))
+            .all()
+        )
+
         # Grouper par parent unique
         parents_notes = {}
         for assessment in assessments:
             for parent in assessment.student.parents:
-                if parent.id not in parents_notes:
-                    parents_notes[parent.id] = {
-                        'parent': parent,
-                        'notes': []
-                    }
-                parents_notes[parent.id]['notes'].append(assessment)
-        
-        # Envoyer à chaque parent
-        count = 0
-        for parent_id, data in parents_notes.items():
-            parent = data['parent']
-            notes = data['notes']
-            
-            # Génération du message
-            message_content = ParentMessagingService._generate_daily_message(notes, subject, note_date)
-            
-            # Enregistrement dans MessageLog
-            msg_log = MessageLog(
-                parent_id=parent.id,
+                parents_notes.setdefault(parent.id, []).append(assessment)
+
+        logs = []
+        for parent_id, notes in parents_notes.items():
+            logs.append(MessageLog(
+                parent_id=parent_id,
                 template_name='daily_notes',
-                content=message_content,
+                content=ParentMessagingService._generate_daily_message(notes, subject, note_date),
                 status='queued'
-            )
-            db.session.add(msg_log)
-            
-            # Tentative d'envoi
-            success = False
-
-            # Email (optionnel)
-            if parent.phone_e164:
-                try:
-                    ParentMessagingService._send_email(parent, message_content, subject, note_date)
-                    msg_log.status = 'sent_email'
-                    msg_log.sent_at = datetime.utcnow()
-                    success = True
-                except Exception as e:
-                    print(f"Erreur Email {parent.id}: {str(e)}")
-                    msg_log.status = 'failed_email'
-                    msg_log.last_error = str(e)
-
-            # WhatsApp via Twilio / pywhatkit
-            if parent.whatsapp_optin and parent.phone_e164:
-                try:
-                    ok, info = ParentMessagingService._send_whatsapp(parent, message_content)
-                    msg_log.attempts = (msg_log.attempts or 0) + 1
-                    if ok:
-                        # info may contain Twilio SID
-                        msg_log.status = 'sent_whatsapp'
-                        if info:
-                            msg_log.twilio_sid = info
-                        msg_log.sent_at = datetime.utcnow()
-                        success = True
-                    else:
-                        msg_log.status = 'failed_whatsapp'
-                        msg_log.last_error = str(info)
-                except Exception as e:
-                    print(f"Erreur WhatsApp {parent.id}: {str(e)}")
-                    msg_log.attempts = (msg_log.attempts or 0) + 1
-                    msg_log.status = 'failed_whatsapp'
-                    msg_log.last_error = str(e)
+            ))
+        db.session.add_all(logs)
+        return logs
 
-            db.session.commit()
-            if success:
-                count += 1
-        
-        return count
-    
     @staticmethod
-    def send_individual_note(student, assessment):
+    def queue_individual_note(student, assessment):
         """
-        Envoie la notification d'une note individuelle aux parents
+        Met en file la notification d'une note individuelle pour chaque parent
+        de l'élève (commit laissé à l'appelant).
         """
-        parents = student.parents
-        if not parents:
-            return 0
-        
+        if not student.parents:
+            return []
+
         message_content = ParentMessagingService._generate_individual_message(student, assessment)
-        
-        count = 0
-        for parent in parents:
-            msg_log = MessageLog(
+        logs = [
+            MessageLog(
                 parent_id=parent.id,
                 student_id=student.id,
                 template_name='individual_note',
                 content=message_content,
                 status='queued'
             )
-            db.session.add(msg_log)
-            
-            # Tentative d'envoi
-            try:
-                ParentMessagingService._send_email(parent, message_content, assessment.subject)
-                msg_log.status = 'sent_email'
-                msg_log.sent_at = datetime.utcnow()
-                count += 1
-            except Exception as e:
-                msg_log.status = 'failed'
-                msg_log.last_error = str(e)
-                print(f"Erreur envoi {parent.id}: {str(e)}")
-
-            # Essayer WhatsApp aussi si opt-in
-            if parent.whatsapp_optin and parent.phone_e164:
-                try:
-                    ok, info = ParentMessagingService._send_whatsapp(parent, message_content)
-                    msg_log.attempts = (msg_log.attempts or 0) + 1
-                    if ok:
-                        msg_log.status = 'sent_whatsapp'
-                        if info:
-                            msg_log.twilio_sid = info
-                        msg_log.sent_at = datetime.utcnow()
-                        count += 1
-                    else:
-                        msg_log.status = 'failed_whatsapp'
-                        msg_log.last_error = str(info)
-                except Exception as e:
-                    msg_log.attempts = (msg_log.attempts or 0) + 1
-                    msg_log.status = 'failed_whatsapp'
-                    msg_log.last_error = str(e)
-                    print(f"Erreur WhatsApp envoi {parent.id}: {str(e)}")
+            for parent in student.parents
+        ]
+        db.session.add_all(logs)
+        return logs
+
+    @staticmethod
+    def send_daily_notes(class_id, subject, note_date):
+        """
+        Envoie immédiatement le résumé des notes de la journée (scripts et
+        tests) ; les routes passent par ``queue_daily_notes``.
+        """
+        logs = ParentMessagingService.queue_daily_notes(class_id, subject, note_date)
+        db.session.commit()
+        return BulkMessageProcessor.deliver(logs)
+
+    @staticmethod
+    def send_individual_note(student, assessment):
+        """
+        Envoie immédiatement la notification d'une note individuelle (scripts
+        et tests) ; les routes passent par ``queue_individual_note``.
+        """
+        logs = ParentMessagingService.queue_individual_note(student, assessment)
+        db.session.commit()
+        return BulkMessageProcessor.deliver(logs)
 
-            db.session.commit()
-        
-        return count
-    
     @staticmethod
     def _generate_daily_message(assessments, subject, note_date):
         """
@@ -344,52 +279,152 @@ Pour plus de détails, consultez votre portail élève.
 
 
 class BulkMessageProcessor:
-    """Classe pour traiter les messages en attente et les envoyer en batch"""
-    
+    """
+    Envoi des messages en file dans MessageLog, hors des requêtes HTTP
+    (commande ``flask dispatch-messages``).
+
+    Statuts : 'queued' (à envoyer) -> 'sending' (réservé par un worker) ->
+    'sent_email' / 'sent_whatsapp' / 'failed_email' / 'failed_whatsapp', ou
+    'skipped' si le parent n'a aucun canal. Les échecs WhatsApp sont retentés
+    jusqu'à ``max_attempts`` essais. Un message resté 'sending' plus de
+    ``claim_timeout`` secondes (worker arrêté en plein envoi) est repris, et
+    cette reprise compte comme un essai.
+    """
+
+    CLAIM_TIMEOUT = 300
+
+    EMAIL_SUBJECTS = {
+        'daily_notes': "Notes du jour",
+        'individual_note': "Nouvelle note",
+    }
+
+    @staticmethod
+    def pending_query(max_attempts=3, claim_timeout=None):
+        """Messages à (re)tenter, les plus anciens d'abord, y compris les réservations abandonnées."""
+        from sqlalchemy import and_, or_
+        timeout = BulkMessageProcessor.CLAIM_TIMEOUT if claim_timeout is None else claim_timeout
+        stale = datetime.utcnow() - timedelta(seconds=timeout)
+        return (
+            MessageLog.query
+            .filter(or_(
+                MessageLog.status == 'queued',
+                MessageLog.status == 'failed_whatsapp',
+                and_(MessageLog.status == 'sending',
+                     or_(MessageLog.claimed_at.is_(None), MessageLog.claimed_at < stale)),
+            ))
+            .filter(or_(MessageLog.attempts.is_(None), MessageLog.attempts < max_attempts))
+            .order_by(MessageLog.id)
+        )
+
     @staticmethod
-    def process_pending_messages():
+    def claim(msg_log):
         """
-        Traite tous les messages en attente dans MessageLog
-        Peut être exécuté en tant que tâche cron
+        Réserve un message pour ce worker : UPDATE conditionnel sur le statut
+        (et la date de réservation) lus, de sorte que deux workers n'envoient
+        jamais le même message. Retourne le statut d'origine, ou None si un
+        autre worker l'a pris.
         """
-        # Traiter les messages en file d'attente ou échecs WhatsApp avec retry
-        from sqlalchemy import or_
-        pending = MessageLog.query.filter(or_(MessageLog.status == 'queued', MessageLog.status == 'failed_whatsapp')).all()
+        previous = msg_log.status
+        values = {MessageLog.status: 'sending', MessageLog.claimed_at: datetime.utcnow()}
+        query = MessageLog.query.filter(MessageLog.id == msg_log.id, MessageLog.status == previous)
+        if previous == 'sending':
+            # Reprise d'une réservation abandonnée : compte comme un essai
+            query = query.filter(MessageLog.claimed_at.is_(None) if msg_log.claimed_at is None
+                                 else MessageLog.claimed_at == msg_log.claimed_at)
+            values[MessageLog.attempts] = (msg_log.attempts or 0) + 1
+        claimed = query.update(values, synchronize_session=False)
+        db.session.commit()
+        return previous if claimed else None
+
+    @staticmethod
+    def _deliver_one(msg_log, parent, retry_only_whatsapp=False):
+        """Tente l'envoi d'un message ; retourne True si un canal a abouti."""
+        success = False
+        tried = False
 
-        max_attempts = 3
-        processed = 0
-        for msg_log in pending:
+        # Email : toujours pour une note individuelle, si un numéro est connu pour le résumé du jour
+        if not retry_only_whatsapp and (msg_log.template_name != 'daily_notes' or parent.phone_e164):
+            tried = True
+            subject = BulkMessageProcessor.EMAIL_SUBJECTS.get(msg_log.template_name, "Notes de l'élève")
             try:
-                if not msg_log.parent_id:
-                    continue
+                ParentMessagingService._send_email(parent, msg_log.content, subject)
+                msg_log.status = 'sent_email'
+                msg_log.sent_at = datetime.utcnow()
+                success = True
+            except Exception as e:
+                print(f"Erreur Email {parent.id}: {str(e)}")
+                msg_log.status = 'failed_email'
+                msg_log.last_error = str(e)
 
-                parent = Parent.query.get(msg_log.parent_id)
-                if not parent:
-                    continue
+        # WhatsApp via Twilio / pywhatkit si opt-in
+        if parent.whatsapp_optin and parent.phone_e164:
+            tried = True
+            msg_log.attempts = (msg_log.attempts or 0) + 1
+            try:
+                ok, info = ParentMessagingService._send_whatsapp(parent, msg_log.content)
+                if ok:
+                    msg_log.status = 'sent_whatsapp'
+                    if info:
+                        msg_log.twilio_sid = info
+                    msg_log.sent_at = datetime.utcnow()
+                    success = True
+                else:
+                    msg_log.status = 'failed_whatsapp'
+                    msg_log.last_error = str(info)
+            except Exception as e:
+                print(f"Erreur WhatsApp {parent.id}: {str(e)}")
+                msg_log.status = 'failed_whatsapp'
+                msg_log.last_error = str(e)
 
-                # Ne pas dépasser le nombre d'essais
-                attempts = msg_log.attempts or 0
-                if attempts >= max_attempts:
-                    continue
+        if not tried:
+            msg_log.status = 'skipped'
+            msg_log.last_error = 'no_channel'
+        return success
 
-                # Essayer l'envoi WhatsApp si opt-in
-                if parent.whatsapp_optin and parent.phone_e164:
-                    ok, info = ParentMessagingService._send_whatsapp(parent, msg_log.content)
-                    msg_log.attempts = attempts + 1
-                    if ok:
-                        msg_log.status = 'sent_whatsapp'
-                        if info:
-                            msg_log.twilio_sid = info
-                        msg_log.sent_at = datetime.utcnow()
-                        processed += 1
-                    else:
-                        msg_log.status = 'failed_whatsapp'
-                        msg_log.last_error = str(info)
+    @staticmethod
+    def deliver(logs, claim=False):
+        """
+        Envoie une liste de MessageLog, avec un commit par message : un arrêt
+        du worker ne fait perdre ni renvoyer que le message en cours.
+        Retourne le nombre de messages envoyés.
+        """
+        parent_ids = {log.parent_id for log in logs if log.parent_id}
+        parents = {p.id: p for p in Parent.query.filter(Parent.id.in_(parent_ids))} if parent_ids else {}
 
+        sent = 0
+        for msg_log in logs:
+            parent = parents.get(msg_log.parent_id)
+            if parent is None:
+                # Parent supprimé : ne plus reprendre ce message à chaque passage
+                msg_log.status = 'skipped'
+                msg_log.last_error = 'no_parent'
+                db.session.commit()
+                continue
+            previous = msg_log.status
+            if claim:
+                previous = BulkMessageProcessor.claim(msg_log)
+                if previous is None:
+                    continue
+            try:
+                if BulkMessageProcessor._deliver_one(msg_log, parent,
+                                                     retry_only_whatsapp=previous == 'failed_whatsapp'):
+                    sent += 1
             except Exception as e:
                 msg_log.attempts = (msg_log.attempts or 0) + 1
+                msg_log.status = 'queued' if previous == 'sending' else previous
                 msg_log.last_error = str(e)
                 print(f"Erreur traitement message {msg_log.id}: {str(e)}")
+            db.session.commit()
+        return sent
 
-        db.session.commit()
-        return processed
+    @staticmethod
+    def process_pending_messages(batch_size=None, max_attempts=3, claim_timeout=None):
+        """
+        Traite les messages en attente dans MessageLog (un lot de ``batch_size``
+        au plus, tous par défaut). Appelé en boucle par ``flask dispatch-messages``
+        ou par une tâche cron.
+        """
+        query = BulkMessageProcessor.pending_query(max_attempts, claim_timeout)
+        if batch_size:
+            query = query.limit(batch_size)
+        return BulkMessageProcessor.deliver(query.all(), claim=True)
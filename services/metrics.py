@@ -0,0 +1,267 @@
+"""
+Métriques Prometheus exposées sur ``/metrics``.
+
+Chaque worker gunicorn accumule ses compteurs et histogrammes en mémoire et les
+recopie régulièrement (``METRICS_FLUSH_SECONDS``) dans un fichier JSON propre à
+son pid, dans ``METRICS_DIR``. Au scrape, le worker qui répond additionne ces
+fichiers et ses propres valeurs : la réponse couvre tous les workers, y compris
+ceux qui ont été recyclés depuis le démarrage du maître (qui vide le dossier).
+
+Les jauges (profondeur de la file MessageLog) sont calculées au moment du scrape.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+from flask import Response, abort, current_app, g, request
+from sqlalchemy import func
+
+from services.instrumentation import request_query_stats
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXPORT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# nom -> (type, aide)
+METRICS_HELP = {
+    "app_http_requests_total": ("counter", "Requêtes HTTP traitées"),
+    "app_http_request_duration_seconds": ("histogram", "Durée des requêtes HTTP"),
+    "app_db_queries_total": ("counter", "Requêtes SQL exécutées pendant les requêtes HTTP"),
+    "app_db_query_seconds_total": ("counter", "Temps passé dans les requêtes SQL"),
+    "app_export_duration_seconds": ("histogram", "Durée de génération des exports"),
+    "app_message_queue_depth": ("gauge", "Messages MessageLog par statut"),
+}
+
+FILE_PREFIX = "metrics_"
+
+
+class MetricsStore:
+    """Compteurs et histogrammes d'un processus, sérialisables en JSON."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.directory = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+            self.last_flush = time.monotonic()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, labels, value=1.0):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = self._key(name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {
+                    "buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0,
+                }
+            for i, bound in enumerate(hist["buckets"]):
+                if value <= bound:
+                    hist["counts"][i] += 1
+                    break
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, list(labels), dict(hist, counts=list(hist["counts"]))]
+                               for (name, labels), hist in self.histograms.items()],
+            }
+
+    # ---- stockage partagé entre workers ----
+    def path(self, pid=None):
+        return os.path.join(self.directory, f"{FILE_PREFIX}{pid or os.getpid()}.json")
+
+    def flush(self):
+        """Écrit l'instantané du processus (écriture atomique via os.replace)."""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        data = self.snapshot()
+        tmp = self.path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path())
+        self.last_flush = time.monotonic()
+
+    def maybe_flush(self, interval):
+        if self.directory and time.monotonic() - self.last_flush >= interval:
+            self.flush()
+
+    def collect(self):
+        """Agrège ce processus et les fichiers des autres workers."""
+        snapshots = [self.snapshot()]
+        if self.directory and os.path.isdir(self.directory):
+            own = os.path.basename(self.path())
+            for filename in sorted(os.listdir(self.directory)):
+                if not filename.startswith(FILE_PREFIX) or not filename.endswith(".json") or filename == own:
+                    continue
+                try:
+                    with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # fichier en cours de remplacement ou corrompu
+        return merge_snapshots(snapshots)
+
+
+def merge_snapshots(snapshots):
+    counters, histograms = {}, {}
+    for snap in snapshots:
+        for name, labels, value in snap.get("counters", []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0.0) + value
+        for name, labels, hist in snap.get("histograms", []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = dict(hist, counts=list(hist["counts"]))
+                continue
+            if merged["buckets"] != hist["buckets"]:
+                continue  # bornes modifiées entre deux versions : ancien fichier ignoré
+            merged["counts"] = [a + b for a, b in zip(merged["counts"], hist["counts"])]
+            merged["sum"] += hist["sum"]
+            merged["count"] += hist["count"]
+    return counters, histograms
+
+
+METRICS = MetricsStore()
+
+
+def clear_metrics_dir(directory):
+    """Supprime les fichiers d'un démarrage précédent (hook on_starting du maître)."""
+    if not directory or not os.path.isdir(directory):
+        return
+    for filename in os.listdir(directory):
+        if filename.startswith(FILE_PREFIX):
+            os.remove(os.path.join(directory, filename))
+
+
+def metrics_dir(app):
+    """METRICS_DIR, ou instance/metrics ; en test, agrégation en mémoire uniquement."""
+    directory = app.config.get("METRICS_DIR")
+    if directory:
+        return directory
+    return None if app.testing else os.path.join(app.instance_path, "metrics")
+
+
+def observe_export(fmt, seconds):
+    METRICS.observe("app_export_duration_seconds", {"format": fmt}, seconds, EXPORT_BUCKETS)
+
+
+# --------------------------------------------------------
+# FORMAT TEXTE PROMETHEUS
+# --------------------------------------------------------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_prometheus(counters, histograms, gauges=()):
+    """Texte d'exposition Prometheus (version 0.0.4)."""
+    series = {}
+    for (name, labels), value in sorted(counters.items()):
+        series.setdefault(name, []).append(f"{name}{_labels(labels)} {_number(value)}")
+    for (name, labels), hist in sorted(histograms.items(), key=lambda item: item[0]):
+        lines = series.setdefault(name, [])
+        cumulative = 0
+        for bound, count in zip(hist["buckets"], hist["counts"]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(labels, [('le', _number(bound))])} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {hist['count']}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(hist['sum'])}")
+        lines.append(f"{name}_count{_labels(labels)} {hist['count']}")
+    for name, labels, value in gauges:
+        series.setdefault(name, []).append(f"{name}{_labels(labels)} {_number(value)}")
+
+    out = []
+    for name in sorted(series):
+        kind, help_text = METRICS_HELP.get(name, ("untyped", name))
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(series[name])
+    return "\n".join(out) + "\n"
+
+
+def _queue_gauges():
+    from models import db, MessageLog
+    rows = db.session.query(MessageLog.status, func.count(MessageLog.id)).group_by(MessageLog.status)
+    return [("app_message_queue_depth", [("status", status or "unknown")], count) for status, count in rows]
+
+
+# --------------------------------------------------------
+# BRANCHEMENT FLASK
+# --------------------------------------------------------
+def init_metrics(app):
+    """Hooks de mesure des requêtes + route ``/metrics``."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    METRICS.directory = metrics_dir(app)
+    interval = float(app.config.get("METRICS_FLUSH_SECONDS", 5))
+
+    @app.before_request
+    def _start_metrics_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+
+        endpoint = request.endpoint or "unmatched"  # évite une série par URL inconnue
+        status = str(response.status_code)
+        METRICS.inc("app_http_requests_total", {"endpoint": endpoint, "method": request.method, "status": status})
+        METRICS.observe("app_http_request_duration_seconds", {"endpoint": endpoint, "status": status},
+                        time.perf_counter() - started)
+
+        query_count, query_time = request_query_stats()
+        if query_count:
+            METRICS.inc("app_db_queries_total", {"endpoint": endpoint}, query_count)
+            METRICS.inc("app_db_query_seconds_total", {"endpoint": endpoint}, query_time)
+
+        METRICS.maybe_flush(interval)
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        token = current_app.config.get("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            abort(401)
+
+        METRICS.flush()
+        counters, histograms = METRICS.collect()
+        body = render_prometheus(counters, histograms, _queue_gauges())
+        return Response(body, mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+    if not getattr(METRICS, "atexit_registered", False):
+        atexit.register(METRICS.flush)
+        METRICS.atexit_registered = True
@@ -0,0 +1,171 @@
+"""
+Cache des données de référence (classes, matières, année scolaire active).
+
+Ces petites tables sont relues par presque chaque page alors qu'elles changent
+rarement. Les valeurs sont gardées en mémoire du processus pendant
+``REFERENCE_CACHE_TTL`` secondes (0 = cache désactivé) et invalidées dès qu'un
+commit de ce processus touche une classe, une année scolaire ou la matière
+d'une note (événements de session ``after_flush`` puis ``after_commit``).
+Les autres workers voient le changement au plus tard à l'expiration du TTL.
+
+Les entrées sont des valeurs simples (tuples nommés, chaînes), jamais des
+objets ORM : elles ne dépendent d'aucune session.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, Assessment, Classe, SchoolYear
+
+
+ClassRef = namedtuple("ClassRef", ["id", "name"])
+
+# Modèle -> entrées du cache à invalider quand il change
+INVALIDATED_BY = {
+    Classe: ("classes",),
+    SchoolYear: ("active_year",),
+    Assessment: ("subjects",),
+}
+
+
+class ReferenceCache:
+    """Valeurs chargées à la demande, avec date d'expiration, par application."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, name, loader, ttl):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+        value = loader()
+        if ttl > 0:
+            with self.lock:
+                self.entries[name] = (value, now + ttl)
+        return value
+
+    def peek(self, name):
+        with self.lock:
+            entry = self.entries.get(name)
+        return entry[0] if entry is not None and entry[1] > time.monotonic() else None
+
+    def invalidate(self, *names):
+        with self.lock:
+            if not names:
+                self.entries.clear()
+            for name in names:
+                self.entries.pop(name, None)
+
+
+def _cache():
+    return current_app.extensions.get("reference_cache")
+
+
+def _cached(name, loader):
+    cache = _cache()
+    if cache is None:
+        return loader()
+    return cache.get(name, loader, current_app.config.get("REFERENCE_CACHE_TTL", 300))
+
+
+def invalidate_reference_data(*names):
+    """Vide les entrées nommées (toutes si aucun nom) du cache de l'application courante."""
+    if has_app_context() and _cache() is not None:
+        _cache().invalidate(*names)
+
+
+# --------------------------------------------------------
+# DONNÉES SERVIES
+# --------------------------------------------------------
+def get_classes():
+    """Classes triées par nom (ClassRef : id, name)."""
+    return _cached("classes", lambda: [
+        ClassRef(id, name) for id, name in db.session.query(Classe.id, Classe.name).order_by(Classe.name)
+    ])
+
+
+def class_choices():
+    """Choix (id, nom) pour les SelectField de classe."""
+    return [(c.id, c.name) for c in get_classes()]
+
+
+def get_subjects():
+    """Matières ayant au moins une note, triées."""
+    return _cached("subjects", lambda: [
+        subject for (subject,) in db.session.query(Assessment.subject).distinct().order_by(Assessment.subject)
+        if subject
+    ])
+
+
+def get_active_year():
+    """Libellé de l'année scolaire active, ou None."""
+    return _cached("active_year", lambda: db.session.query(SchoolYear.year).filter_by(active=True).scalar())
+
+
+# --------------------------------------------------------
+# INVALIDATION SUR COMMIT
+# --------------------------------------------------------
+def mark_reference_dirty(session, *names):
+    """À appeler après une écriture Core (invisible pour les événements ORM)."""
+    session.info.setdefault("reference_dirty", set()).update(names)
+
+
+def _changed_entries(session):
+    dirty = set()
+    subjects = None
+    for obj in list(session.new) + list(session.deleted) + list(session.dirty):
+        names = INVALIDATED_BY.get(type(obj))
+        if not names:
+            continue
+        if isinstance(obj, Assessment):
+            # Nouvelle note dans une matière déjà connue : la liste ne change pas
+            if obj in session.new:
+                if subjects is None:
+                    subjects = _cache().peek("subjects") if has_app_context() and _cache() else None
+                if subjects is not None and obj.subject in subjects:
+                    continue
+            elif obj in session.dirty and not db.inspect(obj).attrs.subject.history.has_changes():
+                continue
+        dirty.update(names)
+    return dirty
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_reference_changes(session, flush_context):
+    dirty = _changed_entries(session)
+    if dirty:
+        mark_reference_dirty(session, *dirty)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changes(orm_execute_state):
+    # query.update() / query.delete() en masse (ex: désactivation des années scolaires)
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        names = INVALIDATED_BY.get(mapper.class_) if mapper is not None else None
+        if names:
+            mark_reference_dirty(orm_execute_state.session, *names)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    dirty = session.info.pop("reference_dirty", None)
+    if dirty:
+        invalidate_reference_data(*dirty)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("reference_dirty", None)
+
+
+def init_reference_cache(app):
+    app.extensions["reference_cache"] = ReferenceCache()
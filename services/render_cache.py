@@ -0,0 +1,160 @@
+"""
+Cache des pages calculées (bulletin, statistiques de classe).
+
+La clé est une empreinte des données affichées, pas une durée de vie :
+``assessments_version`` lit en deux requêtes le plus grand id, le nombre et la
+dernière date de création des notes du périmètre (classe ou élève, trimestre),
+ainsi que les compteurs d'écritures de ``stats_counters`` (toute insertion,
+modification ou suppression de note du trimestre, d'élève ou de classe les
+incrémente).
+Une écriture change donc la clé : l'ancienne entrée n'est plus jamais servie
+et sort du cache LRU (``RENDER_CACHE_SIZE`` entrées par processus).
+
+Seul le fragment propre à la page est mis en cache ; l'habillage (menu,
+utilisateur, messages flash) est rendu à chaque requête. L'ETag inclut
+l'utilisateur, et une requête dont l'ETag correspond reçoit un 304 sans rendu.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+
+from flask import current_app, jsonify, make_response, render_template, request, session
+from flask_login import current_user
+from markupsafe import Markup
+from sqlalchemy import func
+
+from models import db, Assessment, Student
+from services.stats import CLASS_WRITES, STUDENT_WRITES, TOUCHED_SUFFIX, read_counters, touched_key, write_key
+
+
+PageVersion = namedtuple("PageVersion", ["token", "last_modified", "count"])
+
+
+class RenderCache:
+    """LRU borné de fragments HTML, partagé par les threads d'un processus."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def init_render_cache(app):
+    app.extensions["render_cache"] = RenderCache(app.config.get("RENDER_CACHE_SIZE", 256))
+
+
+def _utc(value):
+    if value is None:
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def assessments_version(term, class_id=None, student_id=None):
+    """
+    Version des notes d'une classe, d'un seul élève ou de tout l'établissement
+    (ni l'un ni l'autre) pour un trimestre ou une liste de trimestres.
+    """
+    from services.grading import grading_weights
+
+    terms = list(term) if isinstance(term, (list, tuple)) else [term]
+    query = db.session.query(func.max(Assessment.id), func.count(Assessment.id), func.max(Assessment.created_at))
+    if class_id is not None:
+        query = query.join(Student, Student.id == Assessment.student_id).filter(Student.class_id == class_id)
+    elif student_id is not None:
+        query = query.filter(Assessment.student_id == student_id)
+    # ni classe ni élève : tout l'établissement
+    max_id, count, last_created = query.filter(Assessment.term.in_(terms)).one()
+
+    class_touched = CLASS_WRITES + TOUCHED_SUFFIX
+    counters = read_counters([write_key(t) for t in terms] + [touched_key(t) for t in terms]
+                             + [STUDENT_WRITES, touched_key(None), CLASS_WRITES, class_touched])
+    touched = max([counters[touched_key(t)] for t in terms + [None]] + [counters[class_touched]])
+    candidates = [_utc(last_created)]
+    if touched:
+        candidates.append(datetime.fromtimestamp(touched, timezone.utc))
+    last_modified = max((c for c in candidates if c is not None), default=None)
+
+    parts = (terms, class_id, student_id, max_id, count, last_created,
+             [counters[write_key(t)] for t in terms], counters[STUDENT_WRITES], counters[CLASS_WRITES],
+             [sorted(w.items()) for w in grading_weights()])
+    token = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return PageVersion(token, last_modified, count)
+
+
+def cached_value(name, version, compute):
+    """Valeur calculée pour une version des données (partagée par la page HTML et sa variante JSON)."""
+    cache = current_app.extensions.get("render_cache")
+    key = ("value", name, version.token)
+    value = cache.get(key) if cache is not None else None
+    if value is None:
+        value = compute()
+        if cache is not None:
+            cache.set(key, value)
+    return value
+
+
+def conditional_json(data, version, name):
+    """Réponse JSON avec ETag / Last-Modified (304 si inchangée)."""
+    response = jsonify(data)
+    response.set_etag(hashlib.sha1(f"{name}:{version.token}".encode("utf-8")).hexdigest())
+    if version.last_modified is not None:
+        response.last_modified = version.last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def cached_page(name, version, render_fragment, template, **context):
+    """
+    Réponse HTML d'une page dont le contenu ne dépend que de ``version`` :
+    304 si le navigateur a déjà cette version, sinon fragment lu dans le cache
+    (ou rendu par ``render_fragment()``) puis inséré dans ``template``.
+    """
+    user = getattr(current_user, "id", None)
+    etag = hashlib.sha1(f"{name}:{version.token}:{user}".encode("utf-8")).hexdigest()
+    # Message flash en attente : la page doit être rendue pour l'afficher
+    has_flashes = bool(session.get("_flashes"))
+
+    if not has_flashes and request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        cache = current_app.extensions.get("render_cache")
+        key = (name, version.token)
+        fragment = cache.get(key) if cache is not None else None
+        if fragment is None:
+            fragment = render_fragment()
+            if cache is not None:
+                cache.set(key, fragment)
+        response = make_response(render_template(template, content=Markup(fragment), **context))
+
+    response.set_etag(etag)
+    if version.last_modified is not None:
+        response.last_modified = version.last_modified
+    # Page privée, toujours revalidée (304 tant que les notes n'ont pas changé)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    if response.status_code == 200 and not has_flashes:
+        response.make_conditional(request)
+    return response
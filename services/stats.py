@@ -0,0 +1,256 @@
+"""
+Compteurs des tuiles de tableau de bord (table ``stats_counters``).
+
+Les insertions et suppressions d'élèves, de classes et de notes passées par
+l'ORM sont relevées par les événements de mapper (``after_insert``,
+``after_delete``, ``after_update``) puis appliquées en une fois à la fin du
+flush, dans la même transaction : les compteurs ne peuvent pas diverger d'un
+commit ou d'un rollback.
+
+Les écritures Core (insertions en masse) doivent appeler ``apply_counter_deltas``
+elles-mêmes ; ``rebuild_counters`` (commande ``flask rebuild-stats``) recalcule
+tout depuis les tables.
+"""
+
+import time
+from collections import Counter
+from datetime import date
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from models import db, Assessment, Classe, Student, StatsCounter
+
+
+SUBJECT_PREFIX = "assessments:subject:"
+DATE_PREFIX = "assessments:date:"
+# Écritures (insertion, modification, suppression) : version des pages en cache
+WRITES_PREFIX = "assessments:writes:term:"
+STUDENT_WRITES = "students:writes"
+CLASS_WRITES = "classes:writes"
+# Date (epoch) de la dernière écriture, mise à jour avec le compteur correspondant
+TOUCHED_SUFFIX = ":touched"
+
+
+def date_key(day):
+    return f"{DATE_PREFIX}{day.isoformat()}"
+
+
+def subject_key(subject):
+    return f"{SUBJECT_PREFIX}{subject}"
+
+
+def write_key(term):
+    return f"{WRITES_PREFIX}{term}"
+
+
+def touched_key(term):
+    """Dernière écriture de notes du trimestre (ou d'élèves si term est None)."""
+    return (write_key(term) if term is not None else STUDENT_WRITES) + TOUCHED_SUFFIX
+
+
+def write_deltas(rows):
+    """Compteurs d'écritures pour des notes (objets ou dicts) écrites."""
+    deltas = Counter()
+    for row in rows:
+        term = row.get("term") if isinstance(row, dict) else row.term
+        deltas[write_key(term)] += 1
+    return deltas
+
+
+def assessment_deltas(rows, sign=1):
+    """Variations de compteurs pour des notes (objets ou dicts) ajoutées (+1) ou retirées (-1)."""
+    deltas = Counter()
+    for row in rows:
+        get = row.get if isinstance(row, dict) else lambda col, row=row: getattr(row, col)
+        deltas["assessments"] += sign
+        if get("date"):
+            deltas[date_key(get("date"))] += sign
+        if get("subject"):
+            deltas[subject_key(get("subject"))] += sign
+    return deltas
+
+
+# --------------------------------------------------------
+# ÉCRITURE DES COMPTEURS
+# --------------------------------------------------------
+def _upsert(connection, values, increment=True):
+    """INSERT ... ON CONFLICT (name) DO UPDATE, ajout ou remplacement de la valeur."""
+    from services.assessments import _insert_for_dialect
+
+    table = StatsCounter.__table__
+    rows = [{"name": name, "value": value} for name, value in values.items()]
+    insert = _insert_for_dialect(connection.dialect.name)
+    if insert is not None:
+        # Par lots : limite du nombre de paramètres par requête (SQLite)
+        for start in range(0, len(rows), 500):
+            stmt = insert(table).values(rows[start:start + 500])
+            new_value = table.c.value + stmt.excluded.value if increment else stmt.excluded.value
+            connection.execute(stmt.on_conflict_do_update(index_elements=["name"], set_={"value": new_value}))
+        return
+
+    # Autres moteurs : UPDATE puis INSERT des compteurs absents
+    for row in rows:
+        new_value = table.c.value + row["value"] if increment else row["value"]
+        result = connection.execute(table.update().where(table.c.name == row["name"]).values(value=new_value))
+        if not result.rowcount:
+            connection.execute(table.insert().values(row))
+
+
+def apply_counter_deltas(connection, deltas):
+    """Applique des variations {nom: delta} sur la connexion (donc la transaction) donnée."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    _upsert(connection, deltas)
+
+    touched = {name + TOUCHED_SUFFIX: int(time.time()) for name in deltas
+               if name.startswith(WRITES_PREFIX) or name in (STUDENT_WRITES, CLASS_WRITES)}
+    if touched:
+        _upsert(connection, touched, increment=False)
+
+    # Nombre de matières distinctes : recalculé sur la table des compteurs (quelques lignes)
+    if any(name.startswith(SUBJECT_PREFIX) for name in deltas):
+        table = StatsCounter.__table__
+        subjects = connection.execute(
+            db.select(func.count()).select_from(table)
+            .where(table.c.name.like(f"{SUBJECT_PREFIX}%"), table.c.value > 0)
+        ).scalar()
+        _upsert(connection, {"subjects": subjects}, increment=False)
+
+
+def rebuild_counters():
+    """Recalcule les compteurs dérivés des tables (dans la transaction courante)."""
+    values = {
+        "students": Student.query.count(),
+        "classes": Classe.query.count(),
+        "assessments": Assessment.query.count(),
+    }
+    for day, count in db.session.query(Assessment.date, func.count(Assessment.id)).group_by(Assessment.date):
+        values[date_key(day)] = count
+    for subject, count in db.session.query(Assessment.subject, func.count(Assessment.id)).group_by(Assessment.subject):
+        if subject:
+            values[subject_key(subject)] = count
+    values["subjects"] = sum(1 for name in values if name.startswith(SUBJECT_PREFIX))
+
+    # Les compteurs d'écritures ne se déduisent pas des tables : conservés (versions des pages en cache)
+    db.session.execute(db.delete(StatsCounter).where(
+        ~StatsCounter.name.startswith(WRITES_PREFIX), ~StatsCounter.name.startswith(STUDENT_WRITES),
+        ~StatsCounter.name.startswith(CLASS_WRITES)
+    ))
+    _upsert(db.session.connection(), values, increment=False)
+    return values
+
+
+def read_counters(names):
+    """Valeurs des compteurs demandés en une lecture par clé primaire (0 si absent)."""
+    names = list(names)
+    found = dict(db.session.query(StatsCounter.name, StatsCounter.value).filter(StatsCounter.name.in_(names)))
+    return {name: found.get(name, 0) for name in names}
+
+
+def dashboard_counters(today=None):
+    """Tuiles des tableaux de bord : élèves, classes, notes, matières, notes du jour."""
+    today_key = date_key(today or date.today())
+    values = read_counters(["students", "classes", "assessments", "subjects", today_key])
+    values["today"] = values.pop(today_key)
+    return values
+
+
+# --------------------------------------------------------
+# ÉVÉNEMENTS ORM
+# --------------------------------------------------------
+def _pending(target):
+    session = inspect(target).session
+    if session is None:
+        return None
+    return session.info.setdefault("stats_deltas", Counter())
+
+
+def _track_insert(key):
+    def listener(mapper, connection, target):
+        pending = _pending(target)
+        if pending is not None:
+            pending[key] += 1
+    return listener
+
+
+def _track_delete(key):
+    def listener(mapper, connection, target):
+        pending = _pending(target)
+        if pending is not None:
+            pending[key] -= 1
+    return listener
+
+
+event.listen(Student, "after_insert", _track_insert("students"))
+event.listen(Student, "after_delete", _track_delete("students"))
+# Toute écriture d'élève (+1) : nom ou classe affichés sur les pages en cache
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Student, _event, _track_insert(STUDENT_WRITES))
+event.listen(Classe, "after_insert", _track_insert("classes"))
+event.listen(Classe, "after_delete", _track_delete("classes"))
+# Toute écriture de classe (+1) : nom de classe affiché sur les pages en cache
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Classe, _event, _track_insert(CLASS_WRITES))
+
+
+@event.listens_for(Assessment, "after_insert")
+def _assessment_inserted(mapper, connection, target):
+    pending = _pending(target)
+    if pending is not None:
+        pending.update(assessment_deltas([target], +1))
+        pending.update(write_deltas([target]))
+
+
+@event.listens_for(Assessment, "after_delete")
+def _assessment_deleted(mapper, connection, target):
+    pending = _pending(target)
+    if pending is not None:
+        pending.update(assessment_deltas([target], -1))
+        pending.update(write_deltas([target]))
+
+
+def _noop_set(target, value, oldvalue, initiator):
+    pass
+
+
+# active_history : l'ancienne valeur est chargée lors d'une affectation, même si
+# l'objet a été expiré par un commit, pour que after_update connaisse l'historique
+event.listen(Assessment.date, "set", _noop_set, active_history=True)
+event.listen(Assessment.subject, "set", _noop_set, active_history=True)
+
+
+@event.listens_for(Assessment, "after_update")
+def _assessment_updated(mapper, connection, target):
+    # Une note déplacée à une autre date ou matière change les compteurs détaillés
+    pending = _pending(target)
+    if pending is None:
+        return
+    state = inspect(target)
+    # Toute modification (note, barème...) change la version du trimestre, et de l'ancien si déplacée
+    terms = {target.term, *state.attrs.term.history.deleted}
+    for term in terms:
+        pending[write_key(term)] += 1
+    for column, make_key in (("date", date_key), ("subject", subject_key)):
+        history = state.attrs[column].history
+        if history.has_changes():
+            for old in history.deleted:
+                if old:
+                    pending[make_key(old)] -= 1
+            for new in history.added:
+                if new:
+                    pending[make_key(new)] += 1
+
+
+@event.listens_for(Session, "before_flush")
+def _reset_pending_deltas(session, flush_context, instances):
+    # Reliquat d'un flush qui a échoué : ne pas l'appliquer au suivant
+    session.info.pop("stats_deltas", None)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_pending_deltas(session, flush_context):
+    deltas = session.info.pop("stats_deltas", None)
+    if deltas:
+        apply_counter_deltas(session.connection(), deltas)
@@ -0,0 +1,47 @@
+"""
+Aides partagées par les tests.
+
+``max_queries`` : context manager qui compte les requêtes SQL exécutées et
+échoue si elles dépassent un budget (détection des N+1).
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def max_queries():
+    """
+    Usage :
+        with max_queries(app, 6) as counter:
+            client.get("/parents/")
+    """
+    @contextmanager
+    def _max_queries(app, limit):
+        from models import db
+        counter = QueryCounter()
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, "before_cursor_execute", counter)
+        assert counter.count <= limit, (
+            f"{counter.count} requêtes SQL (budget {limit}) :\n" + "\n".join(counter.statements)
+        )
+    return _max_queries
@@ -0,0 +1,117 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+from app import create_app
+from models import db, Classe, Student, Assessment
+import numpy as np
+from services.aggregates import aggregate_assessments, score_distributions
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        classes = [Classe(name="6ème"), Classe(name="5ème")]
+        db.session.add_all(classes)
+        db.session.flush()
+        grades = [
+            # (classe, type, score, barème, trimestre)
+            (0, "interrogation", 8, 10, 1),
+            (0, "interrogation", 15, 20, 1),
+            (0, "devoir", 12, 20, 2),
+            (0, "composition", 5, 0, 1),   # barème nul : compte pour 0
+            (1, "interrogation", 20, 20, 1),
+            (1, "devoir", 10, 20, 1),
+        ]
+        for i, (cls, atype, score, max_score, term) in enumerate(grades):
+            student = Student(first_name=f"E{i}", last_name="Test", class_id=classes[cls].id)
+            db.session.add(student)
+            db.session.flush()
+            db.session.add(Assessment(student_id=student.id, subject="Français", assessment_type=atype,
+                                      score=score, max_score=max_score, date=date(2026, 1, 5), term=term))
+        db.session.commit()
+        app.class_ids = [c.id for c in classes]
+        yield app
+
+
+def _python_summary(assessments):
+    summary = {}
+    for a in assessments:
+        summary.setdefault(a.assessment_type, []).append(a.normalized_score(20.0))
+    return {atype: (len(v), sum(v) / len(v)) for atype, v in summary.items()}
+
+
+def test_matches_python_normalized_average(app):
+    result = aggregate_assessments(Assessment.assessment_type)
+    expected = _python_summary(Assessment.query.all())
+
+    assert set(result) == set(expected)
+    for atype, (count, average) in expected.items():
+        assert result[atype]["count"] == count
+        assert result[atype]["average"] == pytest.approx(average)
+    assert result["composition"]["average"] == 0
+
+
+def test_respects_filters_in_one_query(app):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        result = aggregate_assessments(Assessment.assessment_type,
+                                       {"class_id": app.class_ids[0], "term": 1})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1 and "GROUP BY" in statements[0]
+    assert result["interrogation"]["count"] == 2
+    assert result["interrogation"]["average"] == pytest.approx(15.5)
+    assert result["interrogation"]["min"] == pytest.approx(15.0)
+    assert "devoir" not in result
+
+
+def test_multiple_group_columns(app):
+    result = aggregate_assessments([Assessment.assessment_type, Assessment.term])
+    assert result[("devoir", 2)]["count"] == 1
+    assert result[("interrogation", 1)]["count"] == 3
+
+
+def test_score_distributions_per_subject_and_overall(app):
+    student = Student.query.filter_by(class_id=app.class_ids[1]).first()
+    db.session.add(Assessment(student_id=student.id, subject="Mathématique", assessment_type="devoir",
+                              score=30, max_score=20, date=date(2026, 1, 6), term=1))  # bonus > barème
+    db.session.commit()
+
+    per_subject, overall = score_distributions({"class_id": app.class_ids[1], "term": 1})
+
+    french = per_subject["Français"]  # 20 et 10 sur 20
+    assert french["count"] == 2
+    assert french["median"] == pytest.approx(15.0)
+    assert french["std"] == pytest.approx(5.0)
+    assert (french["q1"], french["q3"]) == (pytest.approx(12.5), pytest.approx(17.5))
+    assert french["pass_rate"] == pytest.approx(1.0)
+    assert [b["count"] for b in french["histogram"]] == [0] * 5 + [1] + [0] * 3 + [1]
+
+    assert per_subject["Mathématique"]["histogram"][-1]["count"] == 1
+    assert overall["count"] == 3
+    assert overall["median"] == pytest.approx(np.median([20, 10, 30]))
+
+
+def test_score_distributions_pass_mark_and_empty(app):
+    per_subject, overall = score_distributions({"class_id": app.class_ids[0], "term": 1}, pass_mark=15)
+    # 16, 15 et 0 (barème nul) sur 20
+    assert per_subject["Français"]["pass_rate"] == pytest.approx(2 / 3)
+    assert score_distributions({"class_id": app.class_ids[0], "term": 3}) == ({}, None)
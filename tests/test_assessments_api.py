@@ -0,0 +1,116 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date, timedelta
+
+import pytest
+from app import create_app
+from models import db, Classe, Student, Assessment
+from services.assessments import encode_sort_cursor
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        classes = [Classe(name="6ème"), Classe(name="5ème")]
+        db.session.add_all(classes)
+        db.session.flush()
+        for c, classe in enumerate(classes):
+            student = Student(first_name="Eleve", last_name=f"Nom{c}", class_id=classe.id)
+            db.session.add(student)
+            db.session.flush()
+            for day in range(4):
+                for subject, score in (("Français", 8 + day), ("SVT", 15 - day)):
+                    db.session.add(Assessment(
+                        student_id=student.id, subject=subject, assessment_type="devoir",
+                        score=score, max_score=20, date=date(2026, 1, 5) + timedelta(days=day), term=2,
+                    ))
+        db.session.commit()
+        app.class_id = classes[0].id
+    yield app
+
+
+def _all_pages(client, query):
+    ids, cursor, pages = [], None, 0
+    while True:
+        url = f"/notes/api/assessments?{query}" + (f"&cursor={cursor}" if cursor else "")
+        payload = client.get(url).get_json()
+        ids.extend(payload["data"]["id"])
+        pages += 1
+        cursor = payload["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+
+def test_columnar_payload_with_filters(app):
+    resp = app.test_client().get(f"/notes/api/assessments?class_id={app.class_id}&subject=SVT")
+    payload = resp.get_json()
+
+    assert resp.status_code == 200
+    assert payload["count"] == 4
+    assert set(payload["data"]) == set(payload["columns"])
+    assert all(len(values) == 4 for values in payload["data"].values())
+    assert set(payload["data"]["class"]) == {"6ème"}
+    assert payload["data"]["date"] == ["2026-01-08", "2026-01-07", "2026-01-06", "2026-01-05"]
+
+
+@pytest.mark.parametrize("sort", ["-date", "score", "subject,-score", "-term,student"])
+def test_cursor_pagination_matches_full_sort(app, sort):
+    client = app.test_client()
+    ids, pages = _all_pages(client, f"sort={sort}&limit=3")
+    full = client.get(f"/notes/api/assessments?sort={sort}&limit=100").get_json()["data"]["id"]
+
+    assert ids == full
+    assert len(ids) == 16 and pages == 6
+
+
+def test_score_sort_order(app):
+    data = app.test_client().get("/notes/api/assessments?sort=-score&limit=4").get_json()["data"]
+    assert data["score"] == sorted(data["score"], reverse=True)
+    assert data["normalized"][0] == data["score"][0]
+
+
+def test_etag_returns_304(app):
+    client = app.test_client()
+    resp = client.get("/notes/api/assessments?limit=5")
+    etag = resp.headers["ETag"]
+
+    again = client.get("/notes/api/assessments?limit=5", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+    with app.app_context():
+        Assessment.query.order_by(Assessment.date.desc(), Assessment.id.desc()).first().score = 1
+        db.session.commit()
+    changed = client.get("/notes/api/assessments?limit=5", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+
+
+def test_invalid_sort_or_cursor(app):
+    client = app.test_client()
+    assert client.get("/notes/api/assessments?sort=password").status_code == 400
+    assert client.get("/notes/api/assessments?cursor=%%%").status_code == 400
+
+
+@pytest.mark.parametrize("sort, values", [
+    ("-date", [5, 5]),
+    ("-date", ["2025-13-40", 5]),
+    ("score", [[1], 5]),
+    ("subject", [{"a": 1}, 5]),
+    ("term", [1.5, 5]),
+    ("-date", ["2025-01-06", True]),
+])
+def test_cursor_with_wrongly_typed_values(app, sort, values):
+    cursor = encode_sort_cursor(values)
+    resp = app.test_client().get(f"/notes/api/assessments?sort={sort}&cursor={cursor}")
+    assert resp.status_code == 400
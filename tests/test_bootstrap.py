@@ -0,0 +1,49 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+import pytest
+from sqlalchemy import inspect
+from app import create_app
+from models import db, Classe
+from services.bootstrap import bootstrap_database, PREDEFINED_CLASSES
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        yield app
+
+
+def test_create_app_does_not_touch_database(app):
+    assert inspect(db.engine).get_table_names() == []
+
+
+def test_bootstrap_is_idempotent(app):
+    assert bootstrap_database() == len(PREDEFINED_CLASSES)
+    assert bootstrap_database() == 0
+    assert Classe.query.count() == len(PREDEFINED_CLASSES)
+
+
+def test_bootstrap_keeps_existing_classes(app):
+    db.create_all()
+    db.session.add(Classe(name="6ème"))
+    db.session.commit()
+
+    assert bootstrap_database() == len(PREDEFINED_CLASSES) - 1
+    assert Classe.query.filter_by(name="6ème").count() == 1
+
+
+def test_bootstrap_cli_command(app):
+    result = app.test_cli_runner().invoke(args=["bootstrap"])
+    assert result.exit_code == 0
+    assert Classe.query.count() == len(PREDEFINED_CLASSES)
@@ -0,0 +1,91 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app import create_app
+from models import db, Classe, Student, Assessment
+from services.assessments import upsert_assessments
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        classe = Classe(name="6ème")
+        db.session.add(classe)
+        db.session.flush()
+        for i in range(3):
+            db.session.add(Student(first_name=f"Eleve{i}", last_name=f"Test{i}", class_id=classe.id))
+        db.session.commit()
+        yield app
+
+
+def _save_form(scores):
+    classe = Classe.query.first()
+    form = {
+        "action": "save_notes",
+        "class_id": classe.id,
+        "subject": "Mathématique",
+        "assessment_type": "devoir",
+        "date": "2025-01-06",
+        "term": 1,
+        "max_score": 20,
+    }
+    for student, score in zip(Student.query.order_by(Student.last_name), scores):
+        form[f"score_{student.id}"] = score
+    return form
+
+
+def _flashes(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.pop("_flashes", [])]
+
+
+def test_save_notes_reports_inserted_updated_skipped(app):
+    client = app.test_client()
+
+    resp = client.post("/notes/entry", data=_save_form([12, 14, 0]))
+    assert resp.status_code == 302
+    assert "2 note(s) enregistrée(s), 0 mise(s) à jour, 0 inchangée(s)" in _flashes(client)[0]
+
+    resp = client.post("/notes/entry", data=_save_form([12, 15, 9]))
+    assert resp.status_code == 302
+    assert "1 note(s) enregistrée(s), 1 mise(s) à jour, 1 inchangée(s)" in _flashes(client)[0]
+
+    assert Assessment.query.count() == 3
+    assert sorted(a.score for a in Assessment.query) == [9, 12, 15]
+
+
+def test_natural_key_is_unique(app):
+    student = Student.query.first()
+    key = dict(student_id=student.id, subject="SVT", assessment_type="devoir",
+               date=date(2025, 1, 6), term=1)
+    db.session.add(Assessment(score=10, **key))
+    db.session.commit()
+
+    db.session.add(Assessment(score=11, **key))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_upsert_uses_single_write(app):
+    student_ids = [s.id for s in Student.query]
+    rows = [dict(student_id=sid, subject="PCT", assessment_type="interrogation",
+                 date=date(2025, 1, 7), term=1, score=10.0, max_score=20.0) for sid in student_ids]
+    assert upsert_assessments(rows) == {"inserted": 3, "updated": 0, "skipped": 0}
+    db.session.commit()
+    assert upsert_assessments(rows) == {"inserted": 0, "updated": 0, "skipped": 3}
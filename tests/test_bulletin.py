@@ -0,0 +1,104 @@
+"""
+Bulletin d'un élève : agrégats calculés en SQL, nombre de requêtes fixe et
+détail des notes chargé seulement sur demande.
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date, timedelta
+
+import pytest
+from app import create_app
+from models import db, User, Classe, Student, Assessment
+from services.aggregates import bulletin_summary
+
+
+def _make_app(interrogations):
+    class TestConfig:
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        admin = User(email="admin@test.com", name="Admin", role="admin")
+        admin.set_password("secret123")
+        classe = Classe(name="6ème")
+        db.session.add_all([admin, classe])
+        db.session.flush()
+        student = Student(first_name="Awa", last_name="Kora", class_id=classe.id)
+        db.session.add(student)
+        db.session.flush()
+        day = date(2026, 1, 5)
+        for i in range(interrogations):
+            db.session.add(Assessment(student_id=student.id, subject="Mathématique",
+                                      assessment_type="interrogation", score=8 + i % 5, max_score=10,
+                                      date=day + timedelta(days=i), term=2))
+        db.session.add_all([
+            Assessment(student_id=student.id, subject="Mathématique", assessment_type="devoir",
+                       score=12, max_score=20, date=day, term=2),
+            Assessment(student_id=student.id, subject="Français", assessment_type="composition",
+                       score=30, max_score=40, date=day, term=2),
+            Assessment(student_id=student.id, subject="Français", assessment_type="devoir",
+                       score=5, max_score=20, date=day, term=1),
+        ])
+        db.session.commit()
+        app.admin_id, app.student_id = admin.id, student.id
+    return app
+
+
+def _client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(app.admin_id)
+        session["_fresh"] = True
+    return client
+
+
+def test_bulletin_summary_groups_by_subject_and_type():
+    app = _make_app(2)  # interrogations 8/10 et 9/10
+    with app.app_context():
+        summary = bulletin_summary(app.student_id, 2)
+
+    assert list(summary) == ["Français", "Mathématique"]
+    maths = summary["Mathématique"]
+    assert maths["types"]["interrogation"]["count"] == 2
+    assert maths["types"]["interrogation"]["average"] == pytest.approx(17.0)
+    assert maths["types"]["devoir"]["average"] == pytest.approx(12.0)
+    assert maths["count"] == 3
+    assert maths["average"] == pytest.approx((16 + 18 + 12) / 3)
+    assert (maths["min"], maths["max"]) == (pytest.approx(12.0), pytest.approx(18.0))
+    assert summary["Français"]["average"] == pytest.approx(15.0)  # le trimestre 1 est exclu
+
+
+def test_bulletin_renders_summary_without_loading_rows():
+    app = _make_app(3)
+    client = _client(app)
+
+    resp = client.get(f"/notes/bulletin/{app.student_id}/2")
+    assert resp.status_code == 200
+    html = resp.get_data(as_text=True)
+    assert "(3 notes)" in html
+    assert "Afficher le détail" in html
+    assert "<small>❓ Interrogation</small>" not in html
+
+    resp = client.get(f"/notes/bulletin/{app.student_id}/2?details=1")
+    html = resp.get_data(as_text=True)
+    assert html.count("<small>❓ Interrogation</small>") == 3
+
+
+@pytest.mark.parametrize("details", ["", "?details=1"])
+def test_bulletin_query_count_is_fixed(details, max_queries):
+    counts = []
+    for interrogations in (2, 40):
+        app = _make_app(interrogations)
+        client = _client(app)
+        with max_queries(app, 8) as counter:
+            resp = client.get(f"/notes/bulletin/{app.student_id}/2{details}")
+        assert resp.status_code == 200
+        counts.append(counter.count)
+    assert counts[0] == counts[1]
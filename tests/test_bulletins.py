@@ -0,0 +1,202 @@
+"""
+Génération en lot des bulletins PDF (services/bulletins.py).
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+import subprocess
+import time
+from datetime import date
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app import create_app
+from models import db, User, Classe, Student, Assessment, ReportCard
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import services.bulletins as bulletins
+from services.bulletins import generate_bulletins, job_status
+
+
+def _make_app(tmp_path):
+    class TestConfig:
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+        BULLETIN_DIR = str(tmp_path / "bulletins")
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        admin = User(email="admin@test.com", name="Admin", role="admin")
+        admin.set_password("secret123")
+        classes = [Classe(name="6ème"), Classe(name="5ème")]
+        db.session.add_all([admin, *classes])
+        db.session.flush()
+        for i in range(6):
+            student = Student(first_name=f"Eleve{i}", last_name=f"Nom{i}", class_id=classes[i % 2].id)
+            db.session.add(student)
+            db.session.flush()
+            for subject in ("Français", "Mathématique"):
+                db.session.add(Assessment(student_id=student.id, subject=subject, assessment_type="devoir",
+                                          score=8 + i, max_score=20, date=date(2026, 1, 5), term=1))
+        # Élève sans note : pas de bulletin
+        db.session.add(Student(first_name="Sans", last_name="Note", class_id=classes[0].id))
+        db.session.commit()
+        app.admin_id, app.class_id = admin.id, classes[0].id
+    return app
+
+
+def _pdfs(app):
+    root = app.config["BULLETIN_DIR"]
+    return sorted(os.path.relpath(os.path.join(d, f), root)
+                  for d, _, files in os.walk(root) for f in files if f.endswith(".pdf"))
+
+
+def test_generate_records_report_cards_and_skips_unchanged(tmp_path):
+    app = _make_app(tmp_path)
+    with app.app_context():
+        seen = []
+        report = generate_bulletins(1, workers=0, progress=lambda r: seen.append(r.done))
+        assert (report.total, report.rendered, report.skipped, report.failed) == (6, 6, 0, 0)
+        assert seen[-1] == 6
+        assert len(_pdfs(app)) == 6
+        cards = ReportCard.query.all()
+        assert len(cards) == 6 and all(c.input_hash and c.pdf_url.endswith(".pdf") for c in cards)
+        with open(os.path.join(app.config["BULLETIN_DIR"], cards[0].pdf_url), "rb") as f:
+            assert f.read(5) == b"%PDF-"
+
+        report = generate_bulletins(1, workers=0)
+        assert (report.rendered, report.skipped) == (0, 6)
+
+        # Une note modifiée change le rang de toute la classe : seule cette classe est régénérée
+        student = Student.query.filter_by(class_id=app.class_id).first()
+        Assessment.query.filter_by(student_id=student.id, subject="Français").first().score = 20
+        db.session.commit()
+        report = generate_bulletins(1, workers=0)
+        assert (report.rendered, report.skipped) == (3, 3)
+        assert ReportCard.query.count() == 6
+
+        report = generate_bulletins(1, class_id=app.class_id, workers=0, force=True)
+        assert (report.total, report.rendered) == (3, 3)
+
+
+def test_missing_file_is_regenerated(tmp_path):
+    app = _make_app(tmp_path)
+    with app.app_context():
+        generate_bulletins(1, workers=0)
+        card = ReportCard.query.first()
+        os.remove(os.path.join(app.config["BULLETIN_DIR"], card.pdf_url))
+
+        report = generate_bulletins(1, workers=0)
+        assert (report.rendered, report.skipped) == (1, 5)
+
+
+def test_process_pool_renders_every_bulletin(tmp_path):
+    app = _make_app(tmp_path)
+    with app.app_context():
+        report = generate_bulletins(1, workers=2)
+    assert (report.rendered, report.failed) == (6, 0)
+    assert len(_pdfs(app)) == 6
+
+
+class DyingPool:
+    """Pool dont le worker meurt après le premier bulletin : les futures restantes sont cassées."""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, job):
+        self.submitted += 1
+        future = Future()
+        if self.submitted == 1:
+            future.set_result(fn(job))
+        else:
+            future.set_exception(BrokenProcessPool("worker tué"))
+        return future
+
+    def shutdown(self, cancel_futures=False):
+        pass
+
+
+def test_pool_killed_mid_class_falls_back_inline(tmp_path, monkeypatch):
+    app = _make_app(tmp_path)
+    pool = DyingPool()
+    monkeypatch.setattr(bulletins, "_pool", lambda workers: pool)
+    with app.app_context():
+        report = generate_bulletins(1, workers=2)
+    assert (report.rendered, report.failed) == (6, 0)
+    assert len(_pdfs(app)) == 6
+
+
+def test_admin_route_runs_job_in_background(tmp_path):
+    app = _make_app(tmp_path)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(app.admin_id)
+        session["_fresh"] = True
+
+    assert client.post("/admin/bulletins", data={"term": 7}).status_code == 400
+    resp = client.post("/admin/bulletins", data={"term": 1, "class_id": app.class_id})
+    assert resp.status_code == 202
+
+    for _ in range(100):
+        status = client.get("/admin/bulletins/status").get_json()
+        if status.get("status") == "finished":
+            break
+        time.sleep(0.1)
+    assert status["rendered"] == 3
+    assert job_status(app)["status"] == "finished"
+
+    with app.app_context():
+        url = ReportCard.query.first().pdf_url
+    resp = client.get(f"/admin/bulletins/files/{url}")
+    assert resp.status_code == 200
+    assert resp.data.startswith(b"%PDF-")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="le processus témoin verrouille avec fcntl")
+def test_generation_lock_spans_processes(tmp_path):
+    app = _make_app(tmp_path)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(app.admin_id)
+        session["_fresh"] = True
+
+    # Un autre processus (autre worker gunicorn, commande CLI) tient le verrou
+    lock_path = os.path.join(app.config["BULLETIN_DIR"], bulletins.LOCK_FILE)
+    os.makedirs(app.config["BULLETIN_DIR"], exist_ok=True)
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import fcntl, sys, time; f = open(sys.argv[1], 'a+'); fcntl.flock(f, fcntl.LOCK_EX);"
+         " print('ok', flush=True); time.sleep(30)", lock_path],
+        stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == "ok"
+        assert client.post("/admin/bulletins", data={"term": 1}).status_code == 409
+        result = app.test_cli_runner().invoke(args=["generate-bulletins", "--term", "1", "--workers", "0"])
+        assert result.exit_code != 0 and "déjà en cours" in result.output
+    finally:
+        holder.kill()
+        holder.wait()
+
+    assert client.post("/admin/bulletins", data={"term": 1}).status_code == 202
+    for _ in range(100):
+        if (job_status(app) or {}).get("status") == "finished":
+            break
+        time.sleep(0.1)
+    assert job_status(app)["status"] == "finished"
+
+
+def test_one_report_card_per_student_and_term(tmp_path):
+    app = _make_app(tmp_path)
+    with app.app_context():
+        generate_bulletins(1, workers=0)
+        card = ReportCard.query.first()
+        db.session.add(ReportCard(student_id=card.student_id, term=1))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
@@ -0,0 +1,106 @@
+"""
+Évolution d'une classe sur les trimestres : une requête matière × trimestre,
+mise en cache, servie en HTML et en JSON.
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date
+
+import pytest
+from app import create_app
+from models import db, User, Classe, Student, Assessment
+from services.aggregates import class_trend
+
+
+@pytest.fixture
+def app():
+    class TestConfig:
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        admin = User(email="admin@test.com", name="Admin", role="admin")
+        admin.set_password("secret123")
+        classe, other = Classe(name="6ème"), Classe(name="5ème")
+        db.session.add_all([admin, classe, other])
+        db.session.flush()
+        student = Student(first_name="Awa", last_name="Kora", class_id=classe.id)
+        outsider = Student(first_name="Ali", last_name="Sow", class_id=other.id)
+        db.session.add_all([student, outsider])
+        db.session.flush()
+        notes = [
+            # (élève, matière, note, barème, trimestre, jour)
+            (student, "Français", 10, 20, 1, 5), (student, "Français", 7, 10, 1, 6),
+            (student, "Français", 16, 20, 2, 5),
+            (student, "Mathématique", 12, 20, 1, 5), (student, "Mathématique", 9, 20, 3, 5),
+            (outsider, "Français", 20, 20, 2, 5),
+        ]
+        for who, subject, score, max_score, term, day in notes:
+            db.session.add(Assessment(student_id=who.id, subject=subject, assessment_type="devoir",
+                                      score=score, max_score=max_score, date=date(2026, term, day), term=term))
+        db.session.commit()
+        app.admin_id, app.class_id = admin.id, classe.id
+    return app
+
+
+def _client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(app.admin_id)
+        session["_fresh"] = True
+    return client
+
+
+def test_class_trend_in_one_grouped_query(app, max_queries):
+    with max_queries(app, 1) as counter:
+        with app.app_context():
+            trend = class_trend(app.class_id)
+    assert "GROUP BY" in counter.statements[0]
+
+    french, maths = trend["subjects"]
+    assert french["subject"] == "Français"
+    assert french["terms"][1] == {"average": pytest.approx(12.0), "count": 2}
+    assert french["terms"][2]["average"] == pytest.approx(16.0)  # l'autre classe est exclue
+    assert french["terms"][3] is None
+    assert french["change"] == pytest.approx(4.0)
+    assert maths["change"] == pytest.approx(-3.0)
+    assert trend["overall"][1] == {"average": pytest.approx(12.0), "count": 3}
+
+
+def test_html_and_json_share_cached_data(app, monkeypatch):
+    import blueprints.notes.routes as notes_routes
+    calls = []
+    original = notes_routes.class_trend
+    monkeypatch.setattr(notes_routes, "class_trend", lambda *a, **k: calls.append(a) or original(*a, **k))
+    client = _client(app)
+
+    html = client.get(f"/notes/trend/{app.class_id}")
+    assert html.status_code == 200
+    assert "▲ +4.00" in html.get_data(as_text=True)
+
+    api = client.get(f"/notes/api/trend/{app.class_id}")
+    payload = api.get_json()
+    assert payload["class_name"] == "6ème"
+    assert payload["subjects"][0]["terms"]["1"]["count"] == 2
+    assert len(calls) == 1
+
+    assert client.get(f"/notes/api/trend/{app.class_id}",
+                      headers={"If-None-Match": api.headers["ETag"]}).status_code == 304
+
+    # Une note du trimestre 3 change la version : recalcul
+    with app.app_context():
+        student = Student.query.filter_by(class_id=app.class_id).first()
+        db.session.add(Assessment(student_id=student.id, subject="Français", assessment_type="devoir",
+                                  score=18, max_score=20, date=date(2026, 3, 9), term=3))
+        db.session.commit()
+    api = client.get(f"/notes/api/trend/{app.class_id}", headers={"If-None-Match": api.headers["ETag"]})
+    assert api.status_code == 200
+    assert api.get_json()["subjects"][0]["change"] == pytest.approx(6.0)
+    assert len(calls) == 2
@@ -0,0 +1,79 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from sqlalchemy import create_engine, text
+from app import create_app
+from models import db, User
+from services.database import (
+    POOL_STATS, InstrumentedQueuePool, engine_options_for, normalize_database_url,
+    postgres_engine_options,
+)
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+
+
+def test_postgres_options_from_env():
+    options = postgres_engine_options({
+        "DB_POOL_SIZE": "8", "DB_MAX_OVERFLOW": "2", "DB_POOL_RECYCLE": "600",
+        "DB_POOL_PRE_PING": "1", "DB_STATEMENT_TIMEOUT_MS": "15000",
+    })
+    assert options["pool_size"] == 8
+    assert options["max_overflow"] == 2
+    assert options["pool_recycle"] == 600
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=15000"}
+
+
+def test_pool_budget_split_across_workers():
+    options = postgres_engine_options({"DB_MAX_CONNECTIONS": "20", "WEB_CONCURRENCY": "4"})
+    assert options["pool_size"] + options["max_overflow"] <= 5
+
+
+def test_sqlite_gets_no_pool_options():
+    assert engine_options_for("sqlite:///app_gestion.db", {}) == {}
+    assert normalize_database_url("postgres://u@h/db") == "postgresql://u@h/db"
+
+
+def test_instrumented_pool_records_checkout_wait(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool)
+    before = POOL_STATS.wait_seconds_total
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert POOL_STATS.wait_seconds_total > before
+    engine.dispose()
+
+
+def test_db_pool_metrics_route():
+    class AuthConfig(TestConfig):
+        LOGIN_DISABLED = False
+
+    app = create_app(AuthConfig)
+    with app.app_context():
+        db.create_all()
+        users = []
+        for email, role in (("admin@test.com", "admin"), ("prof@test.com", "teacher")):
+            user = User(email=email, name=role, role=role)
+            user.set_password("secret123")
+            users.append(user)
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [u.id for u in users]
+
+    def get(user_id):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+            session["_fresh"] = True
+        return client.get("/admin/db-pool")
+
+    resp = get(user_ids[0])
+    assert resp.status_code == 200
+    assert {"checkouts", "wait_seconds_total", "pools"} <= set(resp.get_json())
+    assert get(user_ids[1]).status_code == 403
@@ -0,0 +1,84 @@
+"""
+Budget de requêtes SQL des pages de liste : il ne doit pas dépendre du
+nombre de lignes affichées (pas de chargement paresseux ligne par ligne).
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date
+
+import pytest
+from app import create_app
+from models import db, User, Classe, Student, Parent, Assessment
+
+
+DAY = date(2026, 1, 5)
+
+
+def _make_app(rows):
+    class TestConfig:
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        admin = User(email="admin@test.com", name="Admin", role="admin")
+        admin.set_password("secret123")
+        db.session.add(admin)
+        classes = [Classe(name="6ème"), Classe(name="5ème")]
+        db.session.add_all(classes)
+        db.session.flush()
+        for i in range(rows):
+            student = Student(first_name=f"Eleve{i}", last_name=f"Nom{i:03d}", class_id=classes[i % 2].id)
+            student.parents.append(Parent(first_name="Parent", last_name=f"Nom{i:03d}",
+                                          phone_e164=f"+22961{i:06d}", whatsapp_optin=True))
+            db.session.add(student)
+            db.session.flush()
+            for subject in ("Français", "Mathématique"):
+                db.session.add(Assessment(student_id=student.id, subject=subject, assessment_type="devoir",
+                                          score=12, max_score=20, date=DAY, term=2))
+        db.session.commit()
+        app.admin_id = admin.id
+        app.class_id = classes[0].id
+    return app
+
+
+def _client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(app.admin_id)
+        session["_fresh"] = True
+    return client
+
+
+def _pages(app):
+    return [
+        ("GET", "/notes/dashboard", None),
+        ("GET", "/eleves/", None),
+        ("GET", "/parents/", None),
+        ("GET", "/notes/correspondence", None),
+        ("POST", "/notes/correspondence", {"class_id": app.class_id, "date": DAY.isoformat()}),
+    ]
+
+
+def _count(app, max_queries, method, url, data, limit):
+    client = _client(app)
+    with max_queries(app, limit) as counter:
+        resp = client.open(url, method=method, data=data)
+    assert resp.status_code == 200, url
+    return counter.count
+
+
+@pytest.mark.parametrize("index", range(5))
+def test_query_count_is_independent_of_row_count(index, max_queries):
+    small, large = _make_app(4), _make_app(30)
+    method, url, data = _pages(small)[index]
+    _, _, large_data = _pages(large)[index]
+
+    assert _count(small, max_queries, method, url, data, 12) == \
+        _count(large, max_queries, method, url, large_data, 12)
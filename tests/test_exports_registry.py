@@ -0,0 +1,38 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+import pytest
+from services.exports import RENDERERS, get_renderer, renderer, warm_backends
+
+
+def test_builtin_formats_registered():
+    assert {"xlsx", "pdf", "docx", "grades_csv", "grades_xlsx"} <= set(RENDERERS)
+    assert get_renderer("pdf").mimetype == "application/pdf"
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        get_renderer("odt")
+
+
+def test_backend_loaded_on_first_render():
+    calls = []
+
+    @renderer("test-fmt", "text/plain", "txt", modules=("json",))
+    def render_test(value):
+        calls.append(value)
+        return value
+
+    try:
+        export = get_renderer("test-fmt")
+        assert export.loaded is False
+        assert export.render("ok") == "ok"
+        assert export.loaded is True
+        assert calls == ["ok"]
+    finally:
+        RENDERERS.pop("test-fmt")
+
+
+def test_warm_backends():
+    assert warm_backends(["xlsx"]) == ["xlsx"]
+    assert get_renderer("xlsx").loaded is True
@@ -0,0 +1,52 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+sys.path.insert(0, os.path.join(os.path.abspath(os.getcwd()), "scripts"))
+
+import pytest
+from app import create_app
+from models import db, Classe, Student, Parent, Assessment, MessageLog, User
+from generate_dataset import generate_dataset, BENCH_ADMIN_EMAIL
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def test_generate_dataset_volumes(app):
+    counts = generate_dataset(classes=3, students_per_class=5, assessments_per_term=4,
+                              terms=2, sibling_ratio=0.5, messages_per_parent=2, seed=1)
+
+    assert counts["classes"] == Classe.query.count() == 3
+    assert counts["students"] == Student.query.count() == 15
+    assert counts["assessments"] == Assessment.query.count() == 15 * 4 * 2
+    assert counts["parents"] == Parent.query.count() <= 15
+    assert counts["messages"] == MessageLog.query.count() == counts["parents"] * 2
+    assert User.query.filter_by(email=BENCH_ADMIN_EMAIL).one().is_admin()
+
+    # Les fratries partagent un parent : chaque élève a exactement un parent
+    assert all(len(s.parents) == 1 for s in Student.query)
+
+
+def test_generate_dataset_is_deterministic(app):
+    generate_dataset(classes=1, students_per_class=3, assessments_per_term=2, terms=1, seed=7)
+    first = [(a.subject, a.score, a.date) for a in Assessment.query.order_by(Assessment.id)]
+
+    db.drop_all()
+    db.create_all()
+    generate_dataset(classes=1, students_per_class=3, assessments_per_term=2, terms=1, seed=7)
+    second = [(a.subject, a.score, a.date) for a in Assessment.query.order_by(Assessment.id)]
+
+    assert first == second
@@ -0,0 +1,91 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+import csv
+import io
+from datetime import date, timedelta
+
+import pytest
+from openpyxl import load_workbook
+from app import create_app
+from models import db, Classe, Student, Assessment
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+    EXPORT_YIELD_PER = 7
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        classes = [Classe(name="6ème"), Classe(name="5ème")]
+        db.session.add_all(classes)
+        db.session.flush()
+        for classe in classes:
+            student = Student(first_name="Eleve", last_name=classe.name, class_id=classe.id)
+            db.session.add(student)
+            db.session.flush()
+            for day in range(20):
+                db.session.add(Assessment(student_id=student.id, subject="Français", assessment_type="devoir",
+                                          score=10, max_score=20, date=date(2026, 1, 5) + timedelta(days=day),
+                                          term=2))
+        db.session.commit()
+        app.class_id = classes[0].id
+    yield app
+
+
+def test_csv_export_is_streamed_and_filtered(app):
+    resp = app.test_client().get(f"/notes/export/csv?class_id={app.class_id}")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.headers["Content-Disposition"].endswith('.csv"')
+
+    text = resp.get_data().decode("utf-8-sig")
+    rows = list(csv.reader(io.StringIO(text), delimiter=";"))
+    assert rows[0][:3] == ["ID", "Date", "Trimestre"]
+    assert len(rows) == 21
+    assert {row[3] for row in rows[1:]} == {"6ème"}
+    assert rows[1][1] == "2026-01-24" and rows[1][9] == "10.0"
+
+
+def test_xlsx_export_uses_write_only_workbook(app):
+    resp = app.test_client().get("/notes/export/xlsx?subject=Français")
+    assert resp.status_code == 200
+
+    ws = load_workbook(io.BytesIO(resp.get_data())).active
+    values = list(ws.iter_rows(values_only=True))
+    assert ws.title == "Notes"
+    assert len(values) == 41
+    assert values[1][1].date() == date(2026, 1, 24)
+
+
+def test_unknown_format(app):
+    assert app.test_client().get("/notes/export/pdf").status_code == 404
+
+
+def test_user_text_cannot_inject_formulas(app):
+    with app.app_context():
+        student = Student(first_name="x", last_name='=HYPERLINK("http://evil")', class_id=app.class_id)
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(Assessment(student_id=student.id, subject="+SUM(A1)", assessment_type="devoir",
+                                  score=10, max_score=20, date=date(2026, 3, 1), term=2))
+        db.session.commit()
+    client = app.test_client()
+
+    text = client.get("/notes/export/csv?subject=%2BSUM(A1)").get_data().decode("utf-8-sig")
+    row = list(csv.reader(io.StringIO(text), delimiter=";"))[1]
+    assert row[4] == '\'=HYPERLINK("http://evil") x'
+    assert row[5] == "'+SUM(A1)"
+
+    ws = load_workbook(io.BytesIO(client.get("/notes/export/xlsx?subject=%2BSUM(A1)").get_data())).active
+    cell = ws.cell(row=2, column=5)
+    assert cell.data_type == "s" and cell.value == '=HYPERLINK("http://evil") x'
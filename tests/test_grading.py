@@ -0,0 +1,151 @@
+"""
+Moteur de moyennes pondérées et de rangs (services/grading.py).
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from app import create_app
+from models import db, User, Classe, Student, Assessment
+from services.grading import compute_class_results, parse_weights, results_from_frame
+
+
+COLUMNS = ["student_id", "subject", "assessment_type", "score", "max_score"]
+TYPES = {"interrogation": 1.0, "devoir": 1.0, "composition": 2.0}
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def test_parse_weights():
+    assert parse_weights("Mathématique=4, Français=3") == {"Mathématique": 4.0, "Français": 3.0}
+    assert parse_weights("composition=3", TYPES)["composition"] == 3.0
+    assert parse_weights("", TYPES) == TYPES
+    assert parse_weights({"a": 2}) == {"a": 2.0}
+
+
+def test_subject_average_weights_types_and_normalizes():
+    results = results_from_frame(_frame([
+        (1, "Maths", "interrogation", 8, 10),    # 16/20
+        (1, "Maths", "interrogation", 6, 10),    # 12/20 -> interrogations 14
+        (1, "Maths", "devoir", 10, 20),          # 10
+        (1, "Maths", "composition", 30, 40),     # 15 (poids 2)
+        (1, "Maths", "devoir", 5, 0),            # barème nul : 0 -> devoirs 5
+    ]), TYPES, {})
+
+    maths = results.student(1)["subjects"]["Maths"]
+    assert maths["average"] == pytest.approx((14 + 5 + 15 * 2) / 4)
+    assert maths["count"] == 5
+
+
+def test_overall_average_uses_coefficients_and_ranks_ties():
+    results = results_from_frame(_frame([
+        (1, "Maths", "devoir", 20, 20), (1, "Français", "devoir", 10, 20),
+        (2, "Maths", "devoir", 10, 20), (2, "Français", "devoir", 20, 20),
+        (3, "Maths", "devoir", 20, 20), (3, "Français", "devoir", 10, 20),
+    ]), TYPES, {"Maths": 3})
+
+    assert results.student(1)["average"] == pytest.approx((20 * 3 + 10) / 4)
+    assert results.student(2)["average"] == pytest.approx((10 * 3 + 20) / 4)
+    assert [(sid, rank) for sid, _, rank in results.ranking()] == [(1, 1), (3, 1), (2, 3)]
+    assert results.student(2)["subjects"]["Français"]["rank"] == 1
+    assert results.student(1)["subjects"]["Français"]["rank"] == 2
+    assert results.student(99) is None
+
+
+def test_empty_class():
+    results = results_from_frame(_frame([]), TYPES, {}, class_size=12)
+    assert results.empty
+    assert results.ranking() == []
+    assert results.class_average() == 0.0
+
+
+def _make_app():
+    class TestConfig:
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+        SUBJECT_COEFFICIENTS = "Mathématique=2"
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        admin = User(email="admin@test.com", name="Admin", role="admin")
+        admin.set_password("secret123")
+        classe, other = Classe(name="6ème"), Classe(name="5ème")
+        db.session.add_all([admin, classe, other])
+        db.session.flush()
+        day = date(2026, 1, 5)
+        for name, maths, french, class_id in (("Adjo", 16, 8, classe.id), ("Bio", 10, 18, classe.id),
+                                              ("Chabi", 12, 12, classe.id), ("Dossou", 20, 20, other.id)):
+            student = Student(first_name="Élève", last_name=name, class_id=class_id)
+            db.session.add(student)
+            db.session.flush()
+            db.session.add_all([
+                Assessment(student_id=student.id, subject="Mathématique", assessment_type="devoir",
+                           score=maths, max_score=20, date=day, term=1),
+                Assessment(student_id=student.id, subject="Français", assessment_type="devoir",
+                           score=french, max_score=20, date=day, term=1),
+            ])
+        db.session.commit()
+        app.admin_id, app.class_id = admin.id, classe.id
+        app.student_ids = {s.last_name: s.id for s in Student.query}
+    return app
+
+
+def _client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(app.admin_id)
+        session["_fresh"] = True
+    return client
+
+
+def test_compute_class_results_reads_config_and_class():
+    app = _make_app()
+    with app.app_context():
+        results = compute_class_results(app.class_id, 1)
+
+    assert results.class_size == 3
+    adjo = results.student(app.student_ids["Adjo"])
+    assert adjo["average"] == pytest.approx((16 * 2 + 8) / 3)
+    assert adjo["rank"] == 1 and adjo["ranked_count"] == 3
+    assert results.student(app.student_ids["Dossou"]) is None  # autre classe
+
+
+def test_class_stats_and_bulletin_show_ranks():
+    app = _make_app()
+    client = _client(app)
+
+    html = client.get(f"/notes/stats/{app.class_id}/1").get_data(as_text=True)
+    assert html.index("Adjo Élève") < html.index("Bio Élève") < html.index("Chabi Élève")
+    assert "Dossou" not in html
+
+    html = client.get(f"/notes/bulletin/{app.student_ids['Bio']}/1").get_data(as_text=True)
+    assert "Rang : 2e / 3" in html
+    assert "12.67/20" in html
+
+
+def test_class_stats_page_size_does_not_grow_with_grades():
+    sizes = []
+    for extra in (0, 60):
+        app = _make_app()
+        with app.app_context():
+            for student_id in app.student_ids.values():
+                for i in range(extra):
+                    db.session.add(Assessment(student_id=student_id, subject="Mathématique",
+                                              assessment_type="interrogation", score=10, max_score=20,
+                                              date=date(2026, 2, 1) + timedelta(days=i), term=1))
+            db.session.commit()
+        html = _client(app).get(f"/notes/stats/{app.class_id}/1").get_data(as_text=True)
+        assert "Taux de réussite" in html and "Écart-type" in html
+        sizes.append(len(html))
+    # Seuls les nombres affichés changent, pas la structure de la page
+    assert abs(sizes[0] - sizes[1]) < 200
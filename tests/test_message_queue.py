@@ -0,0 +1,202 @@
+"""
+File d'envoi des messages parents : la saisie met en file dans MessageLog,
+``flask dispatch-messages`` envoie.
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import datetime, timedelta
+
+import pytest
+from app import create_app
+from models import db, Classe, Student, Parent, MessageLog
+from services.messaging import BulkMessageProcessor, ParentMessagingService
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        classe = Classe(name="6ème")
+        db.session.add(classe)
+        db.session.flush()
+        parents = [
+            Parent(first_name="Awa", last_name="Adjo", phone_e164="+22990000001", whatsapp_optin=True),
+            Parent(first_name="Koffi", last_name="Bio", phone_e164="+22990000002", whatsapp_optin=False),
+            Parent(first_name="Sans", last_name="Numéro"),
+        ]
+        for i, parent in enumerate(parents):
+            student = Student(first_name=f"Eleve{i}", last_name=f"Test{i}", class_id=classe.id)
+            student.parents.append(parent)
+            db.session.add(student)
+        db.session.commit()
+        yield app
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Remplace les fournisseurs : enregistre les envois au lieu d'attendre Twilio / le navigateur."""
+    calls = []
+
+    def send_whatsapp(parent, content):
+        calls.append(("whatsapp", parent.id))
+        return True, "SM123"
+
+    monkeypatch.setattr(ParentMessagingService, "_send_whatsapp", staticmethod(send_whatsapp))
+    monkeypatch.setattr(ParentMessagingService, "_send_email",
+                        staticmethod(lambda parent, *args, **kwargs: calls.append(("email", parent.id))))
+    return calls
+
+
+def _save_form():
+    form = {"action": "save_notes", "class_id": Classe.query.first().id, "subject": "Mathématique",
+            "assessment_type": "devoir", "date": "2025-01-06", "term": 1, "max_score": 20}
+    for student in Student.query:
+        form[f"score_{student.id}"] = 12
+    return form
+
+
+def test_save_notes_only_queues(app, sent):
+    resp = app.test_client().post("/notes/entry", data=_save_form())
+    assert resp.status_code == 302
+    assert sent == []  # aucun envoi pendant la requête
+
+    logs = MessageLog.query.all()
+    assert len(logs) == 3
+    assert {log.status for log in logs} == {"queued"}
+    assert all("NOTES DU JOUR" in log.content for log in logs)
+
+
+def test_dispatch_sends_queued_messages(app, sent):
+    app.test_client().post("/notes/entry", data=_save_form())
+
+    result = app.test_cli_runner().invoke(args=["dispatch-messages", "--once"])
+    assert result.exit_code == 0, result.output
+    assert "3 message(s) traité(s), 2 envoyé(s)" in result.output
+
+    by_parent = {db.session.get(Parent, log.parent_id).last_name: log for log in MessageLog.query}
+    assert by_parent["Adjo"].status == "sent_whatsapp" and by_parent["Adjo"].twilio_sid == "SM123"
+    assert by_parent["Bio"].status == "sent_email"
+    assert by_parent["Numéro"].status == "skipped"  # aucun canal
+    assert sorted(sent) == sorted([("email", by_parent["Adjo"].parent_id), ("whatsapp", by_parent["Adjo"].parent_id),
+                                   ("email", by_parent["Bio"].parent_id)])
+
+    # File vide : rien n'est renvoyé
+    sent.clear()
+    assert BulkMessageProcessor.process_pending_messages() == 0
+    assert sent == []
+
+
+def test_whatsapp_failures_are_retried_up_to_max_attempts(app, monkeypatch):
+    calls = []
+
+    def failing(parent, content):
+        calls.append(parent.id)
+        return False, "no_provider"
+
+    monkeypatch.setattr(ParentMessagingService, "_send_whatsapp", staticmethod(failing))
+    monkeypatch.setattr(ParentMessagingService, "_send_email", staticmethod(lambda *args, **kwargs: None))
+    parent = Parent.query.filter_by(last_name="Adjo").first()
+    db.session.add(MessageLog(parent_id=parent.id, template_name="daily_notes", content="c", status="queued"))
+    db.session.commit()
+
+    for _ in range(5):
+        BulkMessageProcessor.process_pending_messages(max_attempts=3)
+    log = MessageLog.query.one()
+    assert len(calls) == 3
+    assert (log.status, log.attempts, log.last_error) == ("failed_whatsapp", 3, "no_provider")
+
+
+def test_claimed_message_is_not_sent_twice(app, sent):
+    parent = Parent.query.filter_by(last_name="Bio").first()
+    db.session.add(MessageLog(parent_id=parent.id, template_name="individual_note", content="c", status="queued"))
+    db.session.commit()
+
+    log = MessageLog.query.one()
+    assert BulkMessageProcessor.claim(log) == "queued"
+    # Un second worker a lu le message avant la réservation
+    stale = MessageLog(id=log.id, status="queued")
+    assert BulkMessageProcessor.claim(stale) is None
+    assert BulkMessageProcessor.pending_query().count() == 0
+    assert sent == []
+
+
+def test_abandoned_claim_is_picked_up_again(app, sent):
+    parent = Parent.query.filter_by(last_name="Bio").first()
+    now = datetime.utcnow()
+    db.session.add_all([
+        # Worker arrêté entre la réservation et l'envoi
+        MessageLog(parent_id=parent.id, template_name="individual_note", content="vieux", status="sending",
+                   claimed_at=now - timedelta(hours=1)),
+        # Réservation en cours par un autre worker
+        MessageLog(parent_id=parent.id, template_name="individual_note", content="récent", status="sending",
+                   claimed_at=now),
+    ])
+    db.session.commit()
+
+    assert [log.content for log in BulkMessageProcessor.pending_query()] == ["vieux"]
+    assert BulkMessageProcessor.process_pending_messages() == 1
+    old = MessageLog.query.filter_by(content="vieux").one()
+    assert (old.status, old.attempts) == ("sent_email", 1)
+    assert MessageLog.query.filter_by(content="récent").one().status == "sending"
+
+
+def _failing_providers(monkeypatch):
+    monkeypatch.setattr(ParentMessagingService, "_send_whatsapp",
+                        staticmethod(lambda parent, content: (False, "no_provider")))
+    monkeypatch.setattr(ParentMessagingService, "_send_email",
+                        staticmethod(lambda *args, **kwargs: (_ for _ in ()).throw(OSError("smtp"))))
+
+
+def test_worker_pauses_when_a_full_batch_sends_nothing(app, monkeypatch):
+    import time
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 3:
+            raise KeyboardInterrupt  # arrêt du worker
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    _failing_providers(monkeypatch)
+    parent = Parent.query.filter_by(last_name="Adjo").first()
+    db.session.add(MessageLog(parent_id=parent.id, template_name="daily_notes", content="c", status="queued"))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["dispatch-messages", "--batch-size", "1",
+                                                "--max-attempts", "5", "--interval", "7"])
+    assert result.exit_code == 0, result.output
+    # Une pause entre chaque essai, pas tous les essais enchaînés
+    assert sleeps == [7, 7, 7]
+    assert MessageLog.query.one().attempts == 3
+
+
+def test_once_makes_a_single_pass(app, monkeypatch):
+    import time
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    _failing_providers(monkeypatch)
+    parent = Parent.query.filter_by(last_name="Adjo").first()
+    db.session.add_all([MessageLog(parent_id=parent.id, template_name="daily_notes", content=f"c{i}",
+                                   status="queued") for i in range(2)])
+    db.session.commit()
+
+    # Lot complet de messages en échec : un seul essai chacun par exécution du cron
+    for run in (1, 2):
+        result = app.test_cli_runner().invoke(args=["dispatch-messages", "--once", "--batch-size", "2",
+                                                    "--max-attempts", "3"])
+        assert result.exit_code == 0, result.output
+        db.session.expire_all()
+        assert [log.attempts for log in MessageLog.query] == [run, run]
+    assert sleeps == []
@@ -0,0 +1,94 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+import json
+
+import pytest
+from app import create_app
+from models import db, Classe, MessageLog
+from services.metrics import METRICS, MetricsStore, clear_metrics_dir
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig:
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+        LOGIN_DISABLED = True
+        METRICS_DIR = str(tmp_path / "metrics")
+        METRICS_FLUSH_SECONDS = 0
+
+    METRICS.reset()
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Classe(name="6ème"))
+        for status in ("queued", "queued", "sent_whatsapp", "failed_whatsapp"):
+            db.session.add(MessageLog(parent_id=1, template_name="t", content="c", status=status))
+        db.session.commit()
+    yield app
+    METRICS.reset()
+
+
+def _metrics(client):
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    return resp.get_data(as_text=True)
+
+
+def test_request_latency_and_db_metrics(app):
+    client = app.test_client()
+    client.get("/parents/")
+    client.get("/parents/")
+    body = _metrics(client)
+
+    assert 'app_http_requests_total{endpoint="parents.list_parents",method="GET",status="200"} 2' in body
+    assert 'app_http_request_duration_seconds_bucket{endpoint="parents.list_parents",status="200",le="+Inf"} 2' in body
+    assert 'app_http_request_duration_seconds_count{endpoint="parents.list_parents",status="200"} 2' in body
+    assert 'app_db_queries_total{endpoint="parents.list_parents"}' in body
+    assert "# TYPE app_http_request_duration_seconds histogram" in body
+
+
+def test_queue_depth_and_export_duration(app):
+    client = app.test_client()
+    with app.app_context():
+        class_id = Classe.query.first().id
+    assert client.get(f"/eleves/export/excel/{class_id}").status_code == 200
+    body = _metrics(client)
+
+    assert 'app_message_queue_depth{status="queued"} 2' in body
+    assert 'app_message_queue_depth{status="failed_whatsapp"} 1' in body
+    assert 'app_export_duration_seconds_count{format="xlsx"} 1' in body
+
+
+def test_metrics_are_aggregated_across_workers(app):
+    client = app.test_client()
+    client.get("/parents/")
+
+    # Fichier laissé par un autre worker
+    other = MetricsStore()
+    other.directory = app.config["METRICS_DIR"]
+    other.inc("app_http_requests_total", {"endpoint": "parents.list_parents", "method": "GET", "status": "200"}, 5)
+    other.observe("app_http_request_duration_seconds",
+                  {"endpoint": "parents.list_parents", "status": "200"}, 0.02)
+    with open(other.path(pid=999999), "w") as f:
+        json.dump(other.snapshot(), f)
+
+    body = _metrics(client)
+    assert 'app_http_requests_total{endpoint="parents.list_parents",method="GET",status="200"} 6' in body
+    assert 'app_http_request_duration_seconds_count{endpoint="parents.list_parents",status="200"} 2' in body
+
+    clear_metrics_dir(app.config["METRICS_DIR"])
+    assert os.listdir(app.config["METRICS_DIR"]) == []
+
+
+def test_metrics_token(app):
+    app.config["METRICS_TOKEN"] = "s3cret"
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 401
+    resp = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
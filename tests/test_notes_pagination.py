@@ -0,0 +1,102 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+import re
+from datetime import date, timedelta
+
+import pytest
+from app import create_app
+from models import db, User, Classe, Student, Assessment
+from services.assessments import keyset_page, filter_assessments, decode_cursor
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    NOTES_PAGE_SIZE = 4
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        admin = User(email="admin@test.com", name="Admin", role="admin")
+        admin.set_password("secret123")
+        db.session.add(admin)
+        classes = [Classe(name="6ème"), Classe(name="5ème")]
+        db.session.add_all(classes)
+        db.session.flush()
+        for classe in classes:
+            student = Student(first_name="Eleve", last_name=classe.name, class_id=classe.id)
+            db.session.add(student)
+            db.session.flush()
+            # Deux notes par jour : le curseur doit départager les dates égales par id
+            for day in range(5):
+                for subject in ("Français", "Mathématique"):
+                    db.session.add(Assessment(
+                        student_id=student.id, subject=subject, assessment_type="devoir",
+                        score=10, max_score=20, date=date(2026, 1, 5) + timedelta(days=day), term=2,
+                    ))
+        db.session.commit()
+        app.admin_id = admin.id
+        app.class_id = classes[0].id
+    yield app
+
+
+def _client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(app.admin_id)
+        session["_fresh"] = True
+    return client
+
+
+def test_keyset_pages_cover_all_rows_once(app):
+    with app.app_context():
+        seen, cursor = [], None
+        while True:
+            page, cursor = keyset_page(Assessment.query, cursor, limit=3)
+            seen.extend(a.id for a in page)
+            if cursor is None:
+                break
+
+        expected = [a.id for a in Assessment.query.order_by(Assessment.date.desc(), Assessment.id.desc())]
+        assert seen == expected
+
+
+def test_keyset_page_keeps_filters(app):
+    with app.app_context():
+        query = filter_assessments(Assessment.query, class_id=app.class_id, subject="Français")
+        first, cursor = keyset_page(query, None, limit=3)
+        second, end = keyset_page(query, cursor, limit=3)
+
+        assert len(first) == 3 and len(second) == 2 and end is None
+        assert {a.subject for a in first + second} == {"Français"}
+        assert {a.student.class_id for a in first + second} == {app.class_id}
+
+
+def test_decode_cursor_rejects_garbage():
+    assert decode_cursor("2026-01-05_12") == (date(2026, 1, 5), 12)
+    assert decode_cursor("n'importe quoi") is None
+    assert decode_cursor(None) is None
+
+
+def test_dashboard_load_more_link(app):
+    client = _client(app)
+    resp = client.get(f"/notes/dashboard?class_id={app.class_id}")
+    html = resp.get_data(as_text=True)
+    assert resp.status_code == 200
+    assert "4 note(s) sur cette page" in html
+
+    match = re.search(r'href="(/notes/dashboard\?[^"]*cursor=[^"]*)"', html)
+    assert match, "lien 'Charger plus' absent"
+    next_url = match.group(1).replace("&amp;", "&")
+    assert f"class_id={app.class_id}" in next_url
+
+    html = client.get(next_url).get_data(as_text=True)
+    assert "4 note(s) sur cette page" in html
+    assert "Notes les plus récentes" in html
@@ -0,0 +1,56 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+import logging
+import re
+
+import pytest
+from app import create_app
+from models import db, Classe, Student, Parent
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+    SLOW_QUERY_MS = None
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        classe = Classe(name="6ème")
+        db.session.add(classe)
+        db.session.flush()
+        for i in range(3):
+            parent = Parent(first_name=f"P{i}", last_name="Parent")
+            parent.students.append(Student(first_name=f"E{i}", last_name="Eleve", class_id=classe.id))
+            db.session.add(parent)
+        db.session.commit()
+        yield app
+
+
+def _query_count(response):
+    match = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', response.headers["Server-Timing"])
+    return int(match.group(1))
+
+
+def test_server_timing_header(app):
+    resp = app.test_client().get("/parents/")
+    assert resp.status_code == 200
+    assert "app;dur=" in resp.headers["Server-Timing"]
+    assert _query_count(resp) >= 1
+
+
+def test_slow_queries_logged_with_endpoint(app, caplog):
+    app.config["SLOW_QUERY_MS"] = 0
+    with caplog.at_level(logging.WARNING):
+        app.test_client().get("/parents/")
+    messages = [r.getMessage() for r in caplog.records if "Requête SQL lente" in r.getMessage()]
+    assert messages
+    assert all("[parents.list_parents]" in m for m in messages)
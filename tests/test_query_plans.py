@@ -0,0 +1,82 @@
+"""
+Vérifie avec EXPLAIN QUERY PLAN que les requêtes des routes fréquentes
+utilisent un index plutôt qu'un parcours complet de table.
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+import re
+from datetime import date
+
+import pytest
+from app import create_app
+from models import db, Assessment, Student, Parent, parent_student
+from services.messaging import BulkMessageProcessor
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+
+
+FULL_SCAN = re.compile(r"^SCAN (assessments|students|parent_student|message_logs)$")
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def query_plan(query):
+    """Lignes 'detail' de EXPLAIN QUERY PLAN pour une requête ORM ou Core."""
+    statement = getattr(query, "statement", query)
+    sql = statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return [row[-1] for row in rows]
+
+
+def assert_uses_index(query):
+    plan = query_plan(query)
+    scans = [line for line in plan if FULL_SCAN.match(line)]
+    assert not scans, f"Parcours complet : {plan}"
+    assert any("INDEX" in line for line in plan), plan
+
+
+HOT_QUERIES = {
+    # student_bulletin
+    "bulletin": lambda: Assessment.query.filter_by(student_id=1, term=1)
+        .order_by(Assessment.date, Assessment.subject),
+    # correspondence
+    "correspondence": lambda: Assessment.query.filter_by(student_id=1, date=date(2025, 1, 6))
+        .order_by(Assessment.subject),
+    # notes_dashboard : notes du jour
+    "notes_today": lambda: Assessment.query.filter(Assessment.date == date(2025, 1, 6)),
+    # class_stats
+    "class_stats": lambda: Assessment.query.join(Student)
+        .filter(Student.class_id == 1, Assessment.term == 1),
+    # ParentMessagingService.send_daily_notes
+    "send_daily_notes": lambda: Assessment.query.join(Student).filter(
+        Student.class_id == 1,
+        Assessment.subject == "Mathématique",
+        Assessment.date == date(2025, 1, 6)),
+    # élèves d'une classe (saisie, exports)
+    "students_by_class": lambda: Student.query.filter_by(class_id=1).order_by(Student.last_name),
+    # student.parents
+    "parents_of_student": lambda: Parent.query.join(parent_student)
+        .filter(parent_student.c.student_id == 1),
+    # BulkMessageProcessor.process_pending_messages
+    "pending_messages": lambda: BulkMessageProcessor.pending_query(),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_index(app, name):
+    assert_uses_index(HOT_QUERIES[name]())
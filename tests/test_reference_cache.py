@@ -0,0 +1,93 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date
+
+import pytest
+from app import create_app
+from models import db, Classe, Student, Assessment, SchoolYear
+from services.reference import get_classes, get_subjects, get_active_year, class_choices
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+    REFERENCE_CACHE_TTL = 300
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        classe = Classe(name="6ème")
+        db.session.add_all([classe, SchoolYear(year="2025-2026", active=True)])
+        db.session.flush()
+        student = Student(first_name="Eleve", last_name="Test", class_id=classe.id)
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(Assessment(student_id=student.id, subject="Français", assessment_type="devoir",
+                                  score=10, max_score=20, date=date(2026, 1, 5), term=2))
+        db.session.commit()
+        app.student_id = student.id
+        yield app
+
+
+def _note(app, subject, day):
+    return Assessment(student_id=app.student_id, subject=subject, assessment_type="devoir",
+                      score=12, max_score=20, date=day, term=2)
+
+
+def test_values_are_served_from_cache(app, max_queries):
+    get_classes(), get_subjects(), get_active_year()
+    with max_queries(app, 0):
+        assert [c.name for c in get_classes()] == ["6ème"]
+        assert get_subjects() == ["Français"]
+        assert get_active_year() == "2025-2026"
+        assert class_choices() == [(get_classes()[0].id, "6ème")]
+
+
+def test_commit_invalidates_changed_tables(app):
+    get_classes(), get_subjects()
+    db.session.add(Classe(name="5ème"))
+    db.session.commit()
+    assert [c.name for c in get_classes()] == ["5ème", "6ème"]
+
+    db.session.add(_note(app, "SVT", date(2026, 1, 6)))
+    db.session.commit()
+    assert get_subjects() == ["Français", "SVT"]
+
+
+def test_rollback_keeps_cache(app):
+    get_classes()
+    db.session.add(Classe(name="5ème"))
+    db.session.flush()
+    db.session.rollback()
+    assert [c.name for c in get_classes()] == ["6ème"]
+
+
+def test_known_subject_does_not_invalidate(app, max_queries):
+    get_subjects()
+    db.session.add(_note(app, "Français", date(2026, 1, 7)))
+    db.session.commit()
+    with max_queries(app, 0):
+        assert get_subjects() == ["Français"]
+
+
+def test_bulk_update_invalidates_school_year(app):
+    assert get_active_year() == "2025-2026"
+    SchoolYear.query.update({SchoolYear.active: False})
+    db.session.commit()
+    assert get_active_year() is None
+
+
+def test_ttl_zero_disables_cache(app, max_queries):
+    app.config["REFERENCE_CACHE_TTL"] = 0
+    get_classes()
+    with max_queries(app, 1) as counter:
+        get_classes()
+    assert counter.count == 1
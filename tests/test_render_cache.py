@@ -0,0 +1,163 @@
+"""
+Cache des bulletins et statistiques de classe : clé dérivée des données,
+ETag / Last-Modified et 304.
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date
+
+import pytest
+from app import create_app
+from models import db, User, Classe, Student, Assessment
+from services.assessments import upsert_assessments
+import blueprints.notes.routes as notes_routes
+
+
+DAY = date(2026, 1, 5)
+
+
+@pytest.fixture
+def app():
+    class TestConfig:
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        users = []
+        for email in ("admin@test.com", "direction@test.com"):
+            user = User(email=email, name="Admin", role="admin")
+            user.set_password("secret123")
+            users.append(user)
+        classe = Classe(name="6ème")
+        db.session.add_all([*users, classe])
+        db.session.flush()
+        for name, score in (("Adjo", 14), ("Bio", 11)):
+            student = Student(first_name="Élève", last_name=name, class_id=classe.id)
+            db.session.add(student)
+            db.session.flush()
+            db.session.add(Assessment(student_id=student.id, subject="Français", assessment_type="devoir",
+                                      score=score, max_score=20, date=DAY, term=1))
+        db.session.commit()
+        app.user_ids = [u.id for u in users]
+        app.class_id = classe.id
+        app.student_id = Student.query.filter_by(last_name="Bio").first().id
+    return app
+
+
+def _client(app, user=0):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(app.user_ids[user])
+        session["_fresh"] = True
+    return client
+
+
+@pytest.fixture
+def engine_calls(monkeypatch):
+    calls = []
+    original = notes_routes.compute_class_results
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(notes_routes, "compute_class_results", counting)
+    return calls
+
+
+@pytest.mark.parametrize("url", ["/notes/bulletin/{student}/1", "/notes/stats/{classe}/1"])
+def test_etag_revalidation_and_cache_hit(app, engine_calls, url):
+    url = url.format(student=app.student_id, classe=app.class_id)
+    client = _client(app)
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers["ETag"] and first.last_modified is not None
+    assert "private" in first.headers["Cache-Control"] and "no-cache" in first.headers["Cache-Control"]
+    assert len(engine_calls) == 1
+
+    again = client.get(url)
+    assert again.status_code == 200 and again.data == first.data
+    assert len(engine_calls) == 1  # fragment servi depuis le cache
+
+    revalidated = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == first.headers["ETag"]
+
+    other_user = _client(app, user=1).get(url)
+    assert other_user.headers["ETag"] != first.headers["ETag"]
+
+
+def test_orm_write_changes_version(app, engine_calls):
+    client = _client(app)
+    url = f"/notes/bulletin/{app.student_id}/1"
+    first = client.get(url)
+    assert "Rang : 2e / 2" in first.get_data(as_text=True)
+
+    with app.app_context():
+        Assessment.query.filter_by(student_id=app.student_id).first().score = 18
+        db.session.commit()
+
+    resp = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != first.headers["ETag"]
+    assert "Rang : 1er / 2" in resp.get_data(as_text=True)
+    assert len(engine_calls) == 2
+
+
+def test_classmate_bulk_upsert_changes_version(app):
+    client = _client(app)
+    url = f"/notes/stats/{app.class_id}/1"
+    first = client.get(url)
+
+    with app.app_context():
+        adjo = Student.query.filter_by(last_name="Adjo").first().id
+        upsert_assessments([{"student_id": adjo, "subject": "Français", "assessment_type": "devoir",
+                             "date": DAY, "term": 1, "score": 4.0, "max_score": 20.0}])
+        db.session.commit()
+
+    resp = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert resp.status_code == 200
+    html = resp.get_data(as_text=True)
+    assert html.index("Bio Élève") < html.index("Adjo Élève")
+
+
+def test_other_term_write_keeps_version(app):
+    client = _client(app)
+    url = f"/notes/stats/{app.class_id}/1"
+    first = client.get(url)
+
+    with app.app_context():
+        db.session.add(Assessment(student_id=app.student_id, subject="Français", assessment_type="devoir",
+                                  score=9, max_score=20, date=DAY, term=2))
+        db.session.commit()
+
+    assert client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+
+def test_class_without_notes_still_redirects(app):
+    resp = _client(app).get(f"/notes/stats/{app.class_id}/3")
+    assert resp.status_code == 302
+
+
+def test_class_rename_changes_version(app, engine_calls):
+    client = _client(app)
+    url = f"/notes/bulletin/{app.student_id}/1"
+    first = client.get(url)
+    assert "6ème" in first.get_data(as_text=True)
+
+    with app.app_context():
+        db.session.get(Classe, app.class_id).name = "6ème A"
+        db.session.commit()
+
+    resp = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != first.headers["ETag"]
+    assert "6ème A" in resp.get_data(as_text=True)
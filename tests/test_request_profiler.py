@@ -0,0 +1,74 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+import json
+import pstats
+
+import pytest
+from app import create_app
+from models import db, User
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig:
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+        PROFILE_DIR = str(tmp_path / "profiles")
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        for email, role in (("admin@test.com", "admin"), ("prof@test.com", "teacher")):
+            user = User(email=email, name=role, role=role)
+            user.set_password("secret123")
+            db.session.add(user)
+        db.session.commit()
+        user_ids = {u.email: u.id for u in User.query}
+
+    # Requêtes hors contexte applicatif : sinon flask.g (et l'utilisateur
+    # mis en cache par Flask-Login) serait partagé entre les requêtes du test
+    app.user_ids = user_ids
+    yield app
+
+
+def _client_for(app, email):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(app.user_ids[email])
+        session["_fresh"] = True
+    return client
+
+
+def test_admin_can_profile_a_request(app):
+    resp = _client_for(app, "admin@test.com").get("/parents/?_profile=1")
+    assert resp.status_code == 200
+    name = resp.headers["X-Profile-File"]
+    assert "parents.list_parents" in name
+
+    directory = app.config["PROFILE_DIR"]
+    stats = pstats.Stats(os.path.join(directory, name))
+    assert stats.total_calls > 0
+    with open(os.path.join(directory, name[:-len(".prof")] + ".json")) as f:
+        meta = json.load(f)
+    assert meta["endpoint"] == "parents.list_parents"
+    assert meta["sql_queries"] >= 1
+
+
+def test_profile_header_ignored_for_teachers(app):
+    resp = _client_for(app, "prof@test.com").get("/parents/", headers={"X-Profile": "1"})
+    assert resp.status_code == 200
+    assert "X-Profile-File" not in resp.headers
+    assert not os.path.exists(app.config["PROFILE_DIR"])
+
+
+def test_admin_lists_profiles(app):
+    client = _client_for(app, "admin@test.com")
+    client.get("/parents/", headers={"X-Profile": "1"})
+    profiles = client.get("/admin/profiles").get_json()
+    assert profiles[0]["endpoint"] == "parents.list_parents"
+    assert client.get(f"/admin/profiles/{profiles[0]['file']}").status_code == 200
+    assert _client_for(app, "prof@test.com").get("/admin/profiles").status_code == 403
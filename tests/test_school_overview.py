@@ -0,0 +1,134 @@
+"""
+Vue d'ensemble de l'établissement : matrice classe × matière et export Excel.
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date
+from io import BytesIO
+
+import pytest
+from openpyxl import load_workbook
+from app import create_app
+from models import db, User, Classe, Student, Assessment
+from services.aggregates import school_matrix
+from services.exports import get_renderer
+
+
+DAY = date(2026, 1, 5)
+
+
+@pytest.fixture
+def app():
+    class TestConfig:
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        admin = User(email="admin@test.com", name="Admin", role="admin")
+        admin.set_password("secret123")
+        teacher = User(email="prof@test.com", name="Prof", role="teacher")
+        teacher.set_password("secret123")
+        sixieme, cinquieme = Classe(name="6ème"), Classe(name="5ème")
+        db.session.add_all([admin, teacher, sixieme, cinquieme])
+        db.session.flush()
+        # 6ème : Français 14 et 8, Maths 16 ; 5ème : Français 10/40 (= 5/20), pas de Maths
+        for name, classe, grades in (("Adjo", sixieme, [("Français", 14, 20), ("Mathématique", 16, 20)]),
+                                     ("Bio", sixieme, [("Français", 8, 20)]),
+                                     ("Chabi", cinquieme, [("Français", 10, 40)])):
+            student = Student(first_name="Élève", last_name=name, class_id=classe.id)
+            db.session.add(student)
+            db.session.flush()
+            for subject, score, max_score in grades:
+                db.session.add(Assessment(student_id=student.id, subject=subject, assessment_type="devoir",
+                                          score=score, max_score=max_score, date=DAY, term=1))
+        db.session.commit()
+        app.user_ids = (admin.id, teacher.id)
+        app.class_ids = {"6ème": sixieme.id, "5ème": cinquieme.id}
+    return app
+
+
+def _client(app, user=0):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(app.user_ids[user])
+        session["_fresh"] = True
+    return client
+
+
+def test_matrix_is_one_query_and_pivots(app, max_queries):
+    with max_queries(app, 1):
+        with app.app_context():
+            matrix = school_matrix(1)
+
+    assert matrix["subjects"] == ["Français", "Mathématique"]
+    rows = {row["class_name"]: row for row in matrix["rows"]}
+    assert rows["6ème"]["cells"]["Français"] == {"average": 11.0, "count": 2, "pass_rate": 0.5}
+    assert rows["6ème"]["total"]["average"] == pytest.approx(38 / 3)
+    assert rows["5ème"]["cells"]["Français"]["average"] == 5.0
+    assert rows["5ème"]["cells"]["Mathématique"] is None
+    assert matrix["totals"]["Français"]["count"] == 3
+    assert matrix["overall"]["pass_rate"] == pytest.approx(2 / 4)
+
+    with app.app_context():
+        assert school_matrix(2)["rows"] == []
+
+
+def test_overview_page(app):
+    client = _client(app)
+    resp = client.get("/notes/school/1")
+    assert resp.status_code == 200
+    html = resp.get_data(as_text=True)
+    assert "11.00" in html and "hsl(" in html
+    assert f"/notes/stats/{app.class_ids['5ème']}/1" in html
+    assert "/notes/school/1/export" in html
+
+    assert client.get("/notes/school/1", headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
+    assert "Aucune note" in client.get("/notes/school/2").get_data(as_text=True)
+    assert client.get("/notes/school/5").status_code == 404
+
+
+def test_overview_requires_admin_or_director(app):
+    resp = _client(app, user=1).get("/notes/school/1")
+    assert resp.status_code == 302
+
+
+def test_xlsx_export_has_color_scales(app):
+    resp = _client(app).get("/notes/school/1/export")
+    assert resp.status_code == 200
+    assert "vue_ensemble_T1.xlsx" in resp.headers["Content-Disposition"]
+
+    workbook = load_workbook(BytesIO(resp.data))
+    assert workbook.sheetnames == ["Moyennes", "Réussite", "Nombre de notes"]
+    sheet = workbook["Moyennes"]
+    assert [c.value for c in sheet[1]] == ["Classe", "Français", "Mathématique", "Ensemble"]
+    assert len(sheet.conditional_formatting) == 1
+
+
+def test_renderer_handles_empty_matrix():
+    workbook = load_workbook(get_renderer("school_xlsx").render(
+        {"term": 1, "subjects": [], "rows": [], "totals": {}, "overall": None}))
+    assert workbook.sheetnames[0] == "Moyennes"
+
+
+def test_class_rename_refreshes_page_and_export(app):
+    client = _client(app)
+    first = client.get("/notes/school/1")
+    client.get("/notes/school/1/export")
+
+    with app.app_context():
+        db.session.get(Classe, app.class_ids["5ème"]).name = "5ème B"
+        db.session.commit()
+
+    resp = client.get("/notes/school/1", headers={"If-None-Match": first.headers["ETag"]})
+    assert resp.status_code == 200
+    assert "5ème B" in resp.get_data(as_text=True)
+
+    sheet = load_workbook(BytesIO(client.get("/notes/school/1/export").data))["Moyennes"]
+    assert "5ème B" in [row[0] for row in sheet.iter_rows(min_row=2, values_only=True)]
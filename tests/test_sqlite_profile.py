@@ -0,0 +1,32 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from app import create_app, Config
+from models import db
+from services.database import sqlite_pragmas
+
+
+def _pragma(name):
+    return db.session.execute(db.text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_profile_applied_on_connect(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        TESTING = True
+        SQLITE_FOREIGN_KEYS = True
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        assert _pragma("journal_mode") == "wal"
+        assert _pragma("busy_timeout") == 5000
+        assert _pragma("synchronous") == 1  # NORMAL
+        assert _pragma("temp_store") == 2  # MEMORY
+        assert _pragma("cache_size") == -20000
+        assert _pragma("foreign_keys") == 1
+        db.engine.dispose()
+
+
+def test_sqlite_pragmas_skip_unset_keys():
+    config = {"SQLITE_JOURNAL_MODE": "WAL", "SQLITE_SYNCHRONOUS": None, "SQLITE_FOREIGN_KEYS": False}
+    assert sqlite_pragmas(config) == [("journal_mode", "WAL"), ("foreign_keys", "OFF")]
@@ -0,0 +1,160 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.getcwd()))
+
+from datetime import date
+
+import pytest
+from app import create_app
+from models import db, Classe, Student, Assessment, StatsCounter
+from services.assessments import upsert_assessments
+from services.stats import dashboard_counters, rebuild_counters, read_counters
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TESTING = True
+    LOGIN_DISABLED = True
+
+
+DAY = date(2026, 1, 5)
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _counters():
+    return {c.name: c.value for c in StatsCounter.query if c.value}
+
+
+def _student(classe, name="Eleve"):
+    student = Student(first_name=name, last_name="Test", classe=classe)
+    db.session.add(student)
+    db.session.flush()
+    return student
+
+
+def _note(student, subject="Français", day=DAY, atype="devoir"):
+    return Assessment(student_id=student.id, subject=subject, assessment_type=atype,
+                      score=10, max_score=20, date=day, term=2)
+
+
+def test_orm_inserts_and_deletes_update_counters(app):
+    classe = Classe(name="6ème")
+    student = _student(classe)
+    db.session.add_all([_note(student), _note(student, "Anglais"), _note(student, "Anglais", atype="interrogation")])
+    db.session.commit()
+
+    values = dashboard_counters(today=DAY)
+    assert values == {"students": 1, "classes": 1, "assessments": 3, "subjects": 2, "today": 3}
+
+    # Suppression en cascade élève -> notes
+    db.session.delete(student)
+    db.session.commit()
+    assert dashboard_counters(today=DAY) == {"students": 0, "classes": 1, "assessments": 0, "subjects": 0, "today": 0}
+
+
+def test_rollback_discards_counter_changes(app):
+    classe = Classe(name="6ème")
+    db.session.add(classe)
+    db.session.commit()
+
+    _student(classe)
+    db.session.rollback()
+    assert read_counters(["students"]) == {"students": 0}
+
+
+def test_moving_a_note_updates_detailed_counters(app):
+    student = _student(Classe(name="6ème"))
+    note = _note(student)
+    db.session.add(note)
+    db.session.commit()
+
+    note.date = date(2026, 1, 6)
+    note.subject = "SVT"
+    db.session.commit()
+
+    counters = _counters()
+    assert "assessments:date:2026-01-05" not in counters
+    assert counters["assessments:date:2026-01-06"] == 1
+    assert counters["assessments:subject:SVT"] == 1
+    assert counters["subjects"] == 1
+
+
+def test_bulk_upsert_and_rebuild_agree(app):
+    student = _student(Classe(name="6ème"))
+    db.session.commit()
+    rows = [
+        {"student_id": student.id, "subject": subject, "assessment_type": "devoir",
+         "date": DAY, "term": 2, "score": 12.0, "max_score": 20.0}
+        for subject in ("Français", "SVT")
+    ]
+    upsert_assessments(rows)
+    upsert_assessments(rows)  # notes identiques : pas de double comptage
+    db.session.commit()
+
+    incremental = _counters()
+    assert incremental["assessments"] == 2
+    rebuild_counters()
+    db.session.commit()
+    assert _counters() == incremental
+
+
+def test_rebuild_cli(app):
+    student = _student(Classe(name="6ème"))
+    db.session.add(_note(student))
+    db.session.commit()
+    db.session.execute(db.delete(StatsCounter))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rebuild-stats"])
+    assert "1 élève(s), 1 note(s), 1 matière(s)" in result.output
+    assert read_counters(["assessments"]) == {"assessments": 1}
+
+
+def test_concurrent_upserts_count_each_note_once(tmp_path):
+    """Double envoi du même formulaire : le second enregistrement attend le premier."""
+    import threading
+    import time
+
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'race.db'}"
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+        classe = Classe(name="6ème")
+        rows = [dict(student_id=_student(classe, f"E{i}").id, subject="Français", assessment_type="devoir",
+                     date=DAY, term=2, score=12.0, max_score=20.0) for i in range(3)]
+        db.session.commit()
+
+    first_written = threading.Event()
+    results = {}
+
+    def save(name, hold=0.0):
+        with app.app_context():
+            results[name] = upsert_assessments(rows)
+            if hold:
+                first_written.set()
+                time.sleep(hold)  # transaction encore ouverte pendant que l'autre requête arrive
+            db.session.commit()
+
+    first = threading.Thread(target=save, args=("first", 0.5))
+    first.start()
+    first_written.wait(5)
+    second = threading.Thread(target=save, args=("second",))
+    second.start()
+    first.join()
+    second.join()
+
+    assert results["first"]["inserted"] == 3
+    assert results["second"] == {"inserted": 0, "updated": 0, "skipped": 3}
+    with app.app_context():
+        assert read_counters(["assessments"])["assessments"] == Assessment.query.count() == 3